@@ -1,20 +1,68 @@
 """*Read target configuration file and parse its content to data objects*
 
 Read the configuration and parse its content to a specific data object so that it could be convenience to use it.
+
+Overwriting a file is atomic: the content is streamed into a temporary file in the same directory, synced to disk and
+renamed to the target path, so a crash never leaves a truncated file. The content is hashed while it's written and the
+target file is left untouched if it already has the same content.
 """
 
+import functools
+import hashlib
 import json
 import os
+import secrets
+import shutil
 from abc import ABCMeta, abstractmethod
-from typing import Union
+from typing import IO, Any, Optional, Tuple, Union
+
+_CHUNK_SIZE = 64 * 1024
+
+
+class _HashingWriter:
+    """Encode the written text into a binary stream and hash the bytes on the way."""
+
+    def __init__(self, stream: IO[bytes]):
+        self._stream = stream
+        self._hash = hashlib.sha256()
+        self.size = 0
+
+    def write(self, text: str) -> int:
+        data = text.encode("utf-8")
+        self._hash.update(data)
+        self._stream.write(data)
+        self.size += len(data)
+        return len(text)
+
+    def flush(self) -> None:
+        self._stream.flush()
+
+    def hexdigest(self) -> str:
+        return self._hash.hexdigest()
+
+
+def _file_hash(path: str, size: int) -> Optional[str]:
+    if not os.path.isfile(path) or os.path.getsize(path) != size:
+        return None
+    file_hash = hashlib.sha256()
+    with open(path, "rb") as file_stream:
+        for chunk in iter(lambda: file_stream.read(_CHUNK_SIZE), b""):
+            file_hash.update(chunk)
+    return file_hash.hexdigest()
 
-from yaml import dump, load
 
-try:
-    from yaml import CDumper as Dumper
-    from yaml import CLoader as Loader
-except ImportError:
-    from yaml import Dumper, Loader  # type: ignore
+def _fsync_directory(directory: str) -> None:
+    # Persist the renaming itself. Directories cannot be opened on Windows, the renaming is durable there anyway.
+    try:
+        fd = os.open(directory, os.O_RDONLY)
+    except OSError:
+        return
+    try:
+        os.fsync(fd)
+    except OSError:
+        pass
+    finally:
+        os.close(fd)
 
 
 class _BaseFileOperation(metaclass=ABCMeta):
@@ -22,14 +70,65 @@ class _BaseFileOperation(metaclass=ABCMeta):
     def read(self, path: str) -> dict:
         pass
 
+    def write(self, path: str, config: Union[str, dict], mode: str = "a+") -> bool:
+        """Write the configuration and return whether the file is changed.
+
+        The file is appended in place with mode *a*, otherwise it's replaced atomically.
+        """
+        if "a" in mode:
+            with open(path, mode, encoding="utf-8") as file_stream:
+                self._stream(config, file_stream)
+            return True
+        return self._replace(path, config)
+
     @abstractmethod
-    def write(self, path: str, config: Union[str, dict], mode: str = "a+") -> None:
+    def serialize(self, config: dict) -> str:
         pass
 
     @abstractmethod
-    def serialize(self, config: dict) -> str:
+    def dump(self, config: dict, stream: IO[str]) -> None:
+        """Serialize the configuration into the stream piece by piece."""
         pass
 
+    def _stream(self, config: Union[str, dict], stream: IO[str]) -> None:
+        if isinstance(config, dict):
+            self.dump(config, stream)
+        else:
+            for start in range(0, len(config), _CHUNK_SIZE):
+                stream.write(config[start : start + _CHUNK_SIZE])
+
+    def _replace(self, path: str, config: Union[str, dict]) -> bool:
+        directory = os.path.dirname(os.path.abspath(path))
+        temp_path = os.path.join(directory, f".{os.path.basename(path)}.{secrets.token_hex(8)}.tmp")
+        # Unlike *mkstemp* (0600), the umask applies to it like *open*, so a new file gets the permission it would get.
+        fd = os.open(temp_path, os.O_WRONLY | os.O_CREAT | os.O_EXCL | getattr(os, "O_BINARY", 0), 0o666)
+        try:
+            with os.fdopen(fd, "wb") as file_stream:
+                writer = _HashingWriter(file_stream)
+                self._stream(config, writer)
+                writer.flush()
+                if writer.hexdigest() == _file_hash(path, writer.size):
+                    return False
+                os.fsync(file_stream.fileno())
+            if os.path.exists(path):
+                shutil.copymode(path, temp_path)
+            os.replace(temp_path, path)
+            _fsync_directory(directory)
+            return True
+        finally:
+            if os.path.exists(temp_path):
+                os.remove(temp_path)
+
+
+@functools.lru_cache(maxsize=None)
+def _yaml_backend() -> Tuple[Any, Any, Any]:
+    # PyYAML is imported on the first use only, so the code paths without YAML don't pay for it.
+    import yaml
+
+    if getattr(yaml, "__with_libyaml__", False):
+        return yaml, yaml.CSafeLoader, yaml.CDumper
+    return yaml, yaml.SafeLoader, yaml.Dumper
+
 
 class YAML(_BaseFileOperation):
     def read(self, path: str) -> dict:
@@ -37,17 +136,18 @@ class YAML(_BaseFileOperation):
         if not exist_file:
             raise FileNotFoundError(f"The target configuration file {path} doesn't exist.")
 
+        yaml, loader, _ = _yaml_backend()
         with open(path, "r", encoding="utf-8") as file_stream:
-            data: dict = load(stream=file_stream, Loader=Loader)
+            data: dict = yaml.load(stream=file_stream, Loader=loader)
         return data
 
-    def write(self, path: str, config: Union[str, dict], mode: str = "a+") -> None:
-        yaml_content = self.serialize(config) if isinstance(config, dict) else config
-        with open(path, mode, encoding="utf-8") as file_stream:
-            file_stream.writelines(yaml_content)
-
     def serialize(self, config: dict) -> str:
-        return dump(config, Dumper=Dumper, sort_keys=False)
+        yaml, _, dumper = _yaml_backend()
+        return yaml.dump(config, Dumper=dumper, sort_keys=False)
+
+    def dump(self, config: dict, stream: IO[str]) -> None:
+        yaml, _, dumper = _yaml_backend()
+        yaml.dump(config, stream, Dumper=dumper, sort_keys=False)
 
 
 class JSON(_BaseFileOperation):
@@ -60,10 +160,8 @@ class JSON(_BaseFileOperation):
             data: dict = json.loads(file_stream.read())
         return data
 
-    def write(self, path: str, config: Union[str, dict], mode: str = "a+") -> None:
-        json_content = self.serialize(config) if isinstance(config, dict) else config
-        with open(path, mode, encoding="utf-8") as file_stream:
-            file_stream.writelines(json_content)
-
     def serialize(self, config: dict) -> str:
         return json.dumps(config, indent=4)
+
+    def dump(self, config: dict, stream: IO[str]) -> None:
+        json.dump(config, stream, indent=4)
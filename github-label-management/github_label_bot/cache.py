@@ -0,0 +1,104 @@
+"""*Persist the label snapshots of repositories between runs*
+
+Every entry keeps the labels of one repository with the *ETag* of the response which returned them, so that the next
+run could ask GitHub with a conditional request and reuse the snapshot if it gets *304 Not Modified*.
+"""
+
+import os
+import threading
+import time
+from dataclasses import dataclass, field
+from typing import Any, Dict, List, Optional
+
+from ._utils import JSON
+
+DEFAULT_MAX_AGE = 24 * 60 * 60
+
+
+@dataclass
+class LabelSnapshotEntry:
+    etag: str
+    fetched_at: float
+    labels: List[Dict[str, Any]] = field(default_factory=list)
+
+    def deserialize(self) -> Dict:
+        return {
+            "etag": self.etag,
+            "fetched_at": self.fetched_at,
+            "labels": self.labels,
+        }
+
+    @staticmethod
+    def serialize(data: Dict) -> "LabelSnapshotEntry":
+        etag = data.get("etag", "")
+        if not etag:
+            raise ValueError("Property *etag* cannot be empty.")
+        return LabelSnapshotEntry(
+            etag=etag,
+            fetched_at=float(data.get("fetched_at", 0)),
+            labels=data.get("labels", []),
+        )
+
+
+class LabelSnapshotCache:
+    def __init__(self, path: str, max_age: float = DEFAULT_MAX_AGE):
+        self._path = path
+        self._max_age = max_age
+        self._entries: Dict[str, LabelSnapshotEntry] = {}
+        self._lock = threading.Lock()
+        self._dirty = False
+        self._load()
+
+    def get(self, repository: str) -> Optional[LabelSnapshotEntry]:
+        with self._lock:
+            entry = self._entries.get(repository)
+            if entry and self._is_expired(entry):
+                del self._entries[repository]
+                self._dirty = True
+                return None
+            return entry
+
+    def put(self, repository: str, etag: str, labels: List[Dict[str, Any]]) -> None:
+        with self._lock:
+            self._entries[repository] = LabelSnapshotEntry(etag=etag, fetched_at=time.time(), labels=labels)
+            self._dirty = True
+
+    def invalidate(self, repository: str) -> None:
+        with self._lock:
+            if self._entries.pop(repository, None):
+                self._dirty = True
+
+    def save(self) -> None:
+        with self._lock:
+            if not self._dirty:
+                return
+            data = {
+                "repositories": {
+                    repository: entry.deserialize()
+                    for repository, entry in self._entries.items()
+                    if not self._is_expired(entry)
+                }
+            }
+            directory = os.path.dirname(self._path)
+            if directory:
+                os.makedirs(directory, exist_ok=True)
+            JSON().write(path=self._path, mode="w+", config=data)
+            self._dirty = False
+
+    def _load(self) -> None:
+        if not os.path.exists(self._path):
+            return
+        try:
+            data = JSON().read(self._path)
+            entries = {
+                repository: LabelSnapshotEntry.serialize(entry)
+                for repository, entry in data.get("repositories", {}).items()
+            }
+        except ValueError as e:
+            print(f"[DEBUG] Ignore the broken label cache {self._path}: {e}")
+            return
+        self._entries = {repository: entry for repository, entry in entries.items() if not self._is_expired(entry)}
+        self._dirty = len(self._entries) != len(entries)
+
+    def _is_expired(self, entry: LabelSnapshotEntry) -> bool:
+        return time.time() - entry.fetched_at > self._max_age
@@ -0,0 +1,134 @@
+"""*Journal the progress of a sync run so that a killed run could be resumed*
+
+Every line of the journal is an event of one repository: the label changes planned for it, every change applied to
+it and its completion, together with the fingerprint of the label set it's synced with. A resumed run skips the
+repositories which were completed with the same label set, and only applies the remaining changes of the repositories
+which were in flight instead of listing their labels again.
+
+The journal is cleared after a run synchronizes all repositories, so the next run starts from the beginning.
+"""
+
+import json
+import os
+import threading
+from dataclasses import dataclass, field
+from typing import Dict, List, Optional
+
+from .model import ResolvedLabelSet
+from .plan import LabelChange
+
+
+@dataclass
+class _RepositoryProgress:
+    version: str
+    planned: List[LabelChange] = field(default_factory=list)
+    applied: List[int] = field(default_factory=list)
+    done: bool = False
+
+
+class CheckpointJournal:
+    def __init__(self, path: str, resume: bool = False):
+        self._path = path
+        self._lock = threading.Lock()
+        self._progress: Dict[str, _RepositoryProgress] = {}
+        directory = os.path.dirname(path)
+        if directory:
+            os.makedirs(directory, exist_ok=True)
+        if resume:
+            self._load()
+        self._stream = open(path, "a" if resume else "w", encoding="utf-8")
+
+    def is_done(self, repository: str, desired: ResolvedLabelSet) -> bool:
+        with self._lock:
+            progress = self._progress.get(repository)
+            return progress is not None and progress.version == _version(desired) and progress.done
+
+    def remaining(self, repository: str, desired: ResolvedLabelSet) -> Optional[List[LabelChange]]:
+        """The planned changes which haven't been applied, if the repository was in flight with the same labels."""
+        with self._lock:
+            progress = self._progress.get(repository)
+            if progress is None or progress.version != _version(desired) or progress.done:
+                return None
+            applied = set(progress.applied)
+            return [change for index, change in enumerate(progress.planned) if index not in applied]
+
+    def planned(self, repository: str, desired: ResolvedLabelSet, changes: List[LabelChange]) -> None:
+        version = _version(desired)
+        self._append(
+            repository,
+            {"event": "planned", "version": version, "changes": [change.deserialize() for change in changes]},
+            _RepositoryProgress(version=version, planned=list(changes)),
+        )
+
+    def applied(self, repository: str, change: LabelChange) -> None:
+        with self._lock:
+            progress = self._progress[repository]
+            index = next(i for i, planned in enumerate(progress.planned) if planned is change or planned == change)
+            progress.applied.append(index)
+            self._write({"repository": repository, "event": "applied", "index": index})
+
+    def done(self, repository: str, desired: ResolvedLabelSet) -> None:
+        version = _version(desired)
+        self._append(repository, {"event": "done", "version": version}, _RepositoryProgress(version=version, done=True))
+
+    def forget(self, repository: str) -> None:
+        """Synchronize the repository from the beginning next time, e.g., after some changes failed."""
+        with self._lock:
+            if self._progress.pop(repository, None) is not None:
+                self._write({"repository": repository, "event": "forget"})
+
+    def clear(self) -> None:
+        with self._lock:
+            self._progress.clear()
+            self._stream.seek(0)
+            self._stream.truncate()
+            self._stream.flush()
+
+    def close(self) -> None:
+        with self._lock:
+            self._stream.close()
+
+    def _append(self, repository: str, event: Dict, progress: _RepositoryProgress) -> None:
+        with self._lock:
+            self._progress[repository] = progress
+            self._write({"repository": repository, **event})
+
+    def _write(self, event: Dict) -> None:
+        # Flush every event, a killed process still leaves it to the OS.
+        self._stream.write(json.dumps(event, ensure_ascii=False) + "\n")
+        self._stream.flush()
+
+    def _load(self) -> None:
+        if not os.path.exists(self._path):
+            return
+        with open(self._path, "r", encoding="utf-8") as file_stream:
+            for line in file_stream:
+                try:
+                    event = json.loads(line)
+                    self._replay(event)
+                except (ValueError, KeyError, IndexError, TypeError) as e:
+                    # The last line may be cut off when the process was killed
+                    print(f"[DEBUG] Ignore the broken checkpoint {line.strip()!r}: {e}")
+        print(f"[DEBUG] Resume from the checkpoint of {len(self._progress)} repositories.")
+
+    def _replay(self, event: Dict) -> None:
+        repository = event["repository"]
+        if event["event"] == "planned":
+            self._progress[repository] = _RepositoryProgress(
+                version=event["version"], planned=[LabelChange.serialize(change) for change in event["changes"]]
+            )
+        elif event["event"] == "applied":
+            progress = self._progress[repository]
+            if not 0 <= event["index"] < len(progress.planned):
+                raise IndexError(f"No planned change {event['index']}")
+            progress.applied.append(event["index"])
+        elif event["event"] == "done":
+            self._progress[repository] = _RepositoryProgress(version=event["version"], done=True)
+        elif event["event"] == "forget":
+            self._progress.pop(repository, None)
+        else:
+            raise ValueError(f"Unknown event {event['event']}")
+
+
+def _version(desired: ResolvedLabelSet) -> str:
+    return desired.version
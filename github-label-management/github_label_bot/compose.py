@@ -0,0 +1,97 @@
+"""*Compose a label configuration from the configurations it extends*
+
+A configuration could extend other configuration files with *extends*, e.g., the shared taxonomy of an organization.
+The paths are relative to the file which extends them and could be *file://* URLs. The later configuration overrides
+the earlier one: *labels* and the labels of every set in *label_sets* are merged by name, *overrides* are replaced by
+pattern, and the other properties are replaced as a whole.
+
+The configuration could also be loaded as it was at a git revision, with the files it extended at the same revision.
+"""
+
+import os
+import subprocess
+import urllib.parse
+import urllib.request
+from typing import Any, Callable, Dict, List, Optional, Tuple
+
+import yaml
+
+from ._utils import YAML
+
+_MERGED_BY_KEY = ("labels", "overrides")
+
+_Reader = Callable[[str], Optional[Dict[str, Any]]]
+
+
+def load_config_data(path: str, reader: Optional[_Reader] = None) -> Tuple[Dict[str, Any], List[str]]:
+    """Load the configuration with everything it extends, and return it with the paths of all the files it reads."""
+    sources: List[str] = []
+    data = _load(os.path.abspath(path), [], sources, reader or _read_file)
+    return data, list(dict.fromkeys(sources))
+
+
+def load_config_data_at_revision(path: str, revision: str) -> Dict[str, Any]:
+    """Load the configuration as it was at the git *revision* of the repository which contains it."""
+    path = os.path.realpath(path)
+    toplevel = _git(os.path.dirname(path), "rev-parse", "--show-toplevel").strip()
+
+    def _read_blob(blob_path: str) -> Optional[Dict[str, Any]]:
+        relative_path = os.path.relpath(os.path.realpath(blob_path), toplevel).replace(os.sep, "/")
+        try:
+            content = _git(toplevel, "show", f"{revision}:{relative_path}")
+        except ValueError as e:
+            raise FileNotFoundError(f"The configuration {relative_path} doesn't exist at {revision}: {e}")
+        return yaml.safe_load(content)
+
+    data, _ = load_config_data(path, reader=_read_blob)
+    return data
+
+
+def _git(cwd: str, *args: str) -> str:
+    process = subprocess.run(["git", *args], cwd=cwd, capture_output=True, text=True, encoding="utf-8")
+    if process.returncode != 0:
+        raise ValueError(process.stderr.strip() or f"git {' '.join(args)} failed.")
+    return process.stdout
+
+
+def _read_file(path: str) -> Optional[Dict[str, Any]]:
+    return YAML().read(path)
+
+
+def _load(path: str, extending: List[str], sources: List[str], reader: _Reader) -> Dict[str, Any]:
+    if path in extending:
+        chain = " -> ".join(extending + [path])
+        raise ValueError(f"Configuration extends itself: {chain}")
+    data = reader(path) or {}
+    sources.append(path)
+
+    extends = data.pop("extends", None) or []
+    if isinstance(extends, str):
+        extends = [extends]
+    merged: Dict[str, Any] = {}
+    for base in extends:
+        merged = _merge(merged, _load(resolve_extended_path(path, base), extending + [path], sources, reader))
+    return _merge(merged, data)
+
+
+def resolve_extended_path(path: str, base: str) -> str:
+    if base.startswith("file:"):
+        return os.path.abspath(urllib.request.url2pathname(urllib.parse.urlparse(base).path))
+    if "://" in base:
+        raise ValueError(f"Only the configurations on disk could be extended, but got '{base}'.")
+    return os.path.abspath(os.path.join(os.path.dirname(path), base))
+
+
+def _merge(base: Dict[str, Any], data: Dict[str, Any]) -> Dict[str, Any]:
+    merged = dict(base)
+    for key, value in data.items():
+        if key in _MERGED_BY_KEY:
+            merged[key] = {**(base.get(key) or {}), **(value or {})}
+        elif key == "label_sets":
+            label_sets = dict(base.get(key) or {})
+            for name, labels in (value or {}).items():
+                label_sets[name] = {**(label_sets.get(name) or {}), **(labels or {})}
+            merged[key] = label_sets
+        else:
+            merged[key] = value
+    return merged
@@ -0,0 +1,131 @@
+"""*Keep the validated label configuration compiled between runs*
+
+Parsing a large YAML configuration and validating every label takes most of the startup time of a short run. This
+module pickles the validated configuration with the modification time, the size and the content hash of its source
+files, i.e., the configuration and everything it extends. The next run reuses it without reading the sources at all
+if the files weren't touched, or after only hashing them if they were touched but have the same content, e.g., after
+a fresh checkout.
+"""
+
+import hashlib
+import os
+import pickle
+import tempfile
+from dataclasses import dataclass
+from typing import List, Optional
+
+from .compose import load_config_data
+from .model import GitHubLabelManagementConfig
+
+# Bump it whenever the pickled models change their shape.
+CACHE_VERSION = 4
+
+
+@dataclass
+class _Source:
+    path: str
+    mtime_ns: int
+    size: int
+    sha256: str
+
+    def is_untouched(self) -> bool:
+        try:
+            stat = os.stat(self.path)
+        except OSError:
+            return False
+        return (stat.st_mtime_ns, stat.st_size) == (self.mtime_ns, self.size)
+
+    def has_same_content(self) -> bool:
+        try:
+            stat = os.stat(self.path)
+        except OSError:
+            return False
+        if stat.st_size != self.size or _sha256(self.path) != self.sha256:
+            return False
+        self.mtime_ns = stat.st_mtime_ns
+        return True
+
+    @staticmethod
+    def of(path: str) -> "_Source":
+        stat = os.stat(path)
+        return _Source(path=path, mtime_ns=stat.st_mtime_ns, size=stat.st_size, sha256=_sha256(path))
+
+
+@dataclass
+class _CompiledConfig:
+    version: int
+    # The configuration file and all the files it extends
+    sources: List[_Source]
+    # The configuration falls back to *GITHUB_REPOSITORY* if it doesn't list any repositories.
+    github_repository: Optional[str]
+    config: GitHubLabelManagementConfig
+
+
+class CompiledConfigCache:
+    def __init__(self, path: str):
+        self._path = path
+        self.hit = False
+
+    def load(self, config_path: str) -> GitHubLabelManagementConfig:
+        source = os.path.abspath(config_path)
+        compiled = self._read_cache()
+        if compiled and self._is_same_source(compiled, source):
+            if all(s.is_untouched() for s in compiled.sources):
+                self.hit = True
+                return compiled.config
+            if all(s.is_untouched() or s.has_same_content() for s in compiled.sources):
+                self.hit = True
+                self._write_cache(compiled)
+                return compiled.config
+
+        self.hit = False
+        data, paths = load_config_data(source)
+        sources = [_Source.of(path) for path in paths]
+        config = GitHubLabelManagementConfig.serialize(data)
+        self._write_cache(
+            _CompiledConfig(
+                version=CACHE_VERSION,
+                sources=sources,
+                github_repository=os.getenv("GITHUB_REPOSITORY"),
+                config=config,
+            )
+        )
+        return config
+
+    def _is_same_source(self, compiled: _CompiledConfig, source: str) -> bool:
+        return (
+            compiled.version == CACHE_VERSION
+            and compiled.sources[0].path == source
+            and compiled.github_repository == os.getenv("GITHUB_REPOSITORY")
+        )
+
+    def _read_cache(self) -> Optional[_CompiledConfig]:
+        if not os.path.exists(self._path):
+            return None
+        try:
+            with open(self._path, "rb") as file_stream:
+                compiled = pickle.load(file_stream)
+        except Exception as e:
+            print(f"[DEBUG] Ignore the broken config cache {self._path}: {e}")
+            return None
+        return compiled if isinstance(compiled, _CompiledConfig) else None
+
+    def _write_cache(self, compiled: _CompiledConfig) -> None:
+        directory = os.path.dirname(os.path.abspath(self._path))
+        os.makedirs(directory, exist_ok=True)
+        fd, temp_path = tempfile.mkstemp(dir=directory, prefix=f".{os.path.basename(self._path)}.", suffix=".tmp")
+        try:
+            with os.fdopen(fd, "wb") as file_stream:
+                pickle.dump(compiled, file_stream, protocol=pickle.HIGHEST_PROTOCOL)
+            os.replace(temp_path, self._path)
+        finally:
+            if os.path.exists(temp_path):
+                os.remove(temp_path)
+
+
+def _sha256(path: str) -> str:
+    file_hash = hashlib.sha256()
+    with open(path, "rb") as file_stream:
+        for chunk in iter(lambda: file_stream.read(64 * 1024), b""):
+            file_hash.update(chunk)
+    return file_hash.hexdigest()
@@ -4,6 +4,10 @@ from enum import Enum
 class Operation(Enum):
     Sync_UpStream = "sync_upstream"
     Sync_Download = "sync_download"
+    Sync_Plan = "sync_plan"
+    Serve = "serve"
+    Validate = "validate"
+    Merge_Reports = "merge_reports"
 
     @staticmethod
     def to_enum(value: str) -> "Operation":
@@ -11,3 +15,35 @@ class Operation(Enum):
             return Operation(value.lower())
         except Exception:
             raise ValueError(f"'{value}' is invalid Operation")
+
+
+class FetchBackend(Enum):
+    REST = "rest"
+    GraphQL = "graphql"
+
+    @staticmethod
+    def to_enum(value: str) -> "FetchBackend":
+        try:
+            return FetchBackend(value.lower())
+        except Exception:
+            raise ValueError(f"'{value}' is invalid FetchBackend")
+
+
+class ConflictPolicy(Enum):
+    FirstWins = "first_wins"
+    Majority = "majority"
+    Report = "report"
+
+    @staticmethod
+    def to_enum(value: str) -> "ConflictPolicy":
+        try:
+            return ConflictPolicy(value.lower())
+        except Exception:
+            raise ValueError(f"'{value}' is invalid ConflictPolicy")
+
+
+class LabelChangeType(Enum):
+    Create = "create"
+    Update = "update"
+    Delete = "delete"
+    NoOp = "no-op"
@@ -0,0 +1,159 @@
+"""*Apply the label change set of a repository to GitHub*"""
+
+import threading
+from concurrent.futures import ThreadPoolExecutor
+from dataclasses import dataclass
+from typing import Callable, List, Mapping, Optional, Sequence
+
+from github import Github
+from github.Label import Label as GitHubLabel
+from github.Repository import Repository
+
+from .enums import LabelChangeType
+from .metrics import Span, recorder
+from .plan import LabelChange, LabelChangePlan
+from .scheduler import RequestScheduler
+
+
+@dataclass
+class LabelChangeResult:
+    change: LabelChange
+    error: Optional[Exception] = None
+
+    @property
+    def succeeded(self) -> bool:
+        return self.error is None
+
+
+class LabelChangeError(Exception):
+    def __init__(self, repository: str, results: List[LabelChangeResult]):
+        self.repository = repository
+        self.results = results
+        failures = [result for result in results if not result.succeeded]
+        details = ", ".join(
+            f"{result.change.change_type.value} {result.change.name} ({result.error})" for result in failures
+        )
+        super().__init__(f"{len(failures)} of {len(results)} label changes of {repository} failed: {details}")
+
+
+class LabelChangeExecutor:
+    """Apply the mutations of a plan, a few of them at the same time.
+
+    The writes are still paced by the scheduler which is shared by all repositories, so the pool only overlaps the
+    round trips within the write budget. A PyGithub client cannot be shared between threads, so the repository and its
+    labels are rebound to the client of the worker thread from *github_client* before they're modified.
+    """
+
+    def __init__(
+        self,
+        scheduler: Optional[RequestScheduler] = None,
+        concurrency: int = 1,
+        github_client: Optional[Callable[[], Github]] = None,
+    ):
+        self._scheduler = scheduler or RequestScheduler()
+        self._concurrency = concurrency
+        self._github_client = github_client
+        self._lock = threading.Lock()
+        self._workers: Optional[ThreadPoolExecutor] = None
+
+    def apply(
+        self,
+        repo: Repository,
+        plan: LabelChangePlan,
+        remote_labels: Mapping[str, GitHubLabel],
+        on_applied: Optional[Callable[[LabelChange], None]] = None,
+    ) -> List[LabelChangeResult]:
+        """Apply the mutations of the plan, *on_applied* is called with every change once it's applied."""
+        mutations = plan.mutations
+        if self._concurrency == 1 or len(mutations) <= 1:
+            return [self._apply_change(repo, change, remote_labels, False, on_applied) for change in mutations]
+        workers = self._worker_pool()
+        # The requests of the workers are counted by the spans of the caller, e.g., the span of the repository.
+        spans = recorder().active_spans()
+        futures = [
+            workers.submit(self._apply_change, repo, change, remote_labels, True, on_applied, spans)
+            for change in mutations
+        ]
+        return [future.result() for future in futures]
+
+    def close(self) -> None:
+        with self._lock:
+            if self._workers is not None:
+                self._workers.shutdown(wait=True)
+                self._workers = None
+
+    def _worker_pool(self) -> ThreadPoolExecutor:
+        with self._lock:
+            if self._workers is None:
+                self._workers = ThreadPoolExecutor(
+                    max_workers=self._concurrency, thread_name_prefix="github-label-bot-mutation"
+                )
+            return self._workers
+
+    def _apply_change(
+        self,
+        repo: Repository,
+        change: LabelChange,
+        remote_labels: Mapping[str, GitHubLabel],
+        rebind: bool,
+        on_applied: Optional[Callable[[LabelChange], None]] = None,
+        spans: Sequence[Span] = (),
+    ) -> LabelChangeResult:
+        try:
+            with recorder().continue_spans(spans), recorder().span(
+                "mutation", operation=change.change_type.value, repository=repo.full_name, label=change.name
+            ):
+                self._mutate(repo, change, remote_labels, rebind)
+        except Exception as e:
+            print(f"Failed to {change.change_type.value} label {change.name} of {repo.full_name}: {e}")
+            return LabelChangeResult(change=change, error=e)
+        if on_applied:
+            on_applied(change)
+        return LabelChangeResult(change=change)
+
+    def _mutate(
+        self, repo: Repository, change: LabelChange, remote_labels: Mapping[str, GitHubLabel], rebind: bool
+    ) -> None:
+        if change.change_type is LabelChangeType.Create:
+            target_repo = self._rebind_repository(repo) if rebind else repo
+            self._scheduler.call(
+                target_repo.create_label,
+                name=change.name,
+                color=change.label.color,
+                description=change.label.description,
+                write=True,
+            )
+            print(f"Created label: {change.name}")
+        elif change.change_type is LabelChangeType.Update:
+            remote_label = remote_labels[change.current_name or change.name]
+            label = self._rebind_label(remote_label) if rebind else remote_label
+            self._scheduler.call(
+                label.edit,
+                name=change.name,
+                color=change.label.color,
+                description=change.label.description,
+                write=True,
+            )
+            if change.current_name:
+                print(f"Renamed label: {change.current_name} -> {change.name}")
+            else:
+                print(f"Updated label: {change.name}")
+        elif change.change_type is LabelChangeType.Delete:
+            label = self._rebind_label(remote_labels[change.name]) if rebind else remote_labels[change.name]
+            self._scheduler.call(label.delete, write=True)
+            print(f"Deleted label: {change.name}")
+        else:
+            raise ValueError(f"Unsupported label change: {change.change_type}")
+
+    def _rebind_repository(self, repo: Repository) -> Repository:
+        if self._github_client is None:
+            return repo
+        attributes = {"full_name": repo.full_name, "url": repo.url}
+        return Repository(self._github_client().requester, {}, attributes, completed=False)
+
+    def _rebind_label(self, label: GitHubLabel) -> GitHubLabel:
+        if self._github_client is None:
+            return label
+        # Not *raw_data*, it would fetch the label again if the label came from a listing.
+        attributes = {"name": label.name, "color": label.color, "description": label.description, "url": label.url}
+        return GitHubLabel(self._github_client().requester, {}, attributes, completed=True)
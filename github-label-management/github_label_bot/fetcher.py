@@ -0,0 +1,221 @@
+"""*Fetch the existing labels of GitHub repositories*
+
+The processors only need the current labels of a repository. This module provides the different ways to get them, so
+that the processors could share the same logic no matter where the labels come from.
+"""
+
+import json
+import re
+import threading
+import urllib.parse
+from abc import ABCMeta, abstractmethod
+from typing import Any, Dict, Iterable, List, Optional, Set, Tuple
+
+from github import Github, GithubException
+from github.Label import Label as GitHubLabel
+from github.Repository import Repository
+
+from .cache import LabelSnapshotCache
+from .scheduler import RequestScheduler
+
+_NEXT_PAGE_LINK = re.compile(r'<([^>]+)>;\s*rel="next"')
+
+
+class BaseLabelFetcher(metaclass=ABCMeta):
+    def __init__(self, scheduler: Optional[RequestScheduler] = None):
+        self._scheduler = scheduler or RequestScheduler()
+
+    @abstractmethod
+    def fetch(self, repo: Repository) -> List[GitHubLabel]:
+        pass
+
+    def prefetch(self, github: Github, repositories: Iterable[str]) -> None:
+        """Get ready the labels of the repositories in advance if it could fetch them in bulk."""
+        pass
+
+    def is_unchanged(self, repo: Repository) -> bool:
+        """Whether GitHub confirmed the labels it fetched last time weren't modified since the previous run."""
+        return False
+
+    def invalidate(self, repo: Repository) -> None:
+        """Forget anything it knows about the labels of the repository, e.g., after the labels be modified."""
+        pass
+
+    def flush(self) -> None:
+        """Persist the state it needs for the next run."""
+        pass
+
+
+class RestLabelFetcher(BaseLabelFetcher):
+    def fetch(self, repo: Repository) -> List[GitHubLabel]:
+        return self._scheduler.call(lambda: list(repo.get_labels()))
+
+
+class ConditionalLabelFetcher(BaseLabelFetcher):
+    """List labels with *If-None-Match* and reuse the cached snapshot when GitHub answers *304 Not Modified*.
+
+    GitHub doesn't count the *304* responses against the rate limit. Only the repository which has a single page of
+    labels would be cached because the *ETag* of the first page cannot tell whether the other pages changed.
+    """
+
+    PER_PAGE = 100
+
+    def __init__(self, cache: LabelSnapshotCache, scheduler: Optional[RequestScheduler] = None):
+        super().__init__(scheduler)
+        self._cache = cache
+        self._lock = threading.Lock()
+        self.hits = 0
+        self.misses = 0
+        self._unchanged: Set[str] = set()
+
+    def fetch(self, repo: Repository) -> List[GitHubLabel]:
+        entry = self._cache.get(repo.full_name)
+        request_headers = {"If-None-Match": entry.etag} if entry else {}
+        status, headers, data = self._scheduler.call(
+            self._request, repo, f"{repo.url}/labels", {"per_page": self.PER_PAGE}, request_headers
+        )
+        if status == 304 and entry:
+            with self._lock:
+                self.hits += 1
+                self._unchanged.add(repo.full_name)
+            return self._to_labels(repo, entry.labels)
+
+        with self._lock:
+            self.misses += 1
+            self._unchanged.discard(repo.full_name)
+        labels: List[Dict[str, Any]] = list(data or [])
+        next_page = self._next_page(headers)
+        if next_page is None and headers.get("etag"):
+            self._cache.put(repo.full_name, headers["etag"], labels)
+        while next_page is not None:
+            _, headers, data = self._scheduler.call(self._request, repo, next_page, None, {})
+            labels.extend(data or [])
+            next_page = self._next_page(headers)
+        return self._to_labels(repo, labels)
+
+    def is_unchanged(self, repo: Repository) -> bool:
+        with self._lock:
+            return repo.full_name in self._unchanged
+
+    def invalidate(self, repo: Repository) -> None:
+        with self._lock:
+            self._unchanged.discard(repo.full_name)
+        self._cache.invalidate(repo.full_name)
+
+    def flush(self) -> None:
+        print(f"[DEBUG] Label cache hits: {self.hits}, misses: {self.misses}")
+        self._cache.save()
+
+    def _request(
+        self, repo: Repository, url: str, parameters: Optional[Dict[str, Any]], headers: Dict[str, str]
+    ) -> Tuple[int, Dict[str, Any], Any]:
+        status, response_headers, output = repo.requester.requestJson("GET", url, parameters, headers)
+        data = json.loads(output) if output else None
+        if status >= 400:
+            raise repo.requester.createException(status, response_headers, data)
+        return status, response_headers, data
+
+    def _next_page(self, headers: Dict[str, Any]) -> Optional[str]:
+        matched = _NEXT_PAGE_LINK.search(headers.get("link", ""))
+        return matched.group(1) if matched else None
+
+    def _to_labels(self, repo: Repository, labels: List[Dict[str, Any]]) -> List[GitHubLabel]:
+        return [GitHubLabel(repo.requester, {}, label, completed=True) for label in labels]
+
+
+class GraphQLLabelFetcher(BaseLabelFetcher):
+    """Fetch labels of many repositories in one GraphQL query with aliases.
+
+    The repository which has more labels than one page or which GraphQL returns an error for (e.g., *NOT_FOUND*), or
+    the batch whose request fails, would fall back to the *fallback* fetcher so that the errors of a single repository
+    still surface at the processing stage. The other repositories of the batch keep the data GraphQL returns for them.
+    """
+
+    BATCH_SIZE = 25
+    PER_PAGE = 100
+
+    def __init__(
+        self,
+        fallback: Optional[BaseLabelFetcher] = None,
+        scheduler: Optional[RequestScheduler] = None,
+        batch_size: int = BATCH_SIZE,
+    ):
+        super().__init__(scheduler)
+        self._fallback = fallback or RestLabelFetcher(self._scheduler)
+        self._batch_size = batch_size
+        self._lock = threading.Lock()
+        self._prefetched: Dict[str, List[Dict[str, Any]]] = {}
+
+    def prefetch(self, github: Github, repositories: Iterable[str]) -> None:
+        batch: List[str] = []
+        for repository in repositories:
+            batch.append(repository)
+            if len(batch) == self._batch_size:
+                self._prefetch_batch(github, batch)
+                batch = []
+        if batch:
+            self._prefetch_batch(github, batch)
+        print(f"[DEBUG] Prefetched labels of {len(self._prefetched)} repositories by GraphQL.")
+
+    def fetch(self, repo: Repository) -> List[GitHubLabel]:
+        with self._lock:
+            labels = self._prefetched.pop(repo.full_name, None)
+        if labels is None:
+            return self._fallback.fetch(repo)
+        for label in labels:
+            label["url"] = f"{repo.url}/labels/{urllib.parse.quote(label['name'], safe='')}"
+        return [GitHubLabel(repo.requester, {}, label, completed=True) for label in labels]
+
+    def is_unchanged(self, repo: Repository) -> bool:
+        return self._fallback.is_unchanged(repo)
+
+    def invalidate(self, repo: Repository) -> None:
+        with self._lock:
+            self._prefetched.pop(repo.full_name, None)
+        self._fallback.invalidate(repo)
+
+    def flush(self) -> None:
+        self._fallback.flush()
+
+    def _prefetch_batch(self, github: Github, repositories: List[str]) -> None:
+        query, variables = self._build_query(repositories)
+        try:
+            # *graphql_query* raises on any error, even if only one repository of the batch cannot be resolved.
+            _, data = self._scheduler.call(
+                github.requester.requestJsonAndCheck,
+                "POST",
+                github.requester.graphql_url,
+                input={"query": query, "variables": variables},
+            )
+        except GithubException as e:
+            print(f"[DEBUG] Cannot prefetch labels by GraphQL, fall back to REST API: {e}")
+            return
+        for error in data.get("errors") or []:
+            print(f"[DEBUG] GraphQL error of {error.get('path')}, fall back to REST API: {error.get('message')}")
+        prefetched = {}
+        for index, repository in enumerate(repositories):
+            node = (data.get("data") or {}).get(f"r{index}")
+            if not node or node["labels"]["pageInfo"]["hasNextPage"]:
+                continue
+            prefetched[repository] = [
+                {"name": label["name"], "color": label["color"], "description": label["description"]}
+                for label in node["labels"]["nodes"]
+            ]
+        with self._lock:
+            self._prefetched.update(prefetched)
+
+    def _build_query(self, repositories: List[str]) -> Tuple[str, Dict[str, str]]:
+        definitions = []
+        fields = []
+        variables = {}
+        for index, repository in enumerate(repositories):
+            owner, name = repository.split("/", 1)
+            variables[f"owner{index}"] = owner
+            variables[f"name{index}"] = name
+            definitions.append(f"$owner{index}: String!, $name{index}: String!")
+            fields.append(
+                f"r{index}: repository(owner: $owner{index}, name: $name{index}) "
+                f"{{ labels(first: {self.PER_PAGE}) {{ pageInfo {{ hasNextPage }} nodes {{ name color description }} }} }}"
+            )
+        query = f"query({', '.join(definitions)}) {{ {' '.join(fields)} }}"
+        return query, variables
@@ -0,0 +1,87 @@
+"""*Fingerprint label sets to tell whether a repository already matches its configuration*
+
+A fingerprint is the hash of a normalized label set: the names, the lowercase colors and the descriptions (an empty
+description is the same as no description). Two label sets with the same fingerprint need no change at all.
+
+The fingerprint which every repository was last synced with is persisted, so that a later run could trust a repository
+whose labels weren't modified since then (i.e., GitHub answered the conditional request with *304 Not Modified*)
+without comparing them again.
+"""
+
+import hashlib
+import json
+import os
+import threading
+from typing import Any, Dict, Mapping, Optional
+
+from ._utils import JSON
+
+
+def normalize_name(name: str) -> str:
+    # GitHub compares label names case-insensitively
+    return name.casefold()
+
+
+def normalize_color(color: str) -> str:
+    return color.lstrip("#").lower()
+
+
+def normalize_description(description: Optional[str]) -> str:
+    return description or ""
+
+
+def label_fingerprint(labels: Mapping[str, Any]) -> str:
+    """Hash the labels, which could be any objects with *color* and *description*."""
+    normalized = sorted(
+        (name, normalize_color(label.color), normalize_description(label.description)) for name, label in labels.items()
+    )
+    content = json.dumps(normalized, ensure_ascii=False, separators=(",", ":"))
+    return hashlib.sha256(content.encode("utf-8")).hexdigest()
+
+
+class FingerprintStore:
+    def __init__(self, path: str):
+        self._path = path
+        self._fingerprints: Dict[str, str] = {}
+        self._lock = threading.Lock()
+        self._dirty = False
+        self._load()
+
+    def get(self, repository: str) -> Optional[str]:
+        with self._lock:
+            return self._fingerprints.get(repository)
+
+    def put(self, repository: str, fingerprint: str) -> None:
+        with self._lock:
+            if self._fingerprints.get(repository) != fingerprint:
+                self._fingerprints[repository] = fingerprint
+                self._dirty = True
+
+    def invalidate(self, repository: str) -> None:
+        with self._lock:
+            if self._fingerprints.pop(repository, None):
+                self._dirty = True
+
+    def save(self) -> None:
+        with self._lock:
+            if not self._dirty:
+                return
+            directory = os.path.dirname(self._path)
+            if directory:
+                os.makedirs(directory, exist_ok=True)
+            JSON().write(path=self._path, mode="w+", config={"repositories": dict(sorted(self._fingerprints.items()))})
+            self._dirty = False
+
+    def _load(self) -> None:
+        if not os.path.exists(self._path):
+            return
+        try:
+            data = JSON().read(self._path)
+        except ValueError as e:
+            print(f"[DEBUG] Ignore the broken fingerprints {self._path}: {e}")
+            return
+        self._fingerprints = {
+            repository: fingerprint
+            for repository, fingerprint in (data.get("repositories") or {}).items()
+            if isinstance(fingerprint, str)
+        }
@@ -1,15 +1,42 @@
+import dataclasses
 import os
 import pathlib
-from dataclasses import dataclass
-from typing import List
+from dataclasses import dataclass, field
+from typing import List, Optional
 
-from github_label_bot.enums import Operation
+from github_label_bot.cache import DEFAULT_MAX_AGE
+from github_label_bot.enums import ConflictPolicy, FetchBackend, Operation
+from github_label_bot.shard import Shard
 
 
 @dataclass
 class GitHubAction:
     config_path: str
     operation: List[Operation]
+    concurrency: int = 1
+    mutation_concurrency: int = 4
+    plan_path: Optional[str] = None
+    label_cache_path: Optional[str] = None
+    label_cache_max_age: int = DEFAULT_MAX_AGE
+    fetch_backend: FetchBackend = FetchBackend.REST
+    request_timeout: int = 15
+    metrics_path: Optional[str] = None
+    conflict_policy: ConflictPolicy = ConflictPolicy.FirstWins
+    config_cache_path: Optional[str] = None
+    fingerprint_path: Optional[str] = None
+    previous_config: Optional[str] = None
+    checkpoint_path: Optional[str] = None
+    resume: bool = False
+    webhook_host: str = "127.0.0.1"
+    webhook_port: int = 8080
+    webhook_secret: Optional[str] = None
+    # Synchronize all repositories every 6 hours in server mode
+    sweep_interval: int = 6 * 60 * 60
+    shard: Optional[Shard] = None
+    # Every token runs a shard in its own process
+    github_tokens: List[str] = field(default_factory=list, repr=False)
+    report_path: Optional[str] = None
+    shard_reports: List[str] = field(default_factory=list)
 
     @staticmethod
     def from_env() -> "GitHubAction":
@@ -19,5 +46,77 @@ class GitHubAction:
             raise ValueError("Miss required environment variables.")
         print(f"[DEBUG] config_path_from_env: {config_path_from_env}")
         return GitHubAction(
-            config_path=config_path_from_env, operation=[Operation.to_enum(o) for o in operations_env.split(",")]
+            config_path=config_path_from_env,
+            operation=[Operation.to_enum(o) for o in operations_env.split(",")],
+            concurrency=GitHubAction._positive_int_from_env("CONCURRENCY", default=1),
+            mutation_concurrency=GitHubAction._positive_int_from_env("MUTATION_CONCURRENCY", default=4),
+            plan_path=os.getenv("PLAN_PATH") or None,
+            label_cache_path=os.getenv("LABEL_CACHE_PATH") or None,
+            label_cache_max_age=GitHubAction._positive_int_from_env("LABEL_CACHE_MAX_AGE", default=DEFAULT_MAX_AGE),
+            fetch_backend=FetchBackend.to_enum(os.getenv("LABEL_FETCH_BACKEND") or FetchBackend.REST.value),
+            request_timeout=GitHubAction._positive_int_from_env("REQUEST_TIMEOUT", default=15),
+            metrics_path=os.getenv("METRICS_PATH") or None,
+            config_cache_path=os.getenv("CONFIG_CACHE_PATH") or None,
+            fingerprint_path=os.getenv("FINGERPRINT_PATH") or None,
+            previous_config=os.getenv("PREVIOUS_CONFIG") or None,
+            checkpoint_path=os.getenv("CHECKPOINT_PATH") or None,
+            resume=GitHubAction._bool_from_env("RESUME", default=False),
+            webhook_host=os.getenv("WEBHOOK_HOST") or "127.0.0.1",
+            webhook_port=GitHubAction._positive_int_from_env("WEBHOOK_PORT", default=8080),
+            webhook_secret=os.getenv("WEBHOOK_SECRET") or None,
+            sweep_interval=GitHubAction._positive_int_from_env("SWEEP_INTERVAL", default=6 * 60 * 60),
+            conflict_policy=ConflictPolicy.to_enum(os.getenv("CONFLICT_POLICY") or ConflictPolicy.FirstWins.value),
+            shard=Shard.parse(os.environ["SHARD"]) if os.getenv("SHARD") else None,
+            github_tokens=GitHubAction._list_from_env("GITHUB_TOKENS"),
+            report_path=os.getenv("REPORT_PATH") or None,
+            shard_reports=GitHubAction._list_from_env("SHARD_REPORTS"),
         )
+
+    def for_shard(self, shard: Shard) -> "GitHubAction":
+        """The inputs of a shard which runs in another process on the same machine.
+
+        The files every run writes are kept per shard, the reports are returned to the process which runs the shards.
+        """
+
+        def _shard_path(path: Optional[str]) -> Optional[str]:
+            return shard.path(path) if path else None
+
+        return dataclasses.replace(
+            self,
+            shard=shard,
+            github_tokens=[],
+            plan_path=None,
+            report_path=None,
+            label_cache_path=_shard_path(self.label_cache_path),
+            metrics_path=_shard_path(self.metrics_path),
+            fingerprint_path=_shard_path(self.fingerprint_path),
+            checkpoint_path=_shard_path(self.checkpoint_path),
+        )
+
+    @staticmethod
+    def _list_from_env(name: str) -> List[str]:
+        return [value.strip() for value in (os.getenv(name) or "").split(",") if value.strip()]
+
+    @staticmethod
+    def _bool_from_env(name: str, default: bool) -> bool:
+        value = os.getenv(name)
+        if not value:
+            return default
+        if value.lower() in ("true", "yes", "1"):
+            return True
+        if value.lower() in ("false", "no", "0"):
+            return False
+        raise ValueError(f"Environment variable *{name}* should be a boolean, but got '{value}'.")
+
+    @staticmethod
+    def _positive_int_from_env(name: str, default: int) -> int:
+        value = os.getenv(name)
+        if not value:
+            return default
+        try:
+            number = int(value)
+        except ValueError:
+            raise ValueError(f"Environment variable *{name}* should be an integer, but got '{value}'.")
+        if number < 1:
+            raise ValueError(f"Environment variable *{name}* should be greater than 0, but got '{value}'.")
+        return number
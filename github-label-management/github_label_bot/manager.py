@@ -1,35 +1,255 @@
-from github_label_bot.enums import Operation
+"""*The entry point of GitHub-Label-Bot*
+
+The command line should start fast, so this module only imports what parsing the inputs needs. PyGithub and the
+processors are imported by the operations which use them.
+"""
+
+import glob
+import json
+import os
+import sys
+from typing import TYPE_CHECKING, Dict, List, Optional, Type
+
+from github_label_bot.enums import LabelChangeType, Operation
 from github_label_bot.github_action import GitHubAction
 
-from .process import DownloadFromRemote, SyncUpAsRemote
-from .runner import GitHubOperationRunner
+from ._utils import JSON, YAML
+from .metrics import recorder
+
+if TYPE_CHECKING:
+    from .process import BaseProcess
+    from .runner import GitHubOperationRunner, RepositoryResult
+    from .validation import ConfigIssue
+
+_USAGE = """Usage: sync-github-labels
+
+Manage the labels of GitHub repositories by a configuration. All the inputs are environment variables:
+
+  CONFIG_PATH    The configuration of GitHub labels.
+  OPERATIONS     What operations to run, separated by commas. [options: {operations}]
+  GITHUB_TOKEN   The token to access GitHub API, operation *validate* doesn't need it.
+  SHARD          Only process the repositories of shard *i/N*, e.g., in the jobs of a CI matrix.
+  GITHUB_TOKENS  Run a shard in a process for every token, separated by commas.
+
+The optional inputs are the same as the inputs of *action.yaml*, e.g., CONCURRENCY and PLAN_PATH.
+"""
 
 
 class GitHubLabelBot:
 
     def __init__(self):
-        self._github_runner = GitHubOperationRunner()
+        self._runner: Optional["GitHubOperationRunner"] = None
 
-    def sync_from_remote_repo(self, action_inputs: GitHubAction) -> None:
-        self._github_runner.operate_with_github(action_inputs, SyncUpAsRemote())
+    @property
+    def _github_runner(self) -> "GitHubOperationRunner":
+        if self._runner is None:
+            from .runner import GitHubOperationRunner
+
+            self._runner = GitHubOperationRunner()
+        return self._runner
+
+    def sync_from_remote_repo(self, action_inputs: GitHubAction) -> Dict:
+        if action_inputs.github_tokens:
+            report = self._run_shards(Operation.Sync_UpStream, action_inputs)
+        else:
+            from .process import IncrementalSyncUpAsRemote, SyncUpAsRemote
+
+            previous_config = self._github_runner.previous_label_config(action_inputs)
+            checkpoint = self._github_runner.checkpoint_journal(action_inputs)
+            if previous_config:
+                processor = self._processor(
+                    IncrementalSyncUpAsRemote, action_inputs, previous_config=previous_config, checkpoint=checkpoint
+                )
+            else:
+                processor = self._processor(SyncUpAsRemote, action_inputs, checkpoint=checkpoint)
+            results = self._github_runner.operate_with_github(action_inputs, processor)
+            report = _plan_report(results, action_inputs)
+        if action_inputs.report_path:
+            JSON().write(path=action_inputs.report_path, mode="w+", config=report)
+        return report
 
     def download_from_remote_repo(self, action_inputs: GitHubAction) -> None:
-        self._github_runner.operate_with_github(action_inputs, DownloadFromRemote())
+        from .process import DownloadFromRemote
+
+        if action_inputs.shard or action_inputs.github_tokens:
+            raise ValueError(
+                "Operation *sync_download* merges the labels of all repositories, it cannot be sharded by *SHARD* or "
+                "*GITHUB_TOKENS*."
+            )
+        composition = _composition_keys(action_inputs.config_path)
+        if composition:
+            raise ValueError(
+                f"Operation *sync_download* rewrites {action_inputs.config_path} with the downloaded labels, it would "
+                f"lose {', '.join(composition)}. Please download the labels into another *CONFIG_PATH*."
+            )
+
+        processor = DownloadFromRemote(
+            scheduler=self._github_runner.scheduler,
+            fetcher=self._github_runner.label_fetcher(action_inputs),
+            conflict_policy=action_inputs.conflict_policy,
+        )
+        self._github_runner.operate_with_github(action_inputs, processor)
+
+    def plan_from_remote_repo(self, action_inputs: GitHubAction) -> Dict:
+        from .process import PlanAgainstRemote
+
+        if action_inputs.github_tokens:
+            plan_report = self._run_shards(Operation.Sync_Plan, action_inputs)
+        else:
+            results = self._github_runner.operate_with_github(
+                action_inputs, self._processor(PlanAgainstRemote, action_inputs)
+            )
+            plan_report = _plan_report(results, action_inputs)
+        print(json.dumps(plan_report, indent=2, ensure_ascii=False))
+        if action_inputs.plan_path:
+            JSON().write(path=action_inputs.plan_path, mode="w+", config=plan_report)
+        return plan_report
+
+    def serve(self, action_inputs: GitHubAction) -> None:
+        """Keep synchronizing the labels by the GitHub webhook events until it's interrupted."""
+        from .server import LabelBotServer
+
+        LabelBotServer(self._github_runner, action_inputs).serve_forever()
+
+    def validate(self, action_inputs: GitHubAction) -> List["ConfigIssue"]:
+        """Validate the configuration without accessing GitHub, and fail if it has any issue."""
+        from .validation import validate_config
+
+        issues = validate_config(action_inputs.config_path)
+        # The workflow commands annotate the lines of the configuration in GitHub Actions
+        in_github_actions = os.getenv("GITHUB_ACTIONS") == "true"
+        for issue in issues:
+            print(issue.annotation(os.getenv("GITHUB_WORKSPACE")) if in_github_actions else str(issue))
+        if issues:
+            raise ValueError(f"The configuration {action_inputs.config_path} has {len(issues)} issues.")
+        print(f"[DEBUG] The configuration {action_inputs.config_path} is valid.")
+        return issues
+
+    def merge_shard_reports(self, action_inputs: GitHubAction) -> Dict:
+        """Merge the reports of all shards, e.g., which the jobs of a CI matrix uploaded."""
+        from .shard import merge_reports
+
+        paths = sorted({path for pattern in action_inputs.shard_reports for path in glob.glob(pattern)})
+        print(f"[DEBUG] Merge the reports of shards: {paths}")
+        report = merge_reports([JSON().read(path) for path in paths])
+        print(json.dumps(report["summary"], indent=2, ensure_ascii=False))
+        if action_inputs.report_path:
+            JSON().write(path=action_inputs.report_path, mode="w+", config=report)
+        return report
+
+    def close(self) -> None:
+        if self._runner is not None:
+            self._runner.close()
+
+    def _processor(self, process_type: Type["BaseProcess"], action_inputs: GitHubAction, **kwargs) -> "BaseProcess":
+        return process_type(
+            scheduler=self._github_runner.scheduler,
+            fetcher=self._github_runner.label_fetcher(action_inputs),
+            executor=self._github_runner.label_executor(action_inputs),
+            fingerprints=self._github_runner.fingerprint_store(action_inputs),
+            **kwargs,
+        )
+
+    def _run_shards(self, operation: Operation, action_inputs: GitHubAction) -> Dict:
+        """Run the operation in a process for every token, every process runs a shard with its own token.
+
+        A single token runs the whole shard in one process with that token, *GITHUB_TOKEN* isn't used then.
+
+        The processes are spawned instead of forked, a forked process would inherit the locks held by other threads.
+        """
+        import multiprocessing
+        from concurrent.futures import ProcessPoolExecutor
+
+        from .shard import Shard, merge_reports
+
+        shards = (action_inputs.shard or Shard(index=0, count=1)).split(len(action_inputs.github_tokens))
+        print(f"[DEBUG] Run {operation.value} in {len(shards)} processes.")
+        with ProcessPoolExecutor(max_workers=len(shards), mp_context=multiprocessing.get_context("spawn")) as pool:
+            futures = [
+                pool.submit(_run_shard, operation, action_inputs.for_shard(shard), token)
+                for shard, token in zip(shards, action_inputs.github_tokens)
+            ]
+            reports = [future.result() for future in futures]
+        report = merge_reports(reports, shards=shards)
+        if action_inputs.shard:
+            # The report of this shard, which could be merged with the other shards again
+            report["shard"] = str(action_inputs.shard)
+        return report
+
+
+def _run_shard(operation: Operation, action_inputs: GitHubAction, token: str) -> Dict:
+    os.environ["GITHUB_TOKEN"] = token
+    bot = GitHubLabelBot()
+    recorder().install()
+    try:
+        if operation is Operation.Sync_Plan:
+            return bot.plan_from_remote_repo(action_inputs)
+        return bot.sync_from_remote_repo(action_inputs)
+    finally:
+        bot.close()
+        recorder().uninstall()
+        recorder().report(path=action_inputs.metrics_path)
+
+
+def _composition_keys(config_path: str) -> List[str]:
+    """The keys which compose the labels of the configuration, a flat configuration has none of them."""
+    if not os.path.exists(config_path):
+        return []
+    data = YAML().read(config_path) or {}
+    return [key for key in ("extends", "label_sets", "default_label_sets", "overrides") if data.get(key)]
+
+
+def _plan_report(results: List["RepositoryResult"], action_inputs: GitHubAction) -> Dict:
+    repositories = []
+    summary = {change_type.value: 0 for change_type in LabelChangeType}
+    for result in results:
+        repo_report = {"repository": result.repository, "error": str(result.error) if result.error else None}
+        if result.plan:
+            repo_report.update(result.plan.deserialize())
+            for change_type in LabelChangeType:
+                summary[change_type.value] += result.plan.count(change_type)
+        repositories.append(repo_report)
+    summary["mutations"] = sum(summary[t.value] for t in LabelChangeType if t is not LabelChangeType.NoOp)
+    report: Dict = {"repositories": repositories, "summary": summary}
+    if action_inputs.shard:
+        report["shard"] = str(action_inputs.shard)
+    return report
 
 
 def run_bot() -> None:
+    if {"-h", "--help"} & set(sys.argv[1:]):
+        print(_USAGE.format(operations=",".join(o.value for o in Operation)))
+        return
     github_action_inputs = GitHubAction.from_env()
     bot = GitHubLabelBot()
     print(f"[DEBUG] github_action_inputs.operation: {github_action_inputs.operation}")
-    for opt in github_action_inputs.operation:
-        if opt is Operation.Sync_UpStream:
-            print(f"[DEBUG] run syncup ...")
-            bot.sync_from_remote_repo(github_action_inputs)
-        elif opt is Operation.Sync_Download:
-            print(f"[DEBUG] run download ...")
-            bot.download_from_remote_repo(github_action_inputs)
-        else:
-            raise ValueError(f"Unsupported operation: {opt}")
+    recorder().install()
+    try:
+        for opt in github_action_inputs.operation:
+            if opt is Operation.Sync_UpStream:
+                print(f"[DEBUG] run syncup ...")
+                bot.sync_from_remote_repo(github_action_inputs)
+            elif opt is Operation.Sync_Download:
+                print(f"[DEBUG] run download ...")
+                bot.download_from_remote_repo(github_action_inputs)
+            elif opt is Operation.Sync_Plan:
+                print(f"[DEBUG] run plan ...")
+                bot.plan_from_remote_repo(github_action_inputs)
+            elif opt is Operation.Validate:
+                print(f"[DEBUG] run validation ...")
+                bot.validate(github_action_inputs)
+            elif opt is Operation.Merge_Reports:
+                print(f"[DEBUG] run merging reports ...")
+                bot.merge_shard_reports(github_action_inputs)
+            elif opt is Operation.Serve:
+                print(f"[DEBUG] run server ...")
+                bot.serve(github_action_inputs)
+            else:
+                raise ValueError(f"Unsupported operation: {opt}")
+    finally:
+        bot.close()
+        recorder().uninstall()
+        recorder().report(path=github_action_inputs.metrics_path)
 
 
 if __name__ == "__main__":
@@ -0,0 +1,65 @@
+"""*Merge the labels downloaded from many repositories into one label set*
+
+The repositories may define the same label with different colors or descriptions. The conflict policy decides which
+definition is kept: the one of the first repository, the one most repositories use, or none of them so that the
+conflicts could be reviewed by someone before they're synced back. GitHub compares the label names case-insensitively,
+so the names which differ only in case are the same label, and the different cases are different definitions of it.
+"""
+
+from collections import Counter
+from dataclasses import dataclass, field
+from typing import Dict, Iterable, List, Tuple
+
+from .enums import ConflictPolicy
+from .fingerprint import normalize_name
+from .model import Label
+
+
+@dataclass
+class LabelConflict:
+    name: str
+    # The repositories which use every definition (name and label), in the order the repositories were given.
+    variants: List[Tuple[str, Label, List[str]]] = field(default_factory=list)
+
+    def deserialize(self) -> Dict:
+        return {
+            "name": self.name,
+            "variants": [
+                {"name": name, "label": label.deserialize(), "repositories": repositories}
+                for name, label, repositories in self.variants
+            ],
+        }
+
+
+def merge_labels(
+    snapshots: Iterable[Tuple[str, Dict[str, Label]]], policy: ConflictPolicy
+) -> Tuple[Dict[str, Label], List[LabelConflict]]:
+    """Merge the labels of repositories, *snapshots* are pairs of a repository and its labels in priority order."""
+    # The labels are normalized and hashable, so the same definitions are grouped by their names and the labels.
+    definitions: Dict[str, Dict[Tuple[str, Label], List[str]]] = {}
+    for repository, snapshot in snapshots:
+        for name, label in snapshot.items():
+            definitions.setdefault(normalize_name(name), {}).setdefault((name, label), []).append(repository)
+
+    merged: Dict[str, Label] = {}
+    conflicts: List[LabelConflict] = []
+    for variants in definitions.values():
+        first_name, _ = next(iter(variants))
+        if len(variants) > 1:
+            conflicts.append(
+                LabelConflict(
+                    name=first_name,
+                    variants=[(name, label, repositories) for (name, label), repositories in variants.items()],
+                )
+            )
+            if policy is ConflictPolicy.Report:
+                continue
+        if policy is ConflictPolicy.Majority:
+            # *most_common* keeps the insertion order for ties, so the first repository wins a tie.
+            name, label = Counter({key: len(repositories) for key, repositories in variants.items()}).most_common(1)[0][
+                0
+            ]
+        else:
+            name, label = next(iter(variants))
+        merged[name] = label
+    return merged, conflicts
@@ -0,0 +1,232 @@
+"""*Record how long every phase of a run takes and how many requests it sends*
+
+A phase is recorded as a span. The HTTP requests, the received bytes and the new connections are counted from the log
+records of PyGithub (*github.Requester*) and urllib3 (*urllib3.connectionpool*), so every request is counted no matter
+which code path sends it. They are attributed to the spans opened in the same thread, and to the spans a thread
+continues for the thread which handed the work over to it.
+"""
+
+import json
+import logging
+import threading
+import time
+from contextlib import contextmanager
+from dataclasses import dataclass
+from typing import Any, Dict, Iterator, List, Optional, Sequence
+
+_REQUESTER_LOGGER = "github.Requester"
+_CONNECTION_LOGGER = "urllib3.connectionpool"
+
+
+@dataclass
+class Span:
+    phase: str
+    operation: Optional[str] = None
+    repository: Optional[str] = None
+    label: Optional[str] = None
+    started_at: float = 0.0
+    duration: float = 0.0
+    requests: int = 0
+    bytes: int = 0
+    connections: int = 0
+    error: Optional[str] = None
+
+    def deserialize(self) -> Dict:
+        return {
+            "phase": self.phase,
+            "operation": self.operation,
+            "repository": self.repository,
+            "label": self.label,
+            "started_at": self.started_at,
+            "duration": round(self.duration, 6),
+            "requests": self.requests,
+            "bytes": self.bytes,
+            "connections": self.connections,
+            "error": self.error,
+        }
+
+
+@dataclass
+class _Totals:
+    requests: int = 0
+    bytes: int = 0
+    connections: int = 0
+
+
+class _RecordHandler(logging.Handler):
+    def __init__(self, recorder: "MetricsRecorder"):
+        super().__init__(level=logging.DEBUG)
+        self._recorder = recorder
+
+    def emit(self, record: logging.LogRecord) -> None:
+        if record.name == _CONNECTION_LOGGER:
+            if str(record.msg).startswith("Starting new"):
+                self._recorder.record_connection()
+        elif record.name == _REQUESTER_LOGGER and isinstance(record.args, tuple) and len(record.args) == 9:
+            output = record.args[-1]
+            self._recorder.record_request(len(output) if output else 0)
+
+
+class MetricsRecorder:
+    def __init__(self):
+        self._lock = threading.Lock()
+        self._local = threading.local()
+        self._spans: List[Span] = []
+        self._totals = _Totals()
+        self._handler = _RecordHandler(self)
+        self._loggers: Dict[str, Any] = {}
+
+    @property
+    def spans(self) -> List[Span]:
+        with self._lock:
+            return list(self._spans)
+
+    def install(self) -> None:
+        """Listen to the debug log records of PyGithub and urllib3 without printing them."""
+        for name in (_REQUESTER_LOGGER, _CONNECTION_LOGGER):
+            if name in self._loggers:
+                continue
+            logger = logging.getLogger(name)
+            self._loggers[name] = (logger.level, logger.propagate)
+            if not logger.isEnabledFor(logging.DEBUG):
+                logger.setLevel(logging.DEBUG)
+                logger.propagate = False
+            logger.addHandler(self._handler)
+
+    def uninstall(self) -> None:
+        for name, (level, propagate) in self._loggers.items():
+            logger = logging.getLogger(name)
+            logger.removeHandler(self._handler)
+            logger.setLevel(level)
+            logger.propagate = propagate
+        self._loggers.clear()
+
+    def reset(self) -> None:
+        with self._lock:
+            self._spans.clear()
+            self._totals = _Totals()
+
+    @contextmanager
+    def span(
+        self,
+        phase: str,
+        operation: Optional[str] = None,
+        repository: Optional[str] = None,
+        label: Optional[str] = None,
+        across_threads: bool = False,
+    ) -> Iterator[Span]:
+        """Measure a phase.
+
+        The requests are counted by the spans opened in the thread which sends them. A span with *across_threads*
+        counts all the requests sent by any thread while it's open instead.
+        """
+        current = Span(phase=phase, operation=operation, repository=repository, label=label, started_at=time.time())
+        stack = self._stack()
+        stack.append(current)
+        with self._lock:
+            before = _Totals(self._totals.requests, self._totals.bytes, self._totals.connections)
+        start = time.perf_counter()
+        try:
+            yield current
+        except Exception as e:
+            current.error = str(e)
+            raise
+        finally:
+            current.duration = time.perf_counter() - start
+            stack.remove(current)
+            with self._lock:
+                if across_threads:
+                    current.requests = self._totals.requests - before.requests
+                    current.bytes = self._totals.bytes - before.bytes
+                    current.connections = self._totals.connections - before.connections
+                self._spans.append(current)
+
+    def active_spans(self) -> List[Span]:
+        """The spans open in this thread, which another thread could continue with *continue_spans*."""
+        return list(self._stack())
+
+    @contextmanager
+    def continue_spans(self, spans: Sequence[Span]) -> Iterator[None]:
+        """Count the requests of this thread for the spans opened in another thread too, e.g., in a worker pool."""
+        stack = self._stack()
+        stack[:0] = spans
+        try:
+            yield
+        finally:
+            del stack[: len(spans)]
+
+    def record_request(self, size: int) -> None:
+        # The spans continued in other threads are counted by many threads at the same time.
+        with self._lock:
+            self._totals.requests += 1
+            self._totals.bytes += size
+            for current in self._stack():
+                current.requests += 1
+                current.bytes += size
+
+    def record_connection(self) -> None:
+        with self._lock:
+            self._totals.connections += 1
+            for current in self._stack():
+                current.connections += 1
+
+    def summary(self) -> Dict:
+        phases: Dict[str, Dict[str, Any]] = {}
+        for current in self.spans:
+            phase = phases.setdefault(
+                current.phase, {"count": 0, "seconds": 0.0, "max_seconds": 0.0, "requests": 0, "bytes": 0}
+            )
+            phase["count"] += 1
+            phase["seconds"] += current.duration
+            phase["max_seconds"] = max(phase["max_seconds"], current.duration)
+            phase["requests"] += current.requests
+            phase["bytes"] += current.bytes
+        with self._lock:
+            totals = {
+                "requests": self._totals.requests,
+                "bytes": self._totals.bytes,
+                "connections": self._totals.connections,
+            }
+        return {"phases": phases, "totals": totals}
+
+    def report(self, path: Optional[str] = None, slowest: int = 5) -> None:
+        """Print a summary table and write every span as a JSON line into *path* if it's given."""
+        summary = self.summary()
+        print(f"{'phase':<16}{'count':>8}{'total (s)':>12}{'max (s)':>12}{'requests':>10}{'bytes':>12}")
+        for name, phase in summary["phases"].items():
+            print(
+                f"{name:<16}{phase['count']:>8}{phase['seconds']:>12.3f}{phase['max_seconds']:>12.3f}"
+                f"{phase['requests']:>10}{phase['bytes']:>12}"
+            )
+        totals = summary["totals"]
+        print(
+            f"Sent {totals['requests']} requests ({totals['bytes']} bytes received) "
+            f"over {totals['connections']} new connections."
+        )
+        repositories = sorted(
+            (s for s in self.spans if s.phase == "repository"), key=lambda s: s.duration, reverse=True
+        )
+        for current in repositories[:slowest]:
+            print(
+                f"Slow repository: {current.repository} took {current.duration:.3f}s with {current.requests} requests"
+            )
+
+        if path:
+            with open(path, "a+", encoding="utf-8") as file_stream:
+                for current in self.spans:
+                    file_stream.write(json.dumps(current.deserialize()) + "\n")
+
+    def _stack(self) -> List[Span]:
+        stack = getattr(self._local, "stack", None)
+        if stack is None:
+            stack = []
+            self._local.stack = stack
+        return stack
+
+
+_recorder = MetricsRecorder()
+
+
+def recorder() -> MetricsRecorder:
+    """Get the metrics recorder shared by the whole process."""
+    return _recorder
@@ -1,11 +1,18 @@
+import fnmatch
 import os
 from abc import ABCMeta, abstractmethod
 from dataclasses import dataclass, field
-from typing import Dict, List
+from functools import cached_property
+from typing import Any, Dict, Generic, Iterable, Iterator, List, Mapping, Optional, Tuple, TypeVar
+
+from .fingerprint import label_fingerprint, normalize_color, normalize_description, normalize_name
+
+T = TypeVar("T")
 
 
-@dataclass
 class _BaseConfig(metaclass=ABCMeta):
+    # Let the slotted models stay slotted
+    __slots__ = ()
 
     @abstractmethod
     def deserialize(self) -> Dict:
@@ -17,37 +24,199 @@ class _BaseConfig(metaclass=ABCMeta):
         pass
 
 
-@dataclass
+@dataclass(frozen=True, slots=True)
 class Label(_BaseConfig):
+    """A label without its name, which is the key of the labels.
+
+    The color and the description are normalized as GitHub keeps them, so two labels are equal if GitHub wouldn't
+    tell them apart. The names the label had before aren't a part of the label on GitHub, they're only used to rename
+    the existing label instead of creating a new one.
+    """
+
     color: str
     description: str
+    previous_names: Tuple[str, ...] = field(default=(), compare=False)
+
+    def __post_init__(self):
+        object.__setattr__(self, "color", normalize_color(self.color))
+        object.__setattr__(self, "description", normalize_description(self.description))
+        object.__setattr__(self, "previous_names", tuple(self.previous_names))
 
     def deserialize(self) -> Dict:
-        return {
+        data: Dict[str, Any] = {
             "color": self.color,
             "description": self.description,
         }
+        if self.previous_names:
+            data["previous_names"] = list(self.previous_names)
+        return data
 
     @staticmethod
-    def serialize(data: Dict[str, str]) -> "Label":
+    def serialize(data: Dict[str, Any]) -> "Label":
         color = data.get("color", "")
         description = data.get("description", "")
         if not color:
             raise ValueError("Property *color* or *description* cannot be empty.")
+        # *aliases* is another name of *previous_names*
+        previous_names = data.get("previous_names") or data.get("aliases") or []
+        if isinstance(previous_names, str):
+            previous_names = [previous_names]
+        if not all(isinstance(name, str) and name for name in previous_names):
+            raise ValueError("Property *previous_names* should be a list of label names.")
         return Label(
             color=color,
             description=description,
+            previous_names=tuple(previous_names),
+        )
+
+
+@dataclass
+class OrganizationSelector(_BaseConfig):
+    name: str
+    topics: List[str] = field(default_factory=list)
+    include: List[str] = field(default_factory=list)
+    exclude: List[str] = field(default_factory=list)
+    archived: bool = False
+    forks: bool = False
+
+    def matches(self, repo: Any) -> bool:
+        """Check whether the repository listed from the organization should be managed."""
+        if repo.archived and not self.archived:
+            return False
+        if repo.fork and not self.forks:
+            return False
+        if self.topics and not set(self.topics).intersection(repo.topics or []):
+            return False
+        if self.include and not any(fnmatch.fnmatchcase(repo.name, pattern) for pattern in self.include):
+            return False
+        return not any(fnmatch.fnmatchcase(repo.name, pattern) for pattern in self.exclude)
+
+    def deserialize(self) -> Dict:
+        return {
+            "name": self.name,
+            "topics": self.topics,
+            "include": self.include,
+            "exclude": self.exclude,
+            "archived": self.archived,
+            "forks": self.forks,
+        }
+
+    @staticmethod
+    def serialize(data: Dict) -> "OrganizationSelector":
+        name = data.get("name", "")
+        if not name:
+            raise ValueError("Property *name* of *organization* cannot be empty.")
+        return OrganizationSelector(
+            name=name,
+            topics=data.get("topics") or [],
+            include=data.get("include") or [],
+            exclude=data.get("exclude") or [],
+            archived=data.get("archived", False),
+            forks=data.get("forks", False),
+        )
+
+
+class LabelIndex(Mapping[str, T], Generic[T]):
+    """The labels by name, which are looked up case-insensitively like GitHub does but keep their own names."""
+
+    __slots__ = ("_items",)
+
+    def __init__(self, labels: Optional[Mapping[str, T]] = None):
+        self._items: Dict[str, Tuple[str, T]] = {
+            normalize_name(name): (name, label) for name, label in (labels or {}).items()
+        }
+
+    def __getitem__(self, name: str) -> T:
+        return self._items[normalize_name(name)][1]
+
+    def __contains__(self, name: object) -> bool:
+        return isinstance(name, str) and normalize_name(name) in self._items
+
+    def __iter__(self) -> Iterator[str]:
+        return (name for name, _ in self._items.values())
+
+    def __len__(self) -> int:
+        return len(self._items)
+
+    @staticmethod
+    def merged(layers: Iterable[Mapping[str, T]]) -> "LabelIndex[T]":
+        """Merge the labels layer by layer, a label replaces the earlier one with the same name in any case."""
+        index: LabelIndex[T] = LabelIndex()
+        for labels in layers:
+            for name, label in labels.items():
+                index._items[normalize_name(name)] = (name, label)
+        return index
+
+    def name_of(self, name: str) -> Optional[str]:
+        """The name of the label which has the same name case-insensitively."""
+        item = self._items.get(normalize_name(name))
+        return item[0] if item else None
+
+
+def _serialize_labels(data: Optional[Dict[str, Dict]]) -> Dict[str, Label]:
+    return {name: Label.serialize(label) for name, label in (data or {}).items()}
+
+
+@dataclass
+class RepositoryOverride(_BaseConfig):
+    """The labels of the repositories which match a name or a shell-style pattern, on top of the default labels."""
+
+    label_sets: List[str] = field(default_factory=list)
+    labels: Dict[str, Label] = field(default_factory=dict)
+    delete_unused: Optional[bool] = None
+
+    def deserialize(self) -> Dict:
+        data: Dict[str, Any] = {
+            "label_sets": self.label_sets,
+            "labels": {name: label.deserialize() for name, label in self.labels.items()},
+        }
+        if self.delete_unused is not None:
+            data["delete_unused"] = self.delete_unused
+        return data
+
+    @staticmethod
+    def serialize(data: Dict) -> "RepositoryOverride":
+        return RepositoryOverride(
+            label_sets=data.get("label_sets") or [],
+            labels=_serialize_labels(data.get("labels")),
+            delete_unused=data.get("delete_unused"),
         )
 
 
+@dataclass
+class ResolvedLabelSet:
+    """The effective labels of a repository, the repositories with the same overrides share the same instance."""
+
+    labels: Dict[str, Label]
+    delete_unused: bool
+
+    @cached_property
+    def fingerprint(self) -> str:
+        return label_fingerprint(self.labels)
+
+    @cached_property
+    def version(self) -> str:
+        """The fingerprint together with *delete_unused*, the same labels without deleting the unused ones aren't in
+        sync with deleting them."""
+        return f"{self.fingerprint}:{int(self.delete_unused)}"
+
+
 @dataclass
 class GitHubLabelManagementConfig(_BaseConfig):
     repositories: List[str] = field(default_factory=list)
     delete_unused: bool = False
     labels: Dict[str, Label] = field(default_factory=dict)
+    organization: Optional[OrganizationSelector] = None
+    label_sets: Dict[str, Dict[str, Label]] = field(default_factory=dict)
+    # The label sets every repository uses, they're applied before *labels*.
+    default_label_sets: List[str] = field(default_factory=list)
+    overrides: Dict[str, RepositoryOverride] = field(default_factory=dict)
 
     # inner usage
     config_path: str = field(default_factory=str)
+    _resolved: Dict[Tuple[str, ...], ResolvedLabelSet] = field(
+        default_factory=dict, init=False, repr=False, compare=False
+    )
 
     def __post_init__(self):
         if self.labels:
@@ -62,24 +231,80 @@ class GitHubLabelManagementConfig(_BaseConfig):
         labels_config = {}
         for label_name, label_config in self.labels.items():
             labels_config[label_name] = label_config.deserialize()
-        return {
+        data = {
             "repositories": self.repositories or [],
             "delete_unused": self.delete_unused,
             "labels": labels_config or {},
         }
+        if self.organization:
+            data["organization"] = self.organization.deserialize()
+        if self.label_sets:
+            data["label_sets"] = {
+                name: {label_name: label.deserialize() for label_name, label in labels.items()}
+                for name, labels in self.label_sets.items()
+            }
+        if self.default_label_sets:
+            data["default_label_sets"] = self.default_label_sets
+        if self.overrides:
+            data["overrides"] = {pattern: override.deserialize() for pattern, override in self.overrides.items()}
+        return data
+
+    def resolve(self, repository: str) -> ResolvedLabelSet:
+        """Get the effective labels of the repository.
+
+        The resolution only depends on which overrides match the repository, so it's computed once for every
+        combination of the overrides and shared by all repositories with the same combination.
+        """
+        key = tuple(pattern for pattern in self.overrides if fnmatch.fnmatchcase(repository, pattern))
+        resolved = self._resolved.get(key)
+        if resolved is None:
+            resolved = self._resolve(key)
+            self._resolved[key] = resolved
+        return resolved
+
+    def _resolve(self, patterns: Tuple[str, ...]) -> ResolvedLabelSet:
+        layers: List[Mapping[str, Label]] = [self.label_sets[name] for name in self.default_label_sets]
+        layers.append(self.labels)
+        delete_unused = self.delete_unused
+        for pattern in patterns:
+            override = self.overrides[pattern]
+            layers.extend(self.label_sets[name] for name in override.label_sets)
+            layers.append(override.labels)
+            if override.delete_unused is not None:
+                delete_unused = override.delete_unused
+        # GitHub treats the names in different cases as the same label, so the later one replaces it.
+        return ResolvedLabelSet(labels=dict(LabelIndex.merged(layers)), delete_unused=delete_unused)
 
     @staticmethod
     def serialize(data: Dict) -> "GitHubLabelManagementConfig":
-        repositories = data.get("repositories", [os.environ["GITHUB_REPOSITORY"]])
+        organization = OrganizationSelector.serialize(data["organization"]) if data.get("organization") else None
+        if "repositories" in data:
+            repositories = data["repositories"]
+        else:
+            repositories = [] if organization else [os.environ["GITHUB_REPOSITORY"]]
         delete_unused = data.get("delete_unused", False)
         labels = data.get("labels", {})
-        if not (repositories or labels):
+        if not (repositories or organization or labels):
             raise ValueError("Property *repositories* or *labels* cannot be empty.")
         labels_models = {}
         for k, v in labels.items():
             labels_models[k] = Label.serialize(v)
+        label_sets = {name: _serialize_labels(labels) for name, labels in (data.get("label_sets") or {}).items()}
+        default_label_sets = data.get("default_label_sets") or []
+        overrides = {
+            pattern: RepositoryOverride.serialize(override or {})
+            for pattern, override in (data.get("overrides") or {}).items()
+        }
+        used_label_sets = default_label_sets + [name for o in overrides.values() for name in o.label_sets]
+        unknown_label_sets = sorted(set(used_label_sets) - set(label_sets))
+        if unknown_label_sets:
+            raise ValueError(f"Label sets {', '.join(unknown_label_sets)} are used but not defined in *label_sets*.")
         return GitHubLabelManagementConfig(
             repositories=repositories,
             delete_unused=delete_unused,
             labels=labels_models,
+            organization=organization,
+            label_sets=label_sets,
+            default_label_sets=default_label_sets,
+            overrides=overrides,
         )
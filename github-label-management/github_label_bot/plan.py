@@ -0,0 +1,126 @@
+"""*Compute the label changes of a repository without touching GitHub API*
+
+Compare the expected labels in configuration with a snapshot of the existing labels of one repository and organize
+the difference as a change set. It's pure so that it could be reused by dry run, parallel mutation or skipping.
+"""
+
+from dataclasses import dataclass, field
+from typing import Dict, List, Mapping, Optional, Set
+
+from .enums import LabelChangeType
+from .model import Label, LabelIndex
+
+
+@dataclass
+class LabelChange:
+    change_type: LabelChangeType
+    name: str
+    label: Optional[Label] = None
+    current: Optional[Label] = None
+    # The name of the existing label which is renamed to *name*
+    current_name: Optional[str] = None
+
+    def deserialize(self) -> Dict:
+        data = {
+            "type": self.change_type.value,
+            "name": self.name,
+            "label": self.label.deserialize() if self.label else None,
+            "current": self.current.deserialize() if self.current else None,
+        }
+        if self.current_name:
+            data["current_name"] = self.current_name
+        return data
+
+    @staticmethod
+    def serialize(data: Dict) -> "LabelChange":
+        return LabelChange(
+            change_type=LabelChangeType(data["type"]),
+            name=data["name"],
+            label=Label.serialize(data["label"]) if data.get("label") else None,
+            current=Label.serialize(data["current"]) if data.get("current") else None,
+            current_name=data.get("current_name"),
+        )
+
+
+@dataclass
+class LabelChangePlan:
+    changes: List[LabelChange] = field(default_factory=list)
+
+    @property
+    def mutations(self) -> List[LabelChange]:
+        return [change for change in self.changes if change.change_type is not LabelChangeType.NoOp]
+
+    @property
+    def is_empty(self) -> bool:
+        return not self.mutations
+
+    def count(self, change_type: LabelChangeType) -> int:
+        return len([change for change in self.changes if change.change_type is change_type])
+
+    def deserialize(self) -> Dict:
+        return {
+            "changes": [change.deserialize() for change in self.mutations],
+            "summary": {change_type.value: self.count(change_type) for change_type in LabelChangeType},
+        }
+
+
+def compute_plan(desired: Mapping[str, Label], existing: Mapping[str, Label], delete_unused: bool) -> LabelChangePlan:
+    """Compute the changes which could make the *existing* labels be same as the *desired* labels.
+
+    The names are matched case-insensitively like GitHub does, so a label whose name only differs in case is renamed
+    by updating it instead of creating a duplicate. A label which only exists by one of its previous names is renamed
+    in the same way, so it keeps the issues and pull requests it was added to.
+    """
+    existing_index = LabelIndex(existing)
+    desired_index = LabelIndex(desired)
+    # The existing labels which are renamed to a desired one
+    renamed: Set[str] = set()
+    changes: List[LabelChange] = []
+    for name, label in desired.items():
+        current_name = existing_index.name_of(name) or _previous_name(label, existing_index, desired_index, renamed)
+        if current_name is None:
+            changes.append(LabelChange(change_type=LabelChangeType.Create, name=name, label=label))
+            continue
+        current = existing_index[current_name]
+        if current_name != name or current != label:
+            changes.append(
+                LabelChange(
+                    change_type=LabelChangeType.Update,
+                    name=name,
+                    label=label,
+                    current=current,
+                    current_name=current_name if current_name in renamed else None,
+                )
+            )
+        else:
+            changes.append(LabelChange(change_type=LabelChangeType.NoOp, name=name, label=label, current=current))
+
+    if delete_unused:
+        for name, current in existing.items():
+            if name not in desired_index and name not in renamed:
+                changes.append(LabelChange(change_type=LabelChangeType.Delete, name=name, current=current))
+    return LabelChangePlan(changes=changes)
+
+
+def _previous_name(
+    label: Label, existing: LabelIndex[Label], desired: LabelIndex[Label], renamed: Set[str]
+) -> Optional[str]:
+    """Find the existing label which could be renamed, it's neither desired by itself nor renamed to another one."""
+    for previous_name in label.previous_names:
+        current_name = existing.name_of(previous_name)
+        if current_name is not None and current_name not in desired and current_name not in renamed:
+            renamed.add(current_name)
+            return current_name
+    return None
+
+
+def changed_label_names(previous: Mapping[str, Label], desired: Mapping[str, Label], delete_unused: bool) -> List[str]:
+    """List the labels which were added, modified or removed (only if they should be deleted) between two configs."""
+    names = []
+    for name, label in desired.items():
+        if previous.get(name) != label:
+            # The label may still have one of its previous names
+            names += [name, *label.previous_names]
+    if delete_unused:
+        names += [name for name in previous if name not in desired]
+    return list(dict.fromkeys(names))
@@ -1,62 +1,436 @@
+import dataclasses
+import functools
+import threading
+import urllib.parse
 from abc import ABCMeta, abstractmethod
-from typing import Dict
+from typing import Dict, List, Mapping, Optional
 
 import github
+from github import UnknownObjectException
 from github.Label import Label as GitHubLabel
 from github.Repository import Repository
 
 from ._utils import YAML
-from .model import GitHubLabelManagementConfig
+from .checkpoint import CheckpointJournal
+from .enums import ConflictPolicy, LabelChangeType
+from .executor import LabelChangeError, LabelChangeExecutor
+from .fetcher import BaseLabelFetcher, RestLabelFetcher
+from .fingerprint import FingerprintStore, label_fingerprint
+from .merge import merge_labels
+from .metrics import recorder
+from .model import GitHubLabelManagementConfig, LabelIndex, ResolvedLabelSet
 from .model import Label as GitHubLabelBotLabel
+from .plan import LabelChange, LabelChangePlan, changed_label_names, compute_plan
+from .scheduler import RequestScheduler
+from .state import LabelStateStore
 
 
 class BaseProcess(metaclass=ABCMeta):
+    def __init__(
+        self,
+        scheduler: Optional[RequestScheduler] = None,
+        fetcher: Optional[BaseLabelFetcher] = None,
+        executor: Optional[LabelChangeExecutor] = None,
+        fingerprints: Optional[FingerprintStore] = None,
+    ):
+        self._scheduler = scheduler or RequestScheduler()
+        self._fetcher = fetcher or RestLabelFetcher(self._scheduler)
+        self._executor = executor or LabelChangeExecutor(self._scheduler)
+        self._fingerprints = fingerprints
+
     @abstractmethod
-    def process(self, repo: Repository, label_config: GitHubLabelManagementConfig) -> None:
+    def process(self, repo: Repository, label_config: GitHubLabelManagementConfig) -> Optional[LabelChangePlan]:
         pass
 
+    def prepare(self, github: github.Github, repositories: List[str]) -> None:
+        """Run before any repository is processed."""
+        self._fetcher.prefetch(github, repositories)
+
+    def finish(self) -> None:
+        """Run after all repositories have been processed."""
+        self._fetcher.flush()
+        self._executor.close()
+        if self._fingerprints:
+            self._fingerprints.save()
+
+    def _get_existing_labels(self, repo: Repository) -> LabelIndex[GitHubLabel]:
+        with recorder().span("fetch", repository=repo.full_name):
+            return LabelIndex({label.name: label for label in self._fetcher.fetch(repo)})
+
+    def _plan(
+        self, repo: Repository, label_config: GitHubLabelManagementConfig, existing_labels: Mapping[str, GitHubLabel]
+    ) -> LabelChangePlan:
+        desired = label_config.resolve(repo.full_name)
+        if self._fingerprints is None:
+            return compute_plan(desired.labels, _snapshot(existing_labels), desired.delete_unused)
+
+        # The labels weren't modified since they were synced with the same label set last time.
+        if self._fetcher.is_unchanged(repo) and self._fingerprints.get(repo.full_name) == desired.version:
+            print(f"[DEBUG] Labels of {repo.full_name} match the fingerprint of last sync.")
+            return _no_change_plan(desired.labels)
+
+        existing = _snapshot(existing_labels)
+        if label_fingerprint(existing) == desired.fingerprint:
+            plan = _no_change_plan(desired.labels)
+        else:
+            plan = compute_plan(desired.labels, existing, desired.delete_unused)
+        if plan.is_empty:
+            self._fingerprints.put(repo.full_name, desired.version)
+        return plan
+
 
 class SyncUpAsRemote(BaseProcess):
+    """Synchronize repository labels with configuration.
 
-    def process(self, repo: Repository, label_config: GitHubLabelManagementConfig) -> None:
+    With a checkpoint journal, the progress of every repository is recorded, so a resumed run skips the repositories
+    which were synchronized and only applies the remaining changes of the repository which was interrupted.
+    """
+
+    def __init__(
+        self,
+        scheduler: Optional[RequestScheduler] = None,
+        fetcher: Optional[BaseLabelFetcher] = None,
+        executor: Optional[LabelChangeExecutor] = None,
+        fingerprints: Optional[FingerprintStore] = None,
+        checkpoint: Optional[CheckpointJournal] = None,
+    ):
+        super().__init__(scheduler, fetcher, executor, fingerprints)
+        self._checkpoint = checkpoint
+        self._failed = False
+
+    def process(self, repo: Repository, label_config: GitHubLabelManagementConfig) -> LabelChangePlan:
         """Synchronize repository labels with configuration."""
+        desired = label_config.resolve(repo.full_name)
+        try:
+            if self._checkpoint:
+                if self._checkpoint.is_done(repo.full_name, desired):
+                    print(f"[DEBUG] {repo.full_name} was synchronized before it's resumed.")
+                    return LabelChangePlan()
+                remaining = self._checkpoint.remaining(repo.full_name, desired)
+                if remaining is not None:
+                    print(f"[DEBUG] Resume {len(remaining)} remaining label changes of {repo.full_name}.")
+                    plan = LabelChangePlan(changes=remaining)
+                    self._apply(repo, desired, plan, _label_handles(repo, plan), resumed=True, complete=False)
+                    return plan
+            return self._sync(repo, label_config, desired)
+        except Exception:
+            self._failed = True
+            if self._checkpoint:
+                self._checkpoint.forget(repo.full_name)
+            raise
+
+    def finish(self) -> None:
+        super().finish()
+        if self._checkpoint:
+            if not self._failed:
+                self._checkpoint.clear()
+            self._checkpoint.close()
+
+    def _sync(
+        self, repo: Repository, label_config: GitHubLabelManagementConfig, desired: ResolvedLabelSet
+    ) -> LabelChangePlan:
         # Get existing labels
-        existing_labels: Dict[str, GitHubLabel] = {label.name: label for label in repo.get_labels()}
-
-        # Update or create labels
-        for name, props in label_config.labels.items():
-            if name in existing_labels:
-                label = existing_labels[name]
-                if label.color != props.color or label.description != props.description:
-                    label.edit(name=name, color=props.color, description=props.description)
-                    print(f"Updated label: {name}")
+        existing_labels = self._get_existing_labels(repo)
+
+        # Plan the changes first and only call GitHub API if it needs
+        plan = self._plan(repo, label_config, existing_labels)
+        if plan.is_empty:
+            print(f"[DEBUG] Labels of {repo.full_name} are already up to date.")
+            if self._checkpoint:
+                self._checkpoint.done(repo.full_name, desired)
+            return plan
+        self._apply(repo, desired, plan, existing_labels)
+        return plan
+
+    def _apply(
+        self,
+        repo: Repository,
+        desired: ResolvedLabelSet,
+        plan: LabelChangePlan,
+        remote_labels: Mapping[str, GitHubLabel],
+        resumed: bool = False,
+        complete: bool = True,
+    ) -> None:
+        """Apply the plan, it's *complete* if it was computed from all labels, so they match *desired* afterward."""
+        checkpoint = self._checkpoint
+        if checkpoint and not resumed:
+            checkpoint.planned(repo.full_name, desired, plan.mutations)
+        on_applied = functools.partial(checkpoint.applied, repo.full_name) if checkpoint else None
+        try:
+            results = self._executor.apply(repo, plan, remote_labels, on_applied=on_applied)
+        finally:
+            self._fetcher.invalidate(repo)
+        succeeded = all(result.succeeded for result in results)
+        if self._fingerprints:
+            if succeeded and complete:
+                self._fingerprints.put(repo.full_name, desired.version)
             else:
-                repo.create_label(name=name, color=props.color, description=props.description)
-                print(f"Created label: {name}")
+                self._fingerprints.invalidate(repo.full_name)
+        if not succeeded:
+            raise LabelChangeError(repo.full_name, results)
+        if checkpoint:
+            checkpoint.done(repo.full_name, desired)
+
+
+class IncrementalSyncUpAsRemote(SyncUpAsRemote):
+    """Synchronize only the labels which were changed since the *previous* configuration.
+
+    Every changed label is read and modified one by one instead of listing all labels of the repository. It expects
+    the repositories were synchronized with the previous configuration, so a repository which wasn't managed by it, or
+    which starts deleting unused labels, is still synchronized as a whole.
+    """
+
+    def __init__(
+        self,
+        previous_config: GitHubLabelManagementConfig,
+        scheduler: Optional[RequestScheduler] = None,
+        fetcher: Optional[BaseLabelFetcher] = None,
+        executor: Optional[LabelChangeExecutor] = None,
+        fingerprints: Optional[FingerprintStore] = None,
+        checkpoint: Optional[CheckpointJournal] = None,
+    ):
+        super().__init__(scheduler, fetcher, executor, fingerprints, checkpoint)
+        self._previous_config = previous_config
+
+    def prepare(self, github: github.Github, repositories: List[str]) -> None:
+        # Nothing to prefetch, the repositories synchronized as a whole fetch their labels by themselves.
+        pass
+
+    def _sync(
+        self, repo: Repository, label_config: GitHubLabelManagementConfig, desired: ResolvedLabelSet
+    ) -> LabelChangePlan:
+        if not self._was_managed(repo.full_name, label_config):
+            print(f"[DEBUG] {repo.full_name} wasn't managed by the previous configuration, synchronize all labels.")
+            return super()._sync(repo, label_config, desired)
+        previous = self._previous_config.resolve(repo.full_name)
+        if desired.delete_unused and not previous.delete_unused:
+            print(f"[DEBUG] {repo.full_name} starts deleting unused labels, synchronize all labels.")
+            return super()._sync(repo, label_config, desired)
+
+        names = changed_label_names(previous.labels, desired.labels, desired.delete_unused)
+        if not names:
+            print(f"[DEBUG] No labels of {repo.full_name} were changed in configuration.")
+            if self._checkpoint:
+                self._checkpoint.done(repo.full_name, desired)
+            return LabelChangePlan()
+        existing_labels = self._get_labels(repo, names)
+        plan = compute_plan(
+            {name: desired.labels[name] for name in names if name in desired.labels},
+            _snapshot(existing_labels),
+            desired.delete_unused,
+        )
+        if plan.is_empty:
+            print(f"[DEBUG] Changed labels of {repo.full_name} are already up to date.")
+            if self._checkpoint:
+                self._checkpoint.done(repo.full_name, desired)
+            return plan
+        # The fingerprint is about all labels, but only a few of them were checked.
+        self._apply(repo, desired, plan, existing_labels, complete=False)
+        return plan
+
+    def _was_managed(self, repository: str, label_config: GitHubLabelManagementConfig) -> bool:
+        previous = self._previous_config
+        if previous.organization:
+            # The repositories of an organization are selected by their metadata, so only an unchanged selector
+            # guarantees the repository was selected last time.
+            return (
+                label_config.organization is not None
+                and previous.organization.deserialize() == label_config.organization.deserialize()
+                and repository.split("/")[0].lower() == previous.organization.name.lower()
+            )
+        return repository in previous.repositories
+
+    def _get_labels(self, repo: Repository, names: List[str]) -> LabelIndex[GitHubLabel]:
+        labels = {}
+        with recorder().span("fetch", repository=repo.full_name):
+            for name in names:
+                try:
+                    label = self._scheduler.call(repo.get_label, name)
+                except UnknownObjectException:
+                    continue
+                # GitHub finds the label case-insensitively, keep the name it really has.
+                labels[label.name] = label
+        return LabelIndex(labels)
 
-        # Delete labels not in config if specified
-        if label_config.delete_unused:
-            for name, label in existing_labels.items():
-                if name not in label_config.labels:
-                    label.delete()
-                    print(f"Deleted label: {name}")
+
+class StatefulSyncUpAsRemote(SyncUpAsRemote):
+    """Synchronize repository labels with configuration, and keep the labels of every repository in *state*.
+
+    A repository whose labels are in the state is compared with the state instead of listing its labels, unless it's
+    asked to *refresh* the state, e.g., by a periodic sweep which corrects the state if some events were missed.
+    """
+
+    def __init__(
+        self,
+        state: LabelStateStore,
+        scheduler: Optional[RequestScheduler] = None,
+        fetcher: Optional[BaseLabelFetcher] = None,
+        executor: Optional[LabelChangeExecutor] = None,
+        refresh: bool = False,
+    ):
+        super().__init__(scheduler, fetcher, executor)
+        self._state = state
+        self._refresh = refresh
+
+    def _sync(
+        self, repo: Repository, label_config: GitHubLabelManagementConfig, desired: ResolvedLabelSet
+    ) -> LabelChangePlan:
+        current = None if self._refresh else self._state.get(repo.full_name)
+        if current is None:
+            return super()._sync(repo, label_config, desired)
+        plan = compute_plan(desired.labels, current, desired.delete_unused)
+        if not plan.is_empty:
+            self._apply(repo, desired, plan, _label_handles(repo, plan))
+        return plan
+
+    def _get_existing_labels(self, repo: Repository) -> LabelIndex[GitHubLabel]:
+        existing_labels = super()._get_existing_labels(repo)
+        self._state.replace(repo.full_name, _snapshot(existing_labels))
+        return existing_labels
+
+    def _apply(
+        self,
+        repo: Repository,
+        desired: ResolvedLabelSet,
+        plan: LabelChangePlan,
+        remote_labels: Mapping[str, GitHubLabel],
+        resumed: bool = False,
+        complete: bool = True,
+    ) -> None:
+        try:
+            super()._apply(repo, desired, plan, remote_labels, resumed, complete)
+        except Exception:
+            # Some changes may be applied, so the state would be listed again.
+            self._state.forget(repo.full_name)
+            raise
+        self._state.apply_plan(repo.full_name, plan)
+
+
+class PlanAgainstRemote(BaseProcess):
+
+    def process(self, repo: Repository, label_config: GitHubLabelManagementConfig) -> LabelChangePlan:
+        """Only compute the changes of repository labels with configuration, it won't modify anything."""
+        existing_labels = self._get_existing_labels(repo)
+        plan = self._plan(repo, label_config, existing_labels)
+        print(f"[DEBUG] Planned {len(plan.mutations)} label changes for {repo.full_name}.")
+        return plan
 
 
 class DownloadFromRemote(BaseProcess):
+    """Download the labels of all repositories and merge them into one configuration which is written at the end."""
+
+    def __init__(
+        self,
+        scheduler: Optional[RequestScheduler] = None,
+        fetcher: Optional[BaseLabelFetcher] = None,
+        executor: Optional[LabelChangeExecutor] = None,
+        conflict_policy: ConflictPolicy = ConflictPolicy.FirstWins,
+    ):
+        super().__init__(scheduler, fetcher, executor)
+        self._conflict_policy = conflict_policy
+        self._lock = threading.Lock()
+        self._order: List[str] = []
+        self._snapshots: Dict[str, Dict[str, GitHubLabelBotLabel]] = {}
+        self._label_config: Optional[GitHubLabelManagementConfig] = None
+
+    def prepare(self, github: github.Github, repositories: List[str]) -> None:
+        super().prepare(github, repositories)
+        # Keep the order of repositories because the first one wins the conflicts
+        with self._lock:
+            self._order.extend(repositories)
 
     def process(self, repo: github.Repository, label_config: GitHubLabelManagementConfig) -> None:
-        existing_labels: Dict[str, GitHubLabel] = {label.name: label for label in repo.get_labels()}
-        labels_config: Dict[str, GitHubLabelBotLabel] = {}
-        for label_name, label_info in existing_labels.items():
-            print(f"[DEBUG] Sync label {label_name}!")
-            labels_config[label_name] = GitHubLabelBotLabel(
-                color=label_info.color,
-                description=label_info.description,
+        existing_labels = self._get_existing_labels(repo)
+        print(f"[DEBUG] Downloaded {len(existing_labels)} labels of {repo.full_name}.")
+        with self._lock:
+            self._snapshots[repo.full_name] = _snapshot(existing_labels)
+            self._label_config = label_config
+
+    def finish(self) -> None:
+        super().finish()
+        if self._label_config is None:
+            print("[DEBUG] No labels were downloaded.")
+            return
+        # The labels of a failed repository would be missing, and the next sync would delete them with *delete_unused*.
+        failed = [repository for repository in self._order if repository not in self._snapshots]
+        if failed:
+            print(
+                f"Cannot download the labels of {', '.join(failed)}, so configuration {self._label_config.config_path} "
+                "is kept as it is. Please run it again."
             )
+            return
+        prepared = set(self._order)
+        repositories = self._order + [repository for repository in self._snapshots if repository not in prepared]
+        labels, conflicts = merge_labels(
+            ((repository, self._snapshots[repository]) for repository in repositories), self._conflict_policy
+        )
+        for conflict in conflicts:
+            variants = "; ".join(
+                f"{name} {label.color} '{label.description}' in {', '.join(repos)}"
+                for name, label, repos in conflict.variants
+            )
+            print(f"Conflicting label {conflict.name}: {variants}")
+        delete_unused = self._label_config.delete_unused
+        if conflicts and self._conflict_policy is ConflictPolicy.Report:
+            print(f"Left {len(conflicts)} conflicting labels out of the configuration, please review them.")
+            if delete_unused:
+                print("Turned *delete_unused* off, or the next sync would delete the conflicting labels everywhere.")
+                delete_unused = False
+
+        # The names the labels had before aren't on GitHub, they're kept from the configuration.
+        configured = LabelIndex(self._label_config.labels)
+        labels = {
+            name: (
+                dataclasses.replace(label, previous_names=configured[name].previous_names)
+                if name in configured
+                else label
+            )
+            for name, label in labels.items()
+        }
+
+        # The configured repositories are kept, only the repository of the workflow is written if there is none.
         config = GitHubLabelManagementConfig(
-            repositories=[repo.full_name],
-            labels=labels_config,
+            repositories=self._label_config.repositories or ([] if self._label_config.organization else repositories),
+            delete_unused=delete_unused,
+            labels=labels,
+            organization=self._label_config.organization,
         )
-        print("[DEBUG] All labels has been sync!")
-        YAML().write(path=label_config.config_path, mode="w+", config=config.deserialize())
-        print("[DEBUG] Download GitHub label config finish!")
+        if not YAML().write(path=self._label_config.config_path, mode="w+", config=config.deserialize()):
+            print(f"[DEBUG] Configuration {self._label_config.config_path} is already up to date.")
+        print(f"[DEBUG] Download GitHub label config of {len(repositories)} repositories finish!")
+
+
+def _label_handles(repo: Repository, plan: LabelChangePlan) -> LabelIndex[GitHubLabel]:
+    """Build the existing labels which the plan modifies from their names, instead of listing them again."""
+    labels = {}
+    for change in plan.mutations:
+        if change.change_type in (LabelChangeType.Update, LabelChangeType.Delete):
+            name = change.current_name or change.name
+            current = change.current or change.label
+            attributes = {
+                "name": name,
+                "color": current.color if current else None,
+                "description": current.description if current else None,
+                "url": f"{repo.url}/labels/{urllib.parse.quote(name, safe='')}",
+            }
+            labels[name] = GitHubLabel(repo.requester, {}, attributes, completed=True)
+    return LabelIndex(labels)
+
+
+def _snapshot(existing_labels: Mapping[str, GitHubLabel]) -> Dict[str, GitHubLabelBotLabel]:
+    return {name: _shared_label(label.color, label.description) for name, label in existing_labels.items()}
+
+
+@functools.lru_cache(maxsize=4096)
+def _shared_label(color: str, description: Optional[str]) -> GitHubLabelBotLabel:
+    # Most repositories have the same labels, so their snapshots share the same immutable label objects.
+    return GitHubLabelBotLabel(color=color, description=description)
+
+
+def _no_change_plan(labels: Mapping[str, GitHubLabelBotLabel]) -> LabelChangePlan:
+    return LabelChangePlan(
+        changes=[
+            LabelChange(change_type=LabelChangeType.NoOp, name=name, label=label, current=label)
+            for name, label in labels.items()
+        ]
+    )
@@ -1,39 +1,234 @@
 import os
 import pathlib
-from typing import Tuple
+import threading
+from concurrent.futures import ThreadPoolExecutor
+from dataclasses import dataclass
+from typing import Iterable, Iterator, List, Optional, Tuple
 
-import yaml
-from github import Github, GithubException
+from github import Auth, Consts, Github
+from github.Repository import Repository
 
+from .cache import LabelSnapshotCache
+from .checkpoint import CheckpointJournal
+from .compose import load_config_data, load_config_data_at_revision
+from .config_cache import CompiledConfigCache
+from .enums import FetchBackend
+from .executor import LabelChangeExecutor
+from .fetcher import BaseLabelFetcher, ConditionalLabelFetcher, GraphQLLabelFetcher, RestLabelFetcher
+from .fingerprint import FingerprintStore
 from .github_action import GitHubAction
+from .metrics import recorder
 from .model import GitHubLabelManagementConfig
+from .plan import LabelChangePlan
 from .process import BaseProcess
+from .scheduler import RequestScheduler
+
+
+@dataclass
+class RepositoryResult:
+    repository: str
+    error: Optional[Exception] = None
+    plan: Optional[LabelChangePlan] = None
+
+    @property
+    def succeeded(self) -> bool:
+        return self.error is None
 
 
 class GitHubOperationRunner:
-    def operate_with_github(self, action_inputs: GitHubAction, processor: BaseProcess) -> None:
-        # Load GitHub token from environment variable
-        print(f"[DEBUG] Get GitHub token.")
-        token = self._get_github_token()
+    # The maximum page size of GitHub REST API, it makes listing labels need less requests.
+    PER_PAGE = 100
+    # How many repositories would be prepared and dispatched to workers at once.
+    BATCH_SIZE = 25
+
+    def __init__(self, scheduler: Optional[RequestScheduler] = None):
+        self.scheduler = scheduler or RequestScheduler()
+        self._request_timeout = GitHubAction.request_timeout
+        self._local = threading.local()
+        self._lock = threading.Lock()
+        self._clients: List[Github] = []
+        self._workers: Optional[ThreadPoolExecutor] = None
+        self._concurrency = 0
+
+    def operate_with_github(self, action_inputs: GitHubAction, processor: BaseProcess) -> List[RepositoryResult]:
+        with recorder().span("operation", operation=type(processor).__name__, across_threads=True):
+            return self._operate_with_github(action_inputs, processor)
+
+    def _operate_with_github(self, action_inputs: GitHubAction, processor: BaseProcess) -> List[RepositoryResult]:
+        # Load configuration, a broken one fails before connecting to GitHub
+        config, repositories = self.load_config(action_inputs)
+
+        # Initialize GitHub client, it would be reused by all the operations in this process
+        self._request_timeout = action_inputs.request_timeout
+        github = self.github_client()
 
-        # Initialize GitHub client
-        print("[DEBUG] Connect to GitHub ...")
-        github = Github(token)
+        # Process each repository, they are dispatched batch by batch so that workers could start before the listing
+        # of organization repositories finishes.
+        print(f"[DEBUG] Start to sync up the GitHub label setting with concurrency {action_inputs.concurrency} ...")
+        workers = self._worker_pool(action_inputs.concurrency)
+        futures = []
+        repo_names = self._iter_repositories(github, config, repositories)
+        if action_inputs.shard:
+            print(f"[DEBUG] Only process the repositories of shard {action_inputs.shard}.")
+            repo_names = (name for name in repo_names if action_inputs.shard.owns(name))
+        for batch in self._batches(repo_names):
+            with recorder().span("prepare"):
+                processor.prepare(github, batch)
+            futures.extend(workers.submit(self._process_repository, processor, config, name) for name in batch)
+        results = [future.result() for future in futures]
+        processor.finish()
+        self._report(results)
+        return results
 
-        # Load configuration
+    def load_config(self, action_inputs: GitHubAction) -> Tuple[GitHubLabelManagementConfig, List[str]]:
         print(f"[DEBUG] Load the configuration.")
-        config, repositories = self._force_load_config(action_inputs)
+        with recorder().span("config_load"):
+            return self._force_load_config(action_inputs)
+
+    def repository(self, repo_name: str) -> Repository:
+        """Get the repository handle with the GitHub client of the current thread."""
+        return self._repository_handle(self.github_client(), repo_name)
+
+    def label_fetcher(self, action_inputs: GitHubAction) -> BaseLabelFetcher:
+        fetcher: BaseLabelFetcher = RestLabelFetcher(self.scheduler)
+        if action_inputs.label_cache_path:
+            cache = LabelSnapshotCache(action_inputs.label_cache_path, max_age=action_inputs.label_cache_max_age)
+            fetcher = ConditionalLabelFetcher(cache, self.scheduler)
+        if action_inputs.fetch_backend is FetchBackend.GraphQL:
+            fetcher = GraphQLLabelFetcher(fallback=fetcher, scheduler=self.scheduler)
+        return fetcher
+
+    def label_executor(self, action_inputs: GitHubAction) -> LabelChangeExecutor:
+        return LabelChangeExecutor(
+            self.scheduler, concurrency=action_inputs.mutation_concurrency, github_client=self.github_client
+        )
+
+    def checkpoint_journal(self, action_inputs: GitHubAction) -> Optional[CheckpointJournal]:
+        if not action_inputs.checkpoint_path:
+            if action_inputs.resume:
+                raise ValueError("It needs *checkpoint_path* to resume the synchronization.")
+            return None
+        return CheckpointJournal(action_inputs.checkpoint_path, resume=action_inputs.resume)
+
+    def fingerprint_store(self, action_inputs: GitHubAction) -> Optional[FingerprintStore]:
+        if not action_inputs.fingerprint_path:
+            return None
+        return FingerprintStore(action_inputs.fingerprint_path)
+
+    def github_client(self) -> Github:
+        """Get the GitHub client of the current thread.
+
+        The connection object of PyGithub keeps the pending request on itself, so a client cannot be shared between
+        threads. Every worker thread keeps its own client alive and reuses its connections for all repositories.
+        """
+        github = getattr(self._local, "github", None)
+        if github is None:
+            # Load GitHub token from environment variable
+            print(f"[DEBUG] Get GitHub token.")
+            token = self._get_github_token()
 
-        # Process each repository
-        print(f"[DEBUG] Start to sync up the GitHub label setting ...")
+            # The pacing and retrying of requests are handled by the scheduler
+            print("[DEBUG] Connect to GitHub ...")
+            with recorder().span("client_init"):
+                github = Github(
+                    auth=Auth.Token(token),
+                    base_url=self._get_github_api_url(),
+                    per_page=self.PER_PAGE,
+                    timeout=self._request_timeout,
+                    pool_size=1,
+                    retry=None,
+                    seconds_between_requests=None,
+                    seconds_between_writes=None,
+                )
+            self.scheduler.track(github.requester)
+            self._local.github = github
+            with self._lock:
+                self._clients.append(github)
+        return github
+
+    def close(self) -> None:
+        if self._workers is not None:
+            self._workers.shutdown(wait=True)
+            self._workers = None
+        with self._lock:
+            for github in self._clients:
+                github.close()
+            self._clients.clear()
+        self._local = threading.local()
+
+    def _worker_pool(self, concurrency: int) -> ThreadPoolExecutor:
+        if self._workers is None or self._concurrency != concurrency:
+            if self._workers is not None:
+                self._workers.shutdown(wait=True)
+            self._workers = ThreadPoolExecutor(max_workers=concurrency, thread_name_prefix="github-label-bot")
+            self._concurrency = concurrency
+        return self._workers
+
+    def _process_repository(
+        self, processor: BaseProcess, config: GitHubLabelManagementConfig, repo_name: str
+    ) -> RepositoryResult:
+        print(f"[DEBUG] Sync GtHub project {repo_name}")
+        try:
+            with recorder().span("repository", repository=repo_name):
+                repo = self.repository(repo_name)
+                plan = processor.process(repo, config)
+        except Exception as e:
+            return RepositoryResult(repository=repo_name, error=e)
+        return RepositoryResult(repository=repo_name, plan=plan)
+
+    def _iter_repositories(
+        self, github: Github, config: GitHubLabelManagementConfig, repositories: Iterable[str]
+    ) -> Iterator[str]:
+        seen = set()
+        for repo_name in repositories:
+            if repo_name not in seen:
+                seen.add(repo_name)
+                yield repo_name
+
+        selector = config.organization
+        if not selector:
+            return
+        print(f"[DEBUG] List repositories of organization {selector.name} ...")
+        org_repos = self.scheduler.call(github.get_organization, selector.name).get_repos(type="all")
+        page = 0
+        while True:
+            repos = self.scheduler.call(org_repos.get_page, page)
+            if not repos:
+                return
+            for repo in repos:
+                if repo.full_name not in seen and selector.matches(repo):
+                    seen.add(repo.full_name)
+                    yield repo.full_name
+            if len(repos) < self.PER_PAGE:
+                return
+            page += 1
+
+    def _batches(self, repositories: Iterable[str]) -> Iterator[List[str]]:
+        batch: List[str] = []
         for repo_name in repositories:
-            print(f"[DEBUG] Sync GtHub project {repo_name}")
-            try:
-                repo = github.get_repo(repo_name)
-                print(f"\nProcessing repository: {repo_name}")
-                processor.process(repo, config)
-            except GithubException as e:
-                print(f"Error processing {repo_name}: {e}")
+            batch.append(repo_name)
+            if len(batch) == self.BATCH_SIZE:
+                yield batch
+                batch = []
+        if batch:
+            yield batch
+
+    def _repository_handle(self, github: Github, repo_name: str) -> Repository:
+        """Build the repository object without fetching its metadata, the processors only need its name and URL.
+
+        A repository which doesn't exist would fail at the first request to its labels.
+        """
+        attributes = {"full_name": repo_name, "url": f"{github.requester.base_url}/repos/{repo_name}"}
+        return Repository(github.requester, {}, attributes, completed=False)
+
+    def _report(self, results: List[RepositoryResult]) -> None:
+        failures = [result for result in results if not result.succeeded]
+        print(
+            f"\nProcessed {len(results)} repositories: {len(results) - len(failures)} succeeded, {len(failures)} failed."
+        )
+        for result in failures:
+            print(f"Error processing {result.repository}: {result.error}")
+        print(f"[DEBUG] Request statistics: {self.scheduler.statistics.deserialize()}")
 
     def _get_github_token(self):
         token = os.getenv("GITHUB_TOKEN")
@@ -41,12 +236,16 @@ class GitHubOperationRunner:
             raise ValueError("GITHUB_TOKEN environment variable not set")
         return token
 
+    def _get_github_api_url(self) -> str:
+        # GitHub Actions sets it to the API of the GitHub Enterprise Server which runs the workflow
+        return os.getenv("GITHUB_API_URL") or Consts.DEFAULT_BASE_URL
+
     def _force_load_config(self, action_inputs: GitHubAction) -> Tuple[GitHubLabelManagementConfig, list[str]]:
         config_path = pathlib.Path(action_inputs.config_path)
         print(f"[DEBUG] action_inputs.config_path: {action_inputs.config_path}")
         if config_path.exists():
             print(f"[DEBUG] Found configuration! Load its settings ...")
-            config = self._load_label_config(action_inputs.config_path)
+            config = self._load_label_config(action_inputs.config_path, action_inputs.config_cache_path)
             config.config_path = action_inputs.config_path
             repositories = config.repositories
         else:
@@ -57,7 +256,32 @@ class GitHubOperationRunner:
         print(f"[DEBUG] config: {config}")
         return config, repositories
 
-    def _load_label_config(self, config_path: str) -> GitHubLabelManagementConfig:
+    def _load_label_config(self, config_path: str, cache_path: Optional[str] = None) -> GitHubLabelManagementConfig:
         """Load label configuration from YAML file."""
-        with open(config_path, "r") as file:
-            return GitHubLabelManagementConfig.serialize(yaml.safe_load(file))
+        if cache_path:
+            cache = CompiledConfigCache(cache_path)
+            config = cache.load(config_path)
+            print(f"[DEBUG] Compiled config cache {'hit' if cache.hit else 'miss'}.")
+            return config
+        data, _ = load_config_data(config_path)
+        return GitHubLabelManagementConfig.serialize(data)
+
+    def previous_label_config(self, action_inputs: GitHubAction) -> Optional[GitHubLabelManagementConfig]:
+        """Load the configuration which the repositories were synchronized with last time.
+
+        It's either a file or a git revision of the configuration, e.g., the commit before the one which triggers the
+        workflow. Without it, all labels are synchronized.
+        """
+        previous = action_inputs.previous_config
+        if not previous:
+            return None
+        try:
+            if os.path.exists(previous):
+                data, _ = load_config_data(previous)
+            else:
+                data = load_config_data_at_revision(action_inputs.config_path, previous)
+        except FileNotFoundError as e:
+            print(f"[DEBUG] Cannot load the previous configuration, synchronize all labels: {e}")
+            return None
+        print(f"[DEBUG] Only synchronize the labels changed since the previous configuration {previous}.")
+        return GitHubLabelManagementConfig.serialize(data)
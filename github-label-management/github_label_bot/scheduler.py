@@ -0,0 +1,165 @@
+"""*Schedule the requests to GitHub API with its rate limits*
+
+GitHub has a primary rate limit (*X-RateLimit-Remaining* / *X-RateLimit-Reset*) and secondary rate limits for the
+content-creating requests. This module paces the write requests with a token bucket, waits for the primary rate limit
+resetting and retries the throttled or failed requests with jittered exponential backoff.
+
+A write request which failed with a server error may have been applied anyway, e.g., the label was created before the
+gateway timed out, so only the throttled write requests are retried, which GitHub rejected without applying them.
+"""
+
+import random
+import threading
+import time
+from dataclasses import dataclass
+from typing import Any, Callable, List, TypeVar
+
+from github import GithubException, RateLimitExceededException
+
+T = TypeVar("T")
+
+# GitHub suggests no more than 80 content-generating requests per minute.
+DEFAULT_WRITES_PER_MINUTE = 80
+DEFAULT_WRITE_BURST = 10
+DEFAULT_MAX_RETRIES = 5
+DEFAULT_BACKOFF_BASE = 1.0
+DEFAULT_BACKOFF_MAX = 60.0
+# GitHub suggests waiting for at least one minute if a secondary rate limit has no *Retry-After*.
+DEFAULT_SECONDARY_LIMIT_WAIT = 60.0
+THROTTLED_STATUS = (429,)
+SERVER_ERROR_STATUS = (500, 502, 503, 504)
+
+
+@dataclass
+class SchedulerStatistics:
+    requests: int = 0
+    retries: int = 0
+    delayed_requests: int = 0
+    delayed_seconds: float = 0.0
+
+    def deserialize(self) -> dict:
+        return {
+            "requests": self.requests,
+            "retries": self.retries,
+            "delayed_requests": self.delayed_requests,
+            "delayed_seconds": round(self.delayed_seconds, 3),
+        }
+
+
+class TokenBucket:
+    def __init__(
+        self,
+        rate: float,
+        capacity: int,
+        clock: Callable[[], float] = time.monotonic,
+        sleep: Callable[[float], None] = time.sleep,
+    ):
+        self._rate = rate
+        self._capacity = capacity
+        self._tokens = float(capacity)
+        self._clock = clock
+        self._sleep = sleep
+        self._updated_at = clock()
+        self._lock = threading.Lock()
+
+    def acquire(self) -> float:
+        """Take one token and return how many seconds it waited for it."""
+        with self._lock:
+            now = self._clock()
+            self._tokens = min(self._capacity, self._tokens + (now - self._updated_at) * self._rate)
+            self._updated_at = now
+            self._tokens -= 1
+            wait = -self._tokens / self._rate if self._tokens < 0 else 0.0
+        if wait > 0:
+            self._sleep(wait)
+        return wait
+
+
+class RequestScheduler:
+    def __init__(
+        self,
+        writes_per_minute: int = DEFAULT_WRITES_PER_MINUTE,
+        write_burst: int = DEFAULT_WRITE_BURST,
+        max_retries: int = DEFAULT_MAX_RETRIES,
+        backoff_base: float = DEFAULT_BACKOFF_BASE,
+        backoff_max: float = DEFAULT_BACKOFF_MAX,
+        sleep: Callable[[float], None] = time.sleep,
+    ):
+        self._write_bucket = TokenBucket(rate=writes_per_minute / 60, capacity=write_burst, sleep=sleep)
+        self._max_retries = max_retries
+        self._backoff_base = backoff_base
+        self._backoff_max = backoff_max
+        self._sleep = sleep
+        self._requesters: List[Any] = []
+        self._lock = threading.Lock()
+        self.statistics = SchedulerStatistics()
+
+    def track(self, requester: Any) -> None:
+        """Follow the primary rate limit which PyGithub *Requester* records from the latest response headers."""
+        with self._lock:
+            self._requesters.append(requester)
+
+    def call(self, func: Callable[..., T], *args, write: bool = False, **kwargs) -> T:
+        attempt = 0
+        while True:
+            if write:
+                self._record_delay(self._write_bucket.acquire())
+            self._wait(self._primary_limit_delay())
+            with self._lock:
+                self.statistics.requests += 1
+            try:
+                return func(*args, **kwargs)
+            except GithubException as e:
+                if attempt >= self._max_retries or not self._is_retryable(e, write):
+                    raise
+                delay = self._retry_delay(e, attempt)
+                print(f"[DEBUG] Request got status {e.status}, retry it after {delay:.2f} seconds.")
+                with self._lock:
+                    self.statistics.retries += 1
+                self._wait(delay)
+                attempt += 1
+
+    def _is_retryable(self, e: GithubException, write: bool) -> bool:
+        if self._is_throttled(e):
+            return True
+        return not write and e.status in SERVER_ERROR_STATUS
+
+    def _is_throttled(self, e: GithubException) -> bool:
+        return isinstance(e, RateLimitExceededException) or e.status in THROTTLED_STATUS
+
+    def _retry_delay(self, e: GithubException, attempt: int) -> float:
+        headers = {k.lower(): v for k, v in (e.headers or {}).items()}
+        retry_after = headers.get("retry-after")
+        if retry_after is not None:
+            return float(retry_after)
+        if headers.get("x-ratelimit-remaining") == "0" and "x-ratelimit-reset" in headers:
+            return max(float(headers["x-ratelimit-reset"]) - time.time(), 0.0) + 1
+        if isinstance(e, RateLimitExceededException):
+            return DEFAULT_SECONDARY_LIMIT_WAIT
+        # Full jitter exponential backoff
+        return random.uniform(0, min(self._backoff_max, self._backoff_base * (2**attempt)))
+
+    def _primary_limit_delay(self) -> float:
+        delay = 0.0
+        for requester in self._requesters:
+            rate_limiting = getattr(requester, "rate_limiting", None)
+            reset_time = getattr(requester, "rate_limiting_resettime", None)
+            if not isinstance(rate_limiting, tuple) or not isinstance(reset_time, (int, float)):
+                continue
+            remaining, _ = rate_limiting
+            if remaining == 0:
+                delay = max(delay, reset_time - time.time() + 1)
+        return delay
+
+    def _wait(self, seconds: float) -> None:
+        if seconds <= 0:
+            return
+        self._record_delay(seconds)
+        self._sleep(seconds)
+
+    def _record_delay(self, seconds: float) -> None:
+        if seconds <= 0:
+            return
+        with self._lock:
+            self.statistics.delayed_requests += 1
+            self.statistics.delayed_seconds += seconds
@@ -0,0 +1,271 @@
+"""*Run GitHub-Label-Bot as a long-running server of GitHub webhooks*
+
+A one-shot run pays the startup, the configuration parsing and the listing of all labels every time. The server pays
+them once: it sweeps all repositories on start and then only on a slow schedule, and keeps the labels of every
+repository in memory in between. The *label* webhook events keep the state up to date and correct the drift of the
+affected repository right away, without listing its labels, and the *repository* events synchronize the repositories
+which are created, renamed, transferred or unarchived.
+
+All the synchronizations run one by one in a worker thread, the events of the same repository which arrive while it
+waits are handled once.
+"""
+
+import hashlib
+import hmac
+import json
+import queue
+import threading
+import types
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+from typing import Any, Dict, List, Optional, Set, Union
+
+from .github_action import GitHubAction
+from .metrics import recorder
+from .model import GitHubLabelManagementConfig
+from .process import StatefulSyncUpAsRemote
+from .runner import GitHubOperationRunner
+from .state import LabelStateStore
+
+# GitHub caps the payloads of webhooks at 25 MB
+MAX_PAYLOAD_SIZE = 25 * 1024 * 1024
+
+_REPOSITORY_SYNC_ACTIONS = ("created", "renamed", "transferred", "unarchived")
+_REPOSITORY_FORGET_ACTIONS = ("deleted", "archived", "renamed", "transferred")
+
+
+class _Sweep:
+    """Synchronize all repositories, it's queued with the repositories."""
+
+
+def verify_signature(secret: str, body: bytes, signature: Optional[str]) -> bool:
+    """Verify the *X-Hub-Signature-256* header of a webhook delivery."""
+    if not signature or not signature.startswith("sha256="):
+        return False
+    expected = hmac.new(secret.encode("utf-8"), body, hashlib.sha256).hexdigest()
+    return hmac.compare_digest(expected, signature[len("sha256=") :])
+
+
+class LabelBotServer:
+    def __init__(
+        self,
+        runner: GitHubOperationRunner,
+        action_inputs: GitHubAction,
+        state: Optional[LabelStateStore] = None,
+    ):
+        if not action_inputs.webhook_secret:
+            raise ValueError("It needs *WEBHOOK_SECRET* to verify the webhook deliveries.")
+        self._runner = runner
+        self._action_inputs = action_inputs
+        self._state = state or LabelStateStore()
+        # The fetcher keeps what it knows about the labels, e.g., the cached ETags, between the synchronizations
+        self._fetcher = runner.label_fetcher(action_inputs)
+        self._executor = runner.label_executor(action_inputs)
+        self._config: Optional[GitHubLabelManagementConfig] = None
+        self._repositories: Set[str] = set()
+
+        self._queue: "queue.Queue[Union[str, _Sweep, None]]" = queue.Queue()
+        self._pending: Set[str] = set()
+        self._lock = threading.Lock()
+        self._stopped = threading.Event()
+        self._threads: List[threading.Thread] = []
+        self._httpd: Optional[ThreadingHTTPServer] = None
+
+    @property
+    def address(self) -> str:
+        assert self._httpd, "The server isn't started."
+        host, port = self._httpd.server_address[:2]
+        return f"http://{host}:{port}"
+
+    def start(self) -> None:
+        self._httpd = _WebhookHTTPServer(
+            (self._action_inputs.webhook_host, self._action_inputs.webhook_port), _WebhookHandler, self
+        )
+        self._threads = [
+            threading.Thread(target=self._httpd.serve_forever, name="github-label-bot-webhook", daemon=True),
+            threading.Thread(target=self._work, name="github-label-bot-worker", daemon=True),
+            threading.Thread(target=self._schedule_sweeps, name="github-label-bot-sweep", daemon=True),
+        ]
+        for thread in self._threads:
+            thread.start()
+        print(f"[DEBUG] Serve GitHub webhooks at {self.address}.")
+
+    def serve_forever(self) -> None:
+        self.start()
+        try:
+            self._stopped.wait()
+        except KeyboardInterrupt:
+            pass
+        finally:
+            self.stop()
+
+    def stop(self) -> None:
+        self._stopped.set()
+        if self._httpd:
+            self._httpd.shutdown()
+            self._httpd.server_close()
+        self._queue.put(None)
+        for thread in self._threads:
+            thread.join()
+        self._threads = []
+        self._fetcher.flush()
+        self._executor.close()
+
+    def handle_event(self, event: str, payload: Dict[str, Any]) -> bool:
+        """Handle a webhook event, and return whether it leads to a synchronization."""
+        repository = (payload.get("repository") or {}).get("full_name")
+        if event not in ("label", "repository") or not repository:
+            return False
+        action = payload.get("action", "")
+        if event == "repository":
+            return self._handle_repository_event(action, payload)
+        if not self._is_managed(payload["repository"]):
+            return False
+        known = self._state.apply_event(repository, action, payload.get("label") or {}, payload.get("changes") or {})
+        if not known:
+            print(f"[DEBUG] Labels of {repository} aren't known yet, they'll be listed.")
+        return self._enqueue(repository)
+
+    def verify(self, body: bytes, signature: Optional[str]) -> bool:
+        return verify_signature(self._action_inputs.webhook_secret, body, signature)
+
+    def sweep(self) -> None:
+        self._queue.put(_Sweep())
+
+    def status(self) -> Dict[str, Any]:
+        with self._lock:
+            pending = len(self._pending)
+        return {"repositories": len(self._state), "pending": pending}
+
+    def _handle_repository_event(self, action: str, payload: Dict[str, Any]) -> bool:
+        repository = payload["repository"]["full_name"]
+        if action in _REPOSITORY_FORGET_ACTIONS:
+            self._state.forget(repository)
+            previous_name = ((payload.get("changes") or {}).get("repository") or {}).get("name", {}).get("from")
+            if previous_name:
+                self._state.forget(f"{repository.split('/')[0]}/{previous_name}")
+        if action not in _REPOSITORY_SYNC_ACTIONS or not self._is_managed(payload["repository"]):
+            return False
+        return self._enqueue(repository)
+
+    def _is_managed(self, repository: Dict[str, Any]) -> bool:
+        full_name = repository["full_name"]
+        if full_name in self._repositories:
+            return True
+        selector = self._config.organization if self._config else None
+        if not selector or full_name.split("/")[0].lower() != selector.name.lower():
+            return False
+        # The payload has the metadata which the selector checks
+        return selector.matches(
+            types.SimpleNamespace(
+                name=repository.get("name") or full_name.split("/")[1],
+                archived=repository.get("archived", False),
+                fork=repository.get("fork", False),
+                topics=repository.get("topics") or [],
+            )
+        )
+
+    def _enqueue(self, repository: str) -> bool:
+        with self._lock:
+            if repository not in self._pending:
+                self._pending.add(repository)
+                self._queue.put(repository)
+        return True
+
+    def _schedule_sweeps(self) -> None:
+        self.sweep()
+        while not self._stopped.wait(self._action_inputs.sweep_interval):
+            self.sweep()
+
+    def _work(self) -> None:
+        while True:
+            item = self._queue.get()
+            if item is None:
+                return
+            try:
+                if isinstance(item, _Sweep):
+                    self._sweep()
+                else:
+                    with self._lock:
+                        self._pending.discard(item)
+                    self._synchronize(item)
+            except Exception as e:
+                print(f"Failed to synchronize {'all repositories' if isinstance(item, _Sweep) else item}: {e}")
+
+    def _sweep(self) -> None:
+        print("[DEBUG] Sweep all repositories.")
+        self._config, repositories = self._runner.load_config(self._action_inputs)
+        self._repositories = set(repositories)
+        processor = StatefulSyncUpAsRemote(
+            self._state,
+            scheduler=self._runner.scheduler,
+            fetcher=self._fetcher,
+            executor=self._executor,
+            refresh=True,
+        )
+        try:
+            # It flushes the fetcher when all repositories have been processed
+            self._runner.operate_with_github(self._action_inputs, processor)
+        finally:
+            # Report the sweep and the events since the previous one, or the server would keep their spans forever
+            recorder().report(path=self._action_inputs.metrics_path)
+            recorder().reset()
+
+    def _synchronize(self, repository: str) -> None:
+        if self._config is None:
+            # The first sweep synchronizes it
+            return
+        processor = StatefulSyncUpAsRemote(
+            self._state,
+            scheduler=self._runner.scheduler,
+            fetcher=self._fetcher,
+            executor=self._executor,
+        )
+        plan = processor.process(self._runner.repository(repository), self._config)
+        print(f"[DEBUG] Synchronized {repository} with {len(plan.mutations)} label changes.")
+
+
+class _WebhookHTTPServer(ThreadingHTTPServer):
+    daemon_threads = True
+
+    def __init__(self, address, handler, bot: LabelBotServer):
+        super().__init__(address, handler)
+        self.bot = bot
+
+
+class _WebhookHandler(BaseHTTPRequestHandler):
+    server: _WebhookHTTPServer
+
+    def do_GET(self) -> None:
+        if self.path.rstrip("/") == "/healthz":
+            self._respond(200, self.server.bot.status())
+        else:
+            self._respond(404, {"message": "Not Found"})
+
+    def do_POST(self) -> None:
+        length = int(self.headers.get("Content-Length") or 0)
+        if length > MAX_PAYLOAD_SIZE:
+            self._respond(413, {"message": "Payload Too Large"})
+            return
+        body = self.rfile.read(length)
+        bot = self.server.bot
+        if not bot.verify(body, self.headers.get("X-Hub-Signature-256")):
+            self._respond(401, {"message": "Invalid signature"})
+            return
+        try:
+            payload = json.loads(body)
+        except ValueError:
+            self._respond(400, {"message": "Invalid payload"})
+            return
+        accepted = bot.handle_event(self.headers.get("X-GitHub-Event", ""), payload)
+        self._respond(202 if accepted else 200, {"accepted": accepted})
+
+    def log_message(self, format: str, *args: Any) -> None:
+        print(f"[DEBUG] Webhook {self.address_string()} {format % args}")
+
+    def _respond(self, status: int, body: Dict[str, Any]) -> None:
+        content = json.dumps(body).encode("utf-8")
+        self.send_response(status)
+        self.send_header("Content-Type", "application/json")
+        self.send_header("Content-Length", str(len(content)))
+        self.end_headers()
+        self.wfile.write(content)
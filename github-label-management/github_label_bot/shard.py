@@ -0,0 +1,91 @@
+"""*Split the repositories of a large sync into shards which run in parallel*
+
+A repository belongs to one shard by the hash of its name, so every job of a CI matrix computes the same shards
+without coordinating with the others, and a repository stays in its shard between runs. A shard could be split again,
+e.g., into the processes of one job, and the sub-shards are still shards of the same hash.
+
+Every shard reports its repositories, and the reports of all shards are merged into one.
+"""
+
+import hashlib
+import os
+from dataclasses import dataclass
+from typing import Any, Dict, List, Optional
+
+from .fingerprint import normalize_name
+
+
+@dataclass(frozen=True)
+class Shard:
+    """The shard *index* (from 0) of *count* shards, it's written as *i/N* with *i* from 1."""
+
+    index: int
+    count: int
+
+    def __post_init__(self):
+        if not 0 <= self.index < self.count:
+            raise ValueError(f"Shard should be *i/N* with 1 <= i <= N, but got {self.index + 1}/{self.count}.")
+
+    def __str__(self) -> str:
+        return f"{self.index + 1}/{self.count}"
+
+    @staticmethod
+    def parse(value: str) -> "Shard":
+        try:
+            index, count = (int(part) for part in value.split("/"))
+        except ValueError:
+            raise ValueError(f"Shard should be *i/N*, e.g., 1/4, but got '{value}'.")
+        return Shard(index=index - 1, count=count)
+
+    def owns(self, repository: str) -> bool:
+        return shard_index(repository, self.count) == self.index
+
+    def split(self, count: int) -> List["Shard"]:
+        """Split it into *count* shards, a repository of this shard belongs to exactly one of them."""
+        # The hash modulo count * N is congruent to the index of this shard modulo N.
+        return [Shard(index=self.index + i * self.count, count=self.count * count) for i in range(count)]
+
+    def path(self, path: str) -> str:
+        """The file of this shard, e.g., so that the processes on the same machine don't write the same file."""
+        root, extension = os.path.splitext(path)
+        return f"{root}.shard-{self.index + 1}-of-{self.count}{extension}"
+
+
+def shard_index(repository: str, count: int) -> int:
+    # GitHub compares repository names case-insensitively, and *hash* isn't stable between processes.
+    digest = hashlib.sha256(normalize_name(repository).encode("utf-8")).digest()
+    return int.from_bytes(digest[:8], "big") % count
+
+
+def merge_reports(reports: List[Dict[str, Any]], shards: Optional[List[Shard]] = None) -> Dict[str, Any]:
+    """Merge the reports of shards, all the *shards* must be reported exactly once.
+
+    The expected shards are all the shards of the reported count by default.
+    """
+    if not reports:
+        raise ValueError("There is no report to merge.")
+    if not all(report.get("shard") for report in reports):
+        raise ValueError("Only the reports of shards could be merged, but some reports have no *shard*.")
+    reported = [Shard.parse(report["shard"]) for report in reports]
+    if shards is None:
+        counts = {shard.count for shard in reported}
+        if len(counts) != 1:
+            raise ValueError(f"The reports should be of the same number of shards, but got {sorted(counts)}.")
+        count = counts.pop()
+        shards = [Shard(index=index, count=count) for index in range(count)]
+    duplicated = sorted({str(shard) for shard in reported if reported.count(shard) > 1})
+    missing = [str(shard) for shard in shards if shard not in reported]
+    unexpected = [str(shard) for shard in reported if shard not in shards]
+    if duplicated or missing or unexpected:
+        raise ValueError(
+            f"The reports don't cover the shards exactly once, duplicated: {duplicated or 'none'}, missing: "
+            f"{missing or 'none'}, unexpected: {unexpected or 'none'}."
+        )
+
+    repositories: List[Dict[str, Any]] = []
+    summary: Dict[str, int] = {}
+    for _, report in sorted(zip(reported, reports), key=lambda item: item[0].index):
+        repositories.extend(report.get("repositories") or [])
+        for key, value in (report.get("summary") or {}).items():
+            summary[key] = summary.get(key, 0) + value
+    return {"shards": len(reports), "repositories": repositories, "summary": summary}
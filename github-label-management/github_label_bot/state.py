@@ -0,0 +1,69 @@
+"""*Keep the labels of the repositories in memory for a long-running bot*
+
+The state of a repository is filled by listing its labels once, and then kept up to date by the label changes the bot
+applies and the label webhook events GitHub sends, so it could be compared with the configuration without listing the
+labels again. A repository is forgotten whenever its state may be wrong, e.g., after a change failed.
+"""
+
+import threading
+from typing import Any, Dict, Mapping, Optional
+
+from .enums import LabelChangeType
+from .fingerprint import normalize_name
+from .model import Label
+from .plan import LabelChangePlan
+
+
+class LabelStateStore:
+    def __init__(self):
+        self._lock = threading.Lock()
+        self._labels: Dict[str, Dict[str, Label]] = {}
+
+    def __len__(self) -> int:
+        with self._lock:
+            return len(self._labels)
+
+    def get(self, repository: str) -> Optional[Dict[str, Label]]:
+        with self._lock:
+            labels = self._labels.get(repository)
+            return dict(labels) if labels is not None else None
+
+    def replace(self, repository: str, labels: Mapping[str, Label]) -> None:
+        with self._lock:
+            self._labels[repository] = dict(labels)
+
+    def forget(self, repository: str) -> None:
+        with self._lock:
+            self._labels.pop(repository, None)
+
+    def apply_event(self, repository: str, action: str, label: Mapping[str, Any], changes: Mapping[str, Any]) -> bool:
+        """Apply a label webhook event, and return whether the state of the repository is known."""
+        with self._lock:
+            labels = self._labels.get(repository)
+            if labels is None:
+                return False
+            name = label["name"]
+            if action == "deleted":
+                _pop(labels, name)
+            elif action in ("created", "edited"):
+                previous_name = (changes.get("name") or {}).get("from")
+                _pop(labels, previous_name or name)
+                labels[name] = Label(color=label["color"], description=label.get("description"))
+            return True
+
+    def apply_plan(self, repository: str, plan: LabelChangePlan) -> None:
+        """Apply the changes which were applied to GitHub successfully."""
+        with self._lock:
+            labels = self._labels.get(repository)
+            if labels is None:
+                return
+            for change in plan.mutations:
+                _pop(labels, change.current_name or change.name)
+                if change.change_type is not LabelChangeType.Delete:
+                    labels[change.name] = change.label
+
+
+def _pop(labels: Dict[str, Label], name: str) -> None:
+    # The names on GitHub are case-insensitive
+    for existing_name in [n for n in labels if normalize_name(n) == normalize_name(name)]:
+        del labels[existing_name]
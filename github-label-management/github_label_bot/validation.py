@@ -0,0 +1,371 @@
+"""*Validate a label configuration without accessing GitHub API*
+
+The configuration is checked as YAML nodes instead of Python objects, so that every error is reported with the line
+of the file it's in, and all the errors are found in one pass instead of the first one only. The files it extends are
+validated as well.
+
+It checks what GitHub API or the loading of the configuration would reject later: unknown keys, wrong types, the
+colors which aren't 6 hex digits, the names longer than 50 characters and the descriptions longer than 100
+characters, and the label names which differ only in case (GitHub treats them as the same label).
+"""
+
+import os
+import re
+from dataclasses import dataclass
+from typing import Callable, Dict, List, Optional, Set, Tuple
+
+import yaml
+
+from .compose import resolve_extended_path
+from .fingerprint import normalize_name
+
+MAX_NAME_LENGTH = 50
+MAX_DESCRIPTION_LENGTH = 100
+
+_COLOR = re.compile(r"^#?[0-9a-fA-F]{6}$")
+
+# Which mapping of labels, e.g., ("labels",), ("label_sets", <name>) or ("overrides", <pattern>)
+_Scope = Tuple[str, ...]
+
+_STR = "tag:yaml.org,2002:str"
+_BOOL = "tag:yaml.org,2002:bool"
+_NULL = "tag:yaml.org,2002:null"
+_MERGE = "tag:yaml.org,2002:merge"
+
+
+@dataclass(frozen=True)
+class ConfigIssue:
+    path: str
+    line: int
+    column: int
+    message: str
+
+    def __str__(self) -> str:
+        return f"{self.path}:{self.line}:{self.column}: {self.message}"
+
+    def annotation(self, workspace: Optional[str] = None) -> str:
+        """The issue as a workflow command of GitHub Actions, which annotates the line in the pull request.
+
+        GitHub expects the path relative to the *workspace* which the repository is checked out to.
+        """
+        path = os.path.relpath(self.path, workspace) if workspace else self.path
+        return f"::error file={path},line={self.line},col={self.column}::{self.message}"
+
+
+def validate_config(path: str) -> List[ConfigIssue]:
+    """Validate the configuration and everything it extends, and return all the issues in the order of the files.
+
+    The issues of a file are in the order of their lines.
+    """
+    validator = _Validator()
+    validator.validate_file(os.path.abspath(path), [])
+    validator.check_label_sets()
+    validator.check_label_names()
+    # A mapping which is merged by *<<* in many places is checked every time
+    issues = list(dict.fromkeys(validator.issues))
+    files = {issue.path: index for index, issue in reversed(list(enumerate(issues)))}
+    return sorted(issues, key=lambda issue: (files[issue.path], issue.line, issue.column))
+
+
+class _Validator:
+    def __init__(self):
+        self.issues: List[ConfigIssue] = []
+        self._validated: Set[str] = set()
+        self._label_sets: Set[str] = set()
+        self._used_label_sets: List[Tuple[str, yaml.Node]] = []
+        # The label names of every mapping which is merged into the label sets of repositories, by the mapping
+        self._label_names: Dict[_Scope, List[Tuple[str, yaml.ScalarNode]]] = {}
+        self._default_label_sets: List[str] = []
+        self._override_label_sets: Dict[str, List[str]] = {}
+        self._path = ""
+
+    def validate_file(self, path: str, extending: List[str], extended_at: Optional[yaml.Node] = None) -> None:
+        """Validate the file, the errors of extending it are reported at *extended_at* in the file which extends it."""
+        if path in extending:
+            self._path = extending[-1]
+            self._report(extended_at, f"Configuration extends itself: {' -> '.join(extending + [path])}")
+            return
+        if path in self._validated:
+            return
+        self._validated.add(path)
+
+        if not os.path.exists(path):
+            if extended_at is None:
+                self._path = path
+                self._report_at(1, 1, "The configuration file doesn't exist.")
+            else:
+                self._path = extending[-1]
+                self._report(extended_at, f"The extended configuration {path} doesn't exist.")
+            return
+        self._path = path
+        try:
+            with open(path, "r", encoding="utf-8") as file_stream:
+                root = yaml.compose(file_stream, Loader=yaml.SafeLoader)
+        except yaml.MarkedYAMLError as e:
+            mark = e.problem_mark or e.context_mark
+            self._report_at(mark.line + 1 if mark else 1, mark.column + 1 if mark else 1, f"Invalid YAML: {e.problem}")
+            return
+        except yaml.YAMLError as e:
+            self._report_at(1, 1, f"Invalid YAML: {e}")
+            return
+        if root is None or _is_null(root):
+            return
+
+        extends = self._validate_config(root)
+        for base in extends:
+            try:
+                base_path = resolve_extended_path(path, base.value)
+            except ValueError as e:
+                self._path = path
+                self._report(base, str(e))
+                continue
+            self.validate_file(base_path, extending + [path], extended_at=base)
+
+    def check_label_sets(self) -> None:
+        # The label sets could be defined in any file of the configuration
+        for path, node in self._used_label_sets:
+            if node.value not in self._label_sets:
+                self._path = path
+                self._report(node, f"Label set '{node.value}' is used but not defined in *label_sets*.")
+
+    def check_label_names(self) -> None:
+        """Check the label names which differ only in case across all the mappings merged into the same label set.
+
+        The names in the same mapping are checked when it's validated.
+        """
+        default_scopes: List[_Scope] = [("label_sets", name) for name in self._default_label_sets] + [("labels",)]
+        groups = [default_scopes] + [
+            default_scopes + [("label_sets", name) for name in label_sets] + [("overrides", pattern)]
+            for pattern, label_sets in self._override_label_sets.items()
+        ]
+        reported: Set[Tuple[str, int, int]] = set()
+        for scopes in groups:
+            first_keys: Dict[str, Tuple[_Scope, str, yaml.ScalarNode]] = {}
+            for scope in dict.fromkeys(scopes):
+                for path, key in self._label_names.get(scope, []):
+                    first_scope, first_path, first_key = first_keys.setdefault(
+                        normalize_name(key.value), (scope, path, key)
+                    )
+                    position = (path, key.start_mark.line, key.start_mark.column)
+                    if first_key.value == key.value or (first_scope, first_path) == (scope, path):
+                        continue
+                    if position in reported:
+                        continue
+                    reported.add(position)
+                    at = f"line {first_key.start_mark.line + 1}"
+                    if first_path != path:
+                        at = f"{first_path}:{first_key.start_mark.line + 1}"
+                    self._path = path
+                    self._report(
+                        key,
+                        f"Label '{key.value}' differs from label '{first_key.value}' at {at} only in case, they're "
+                        "merged into the same labels and GitHub treats them as the same label.",
+                    )
+
+    def _validate_config(self, root: yaml.Node) -> List[yaml.ScalarNode]:
+        extends: List[yaml.ScalarNode] = []
+        fields: Dict[str, Callable[[yaml.Node], None]] = {
+            "extends": lambda node: extends.extend(self._strings(node, "extends", allow_single=True)),
+            "repositories": self._validate_repositories,
+            "delete_unused": lambda node: self._boolean(node, "delete_unused"),
+            "labels": lambda node: self._validate_labels(node, "labels", ("labels",)),
+            "organization": self._validate_organization,
+            "label_sets": self._validate_label_sets,
+            "default_label_sets": lambda node: self._default_label_sets.extend(
+                self._use_label_sets(node, "default_label_sets")
+            ),
+            "overrides": self._validate_overrides,
+        }
+        self._validate_fields(root, "the configuration", fields)
+        return extends
+
+    def _validate_repositories(self, node: yaml.Node) -> None:
+        for repository in self._strings(node, "repositories"):
+            if repository.value.count("/") != 1 or not all(repository.value.split("/")):
+                self._report(repository, f"Repository '{repository.value}' should be *owner/name*.")
+
+    def _validate_organization(self, node: yaml.Node) -> None:
+        fields: Dict[str, Callable[[yaml.Node], None]] = {
+            "name": lambda n: self._string(n, "organization.name"),
+            "topics": lambda n: self._strings(n, "organization.topics"),
+            "include": lambda n: self._strings(n, "organization.include"),
+            "exclude": lambda n: self._strings(n, "organization.exclude"),
+            "archived": lambda n: self._boolean(n, "organization.archived"),
+            "forks": lambda n: self._boolean(n, "organization.forks"),
+        }
+        self._validate_fields(node, "organization", fields, required=("name",))
+
+    def _validate_label_sets(self, node: yaml.Node) -> None:
+        for key, value in self._mapping(node, "label_sets"):
+            self._label_sets.add(key.value)
+            self._validate_labels(value, f"label set '{key.value}'", ("label_sets", key.value))
+
+    def _use_label_sets(self, node: yaml.Node, key: str) -> List[str]:
+        names = self._strings(node, key)
+        self._used_label_sets.extend((self._path, name) for name in names)
+        return [name.value for name in names]
+
+    def _validate_overrides(self, node: yaml.Node) -> None:
+        for key, value in self._mapping(node, "overrides"):
+            where = f"override '{key.value}'"
+            label_sets = self._override_label_sets.setdefault(key.value, [])
+            fields: Dict[str, Callable[[yaml.Node], None]] = {
+                "label_sets": lambda n: label_sets.extend(self._use_label_sets(n, f"{where}.label_sets")),
+                "labels": lambda n: self._validate_labels(n, f"{where}.labels", ("overrides", key.value)),
+                "delete_unused": lambda n: self._boolean(n, f"{where}.delete_unused"),
+            }
+            if not _is_null(value):
+                self._validate_fields(value, where, fields)
+
+    def _validate_labels(self, node: yaml.Node, where: str, scope: _Scope) -> None:
+        names: Dict[str, yaml.ScalarNode] = {}
+        for key, value in self._mapping(node, where):
+            self._label_names.setdefault(scope, []).append((self._path, key))
+            name = key.value
+            if key.tag != _STR:
+                self._report(key, f"The label name {name} is read as {key.tag.rsplit(':', 1)[-1]}, quote it.")
+            if not name.strip():
+                self._report(key, f"The label name in {where} cannot be empty.")
+            elif len(name) > MAX_NAME_LENGTH:
+                self._report(key, f"Label '{name}' is longer than {MAX_NAME_LENGTH} characters.")
+            duplicate = names.get(normalize_name(name))
+            if duplicate is not None and duplicate.value != name:
+                self._report(
+                    key,
+                    f"Label '{name}' differs from label '{duplicate.value}' at line {duplicate.start_mark.line + 1} "
+                    "only in case, GitHub treats them as the same label.",
+                )
+            names.setdefault(normalize_name(name), key)
+            self._validate_label(value, key)
+
+    def _validate_label(self, node: yaml.Node, key: yaml.ScalarNode) -> None:
+        name = key.value
+        fields: Dict[str, Callable[[yaml.Node], None]] = {
+            "color": lambda n: self._validate_color(n, name),
+            "description": lambda n: self._validate_description(n, name),
+            "previous_names": lambda n: self._validate_previous_names(n, name),
+            "aliases": lambda n: self._validate_previous_names(n, name),
+        }
+        self._validate_fields(node, f"label '{name}'", fields, required=("color",), required_at=key)
+
+    def _validate_color(self, node: yaml.Node, name: str) -> None:
+        if isinstance(node, yaml.ScalarNode) and node.tag != _STR and _COLOR.match(node.value):
+            # e.g., 000000 is read as the number 0
+            self._report(node, f"The color of label '{name}' is read as {node.tag.rsplit(':', 1)[-1]}, quote it.")
+            return
+        color = self._string(node, f"the color of label '{name}'")
+        if color is not None and not _COLOR.match(color.value):
+            self._report(color, f"The color '{color.value}' of label '{name}' should be 6 hex digits, e.g., d73a4a.")
+
+    def _validate_description(self, node: yaml.Node, name: str) -> None:
+        if _is_null(node):
+            return
+        description = self._string(node, f"the description of label '{name}'")
+        if description is not None and len(description.value) > MAX_DESCRIPTION_LENGTH:
+            self._report(
+                description, f"The description of label '{name}' is longer than {MAX_DESCRIPTION_LENGTH} characters."
+            )
+
+    def _validate_previous_names(self, node: yaml.Node, name: str) -> None:
+        for previous_name in self._strings(node, f"the previous names of label '{name}'", allow_single=True):
+            if not previous_name.value:
+                self._report(previous_name, f"The previous name of label '{name}' cannot be empty.")
+
+    def _validate_fields(
+        self,
+        node: yaml.Node,
+        where: str,
+        fields: Dict[str, Callable[[yaml.Node], None]],
+        required: Tuple[str, ...] = (),
+        required_at: Optional[yaml.Node] = None,
+    ) -> None:
+        if not isinstance(node, yaml.MappingNode):
+            self._report(node, f"{_capitalize(where)} should be a mapping.")
+            return
+        keys = set()
+        for key, value in self._mapping(node, where):
+            keys.add(key.value)
+            validate = fields.get(key.value)
+            if validate is None:
+                self._report(key, f"Unknown key '{key.value}' in {where}, expect one of {', '.join(fields)}.")
+            else:
+                validate(value)
+        for key in required:
+            if key not in keys:
+                self._report(required_at or node, f"{_capitalize(where)} misses the required key '{key}'.")
+
+    def _mapping(self, node: yaml.Node, where: str) -> List[Tuple[yaml.ScalarNode, yaml.Node]]:
+        """The items with string keys, and report the other keys and the keys which are defined more than once.
+
+        The items merged by the merge keys *<<* come first, unless a key of the mapping itself replaces them.
+        """
+        if _is_null(node):
+            return []
+        if not isinstance(node, yaml.MappingNode):
+            self._report(node, f"{_capitalize(where)} should be a mapping.")
+            return []
+        items = []
+        seen: Dict[str, yaml.ScalarNode] = {}
+        merged: Dict[str, Tuple[yaml.ScalarNode, yaml.Node]] = {}
+        for key, value in node.value:
+            if key.tag == _MERGE:
+                merged.update((item[0].value, item) for item in self._merged_items(value, where))
+                continue
+            if not isinstance(key, yaml.ScalarNode):
+                self._report(key, f"The keys of {where} should be strings.")
+                continue
+            if key.value in seen:
+                self._report(
+                    key,
+                    f"Key '{key.value}' is defined again in {where}, the one at line "
+                    f"{seen[key.value].start_mark.line + 1} is ignored.",
+                )
+            seen[key.value] = key
+            items.append((key, value))
+        return [item for name, item in merged.items() if name not in seen] + items
+
+    def _merged_items(self, node: yaml.Node, where: str) -> List[Tuple[yaml.ScalarNode, yaml.Node]]:
+        """The items a merge key merges, the earlier mapping of a list wins like the loading of YAML does."""
+        mappings = node.value if isinstance(node, yaml.SequenceNode) else [node]
+        items: List[Tuple[yaml.ScalarNode, yaml.Node]] = []
+        for mapping in reversed(mappings):
+            if isinstance(mapping, yaml.MappingNode):
+                items.extend(self._mapping(mapping, where))
+            else:
+                self._report(mapping, f"The merge key '<<' of {where} should merge a mapping or a list of mappings.")
+        return items
+
+    def _string(self, node: yaml.Node, where: str) -> Optional[yaml.ScalarNode]:
+        if isinstance(node, yaml.ScalarNode) and node.tag == _STR:
+            return node
+        self._report(node, f"{_capitalize(where)} should be a string.")
+        return None
+
+    def _strings(self, node: yaml.Node, where: str, allow_single: bool = False) -> List[yaml.ScalarNode]:
+        if _is_null(node):
+            return []
+        if allow_single and isinstance(node, yaml.ScalarNode):
+            string = self._string(node, where)
+            return [string] if string else []
+        if not isinstance(node, yaml.SequenceNode):
+            self._report(node, f"{_capitalize(where)} should be a list of strings.")
+            return []
+        return [string for string in (self._string(item, f"the item of {where}") for item in node.value) if string]
+
+    def _boolean(self, node: yaml.Node, where: str) -> None:
+        if not (isinstance(node, yaml.ScalarNode) and node.tag == _BOOL):
+            self._report(node, f"{_capitalize(where)} should be true or false.")
+
+    def _report(self, node: yaml.Node, message: str) -> None:
+        self._report_at(node.start_mark.line + 1, node.start_mark.column + 1, message)
+
+    def _report_at(self, line: int, column: int, message: str) -> None:
+        self.issues.append(ConfigIssue(path=self._path, line=line, column=column, message=message))
+
+
+def _is_null(node: yaml.Node) -> bool:
+    return isinstance(node, yaml.ScalarNode) and node.tag == _NULL
+
+
+def _capitalize(where: str) -> str:
+    return where[0].upper() + where[1:]
@@ -0,0 +1,70 @@
+"""*Benchmark how long the command line of GitHub-Label-Bot takes to start*
+
+Every case runs in a new interpreter with *-X importtime*, and the cumulative import time of the slowest modules is
+reported together with the wall time of the process, e.g.:
+
+    python scripts/benchmark_startup.py --repeat 5 --max-ms 100
+
+It exits with 1 if the median wall time of any case is over *--max-ms*.
+"""
+
+import argparse
+import os
+import re
+import statistics
+import subprocess
+import sys
+import time
+from typing import Dict, List, Tuple
+
+_PROJECT_DIR = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+
+_CASES: Dict[str, str] = {
+    "import": "import github_label_bot.manager",
+    "help": "import sys; sys.argv = ['sync-github-labels', '--help']; from github_label_bot.manager import run_bot; run_bot()",
+}
+
+_IMPORT_TIME = re.compile(r"^import time:\s+(\d+) \|\s+(\d+) \|(\s*)(\S+)$")
+
+
+def _run(code: str) -> Tuple[float, List[Tuple[int, str]]]:
+    start = time.perf_counter()
+    process = subprocess.run(
+        [sys.executable, "-X", "importtime", "-c", code],
+        cwd=_PROJECT_DIR,
+        capture_output=True,
+        text=True,
+        check=True,
+    )
+    wall_time = (time.perf_counter() - start) * 1000
+    # Only the top-level imports, their cumulative time includes everything they import
+    modules = []
+    for line in process.stderr.splitlines():
+        matched = _IMPORT_TIME.match(line)
+        if matched and len(matched.group(3)) == 1:
+            modules.append((int(matched.group(2)), matched.group(4)))
+    return wall_time, modules
+
+
+def main() -> int:
+    parser = argparse.ArgumentParser(description="Benchmark the startup time of GitHub-Label-Bot.")
+    parser.add_argument("--repeat", type=int, default=5, help="How many times every case runs. [default: 5]")
+    parser.add_argument("--top", type=int, default=10, help="How many of the slowest imports are listed. [default: 10]")
+    parser.add_argument("--max-ms", type=float, default=None, help="Fail if a case is slower than it. [default: none]")
+    args = parser.parse_args()
+
+    failed = False
+    for name, code in _CASES.items():
+        results = [_run(code) for _ in range(args.repeat)]
+        median = statistics.median(wall_time for wall_time, _ in results)
+        print(f"{name}: {median:.1f} ms (median of {args.repeat} runs)")
+        for cumulative, module in sorted(results[-1][1], reverse=True)[: args.top]:
+            print(f"  {cumulative / 1000:8.1f} ms  {module}")
+        if args.max_ms is not None and median > args.max_ms:
+            print(f"  slower than {args.max_ms} ms")
+            failed = True
+    return 1 if failed else 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -0,0 +1,285 @@
+"""*A local stand-in of the GitHub API for benchmarks*
+
+It serves the endpoints which GitHub-Label-Bot uses, i.e., the repositories of an organization, the labels of a
+repository (list, create, update and delete) and the GraphQL query of labels, from memory. The latency of every
+response, the page size and the throttled responses are configurable so that the benchmarks could reproduce the
+behaviors of the real API without network.
+"""
+
+import hashlib
+import json
+import re
+import threading
+import time
+import urllib.parse
+from collections import Counter
+from dataclasses import dataclass, field
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+from typing import Any, Dict, List, Optional, Tuple
+
+API_PREFIX = "/api/v3"
+GRAPHQL_PATH = "/api/graphql"
+
+_REPOSITORY_LABELS = re.compile(r"^/repos/(?P<repo>[^/]+/[^/]+)/labels$")
+_REPOSITORY_LABEL = re.compile(r"^/repos/(?P<repo>[^/]+/[^/]+)/labels/(?P<name>[^/]+)$")
+_REPOSITORY = re.compile(r"^/repos/(?P<repo>[^/]+/[^/]+)$")
+_ORGANIZATION_REPOSITORIES = re.compile(r"^/orgs/(?P<org>[^/]+)/repos$")
+_ORGANIZATION = re.compile(r"^/orgs/(?P<org>[^/]+)$")
+_GRAPHQL_FIRST = re.compile(r"labels\(first:\s*(\d+)\)")
+
+
+@dataclass
+class FakeGitHubState:
+    latency: float = 0.0
+    max_per_page: int = 100
+    # Answer every n-th request with *429 Too Many Requests*, 0 means never.
+    rate_limit_every: int = 0
+    retry_after: float = 0.0
+    repositories: Dict[str, Dict[str, Dict[str, Any]]] = field(default_factory=dict)
+    requests: Counter = field(default_factory=Counter)
+    throttled: int = 0
+    _lock: threading.Lock = field(default_factory=threading.Lock)
+
+    def add_repository(self, full_name: str, labels: Optional[Dict[str, Dict[str, Any]]] = None) -> None:
+        self.repositories[full_name] = {
+            name: {"name": name, "color": label["color"], "description": label.get("description")}
+            for name, label in (labels or {}).items()
+        }
+
+    @property
+    def request_count(self) -> int:
+        return sum(self.requests.values())
+
+    def count(self, method: str) -> bool:
+        """Record a request and return whether it should be throttled."""
+        with self._lock:
+            self.requests[method] += 1
+            if self.rate_limit_every and self.request_count % self.rate_limit_every == 0:
+                self.throttled += 1
+                return True
+            return False
+
+
+class _Handler(BaseHTTPRequestHandler):
+    # Keep the connections alive like GitHub does, so the benchmarks could tell whether the client reuses them.
+    protocol_version = "HTTP/1.1"
+    # The headers and the body are written separately, Nagle's algorithm would delay every response for an ACK.
+    disable_nagle_algorithm = True
+    server: "_Server"
+
+    def do_GET(self) -> None:
+        self._dispatch("GET")
+
+    def do_POST(self) -> None:
+        self._dispatch("POST")
+
+    def do_PATCH(self) -> None:
+        self._dispatch("PATCH")
+
+    def do_DELETE(self) -> None:
+        self._dispatch("DELETE")
+
+    def log_message(self, format: str, *args: Any) -> None:
+        pass
+
+    @property
+    def _state(self) -> FakeGitHubState:
+        return self.server.state
+
+    def _dispatch(self, method: str) -> None:
+        body = self._read_body()
+        if self._state.latency:
+            time.sleep(self._state.latency)
+        if self._state.count(method):
+            self._send(
+                429,
+                {"message": "You have exceeded a secondary rate limit."},
+                {"Retry-After": str(self._state.retry_after)},
+            )
+            return
+
+        url = urllib.parse.urlsplit(self.path)
+        query = dict(urllib.parse.parse_qsl(url.query))
+        if method == "POST" and url.path == GRAPHQL_PATH:
+            self._send(200, self._graphql(body))
+            return
+        if not url.path.startswith(API_PREFIX):
+            self._send(404, {"message": "Not Found"})
+            return
+        path = url.path[len(API_PREFIX) :]
+
+        matched = _REPOSITORY_LABELS.match(path)
+        if matched and method == "GET":
+            self._list_labels(matched["repo"], query)
+        elif matched and method == "POST":
+            self._create_label(matched["repo"], body)
+        elif _REPOSITORY_LABEL.match(path):
+            matched = _REPOSITORY_LABEL.match(path)
+            self._modify_label(method, matched["repo"], urllib.parse.unquote(matched["name"]), body)
+        elif _REPOSITORY.match(path) and method == "GET":
+            self._get_repository(_REPOSITORY.match(path)["repo"])
+        elif _ORGANIZATION_REPOSITORIES.match(path) and method == "GET":
+            self._list_organization_repositories(_ORGANIZATION_REPOSITORIES.match(path)["org"], query)
+        elif _ORGANIZATION.match(path) and method == "GET":
+            org = _ORGANIZATION.match(path)["org"]
+            self._send(200, {"login": org, "url": self._url(f"/orgs/{org}")})
+        else:
+            self._send(404, {"message": "Not Found"})
+
+    def _list_labels(self, repo: str, query: Dict[str, str]) -> None:
+        labels = self._state.repositories.get(repo)
+        if labels is None:
+            self._send(404, {"message": "Not Found"})
+            return
+        items = [self._label(repo, label) for label in list(labels.values())]
+        page, headers = self._paginate(items, query, f"/repos/{repo}/labels")
+        etag = '"' + hashlib.sha1(json.dumps(page, sort_keys=True).encode()).hexdigest() + '"'
+        headers["ETag"] = etag
+        if self.headers.get("If-None-Match") == etag:
+            self._send(304, None, headers)
+            return
+        self._send(200, page, headers)
+
+    def _create_label(self, repo: str, body: Dict[str, Any]) -> None:
+        labels = self._state.repositories.get(repo)
+        if labels is None:
+            self._send(404, {"message": "Not Found"})
+        elif body["name"] in labels:
+            self._send(422, {"message": "Validation Failed", "errors": [{"code": "already_exists"}]})
+        else:
+            labels[body["name"]] = {
+                "name": body["name"],
+                "color": body["color"],
+                "description": body.get("description"),
+            }
+            self._send(201, self._label(repo, labels[body["name"]]))
+
+    def _modify_label(self, method: str, repo: str, name: str, body: Dict[str, Any]) -> None:
+        labels = self._state.repositories.get(repo)
+        if labels is None or name not in labels:
+            self._send(404, {"message": "Not Found"})
+        elif method == "GET":
+            self._send(200, self._label(repo, labels[name]))
+        elif method == "PATCH":
+            label = labels.pop(name)
+            label.update({"name": body.get("new_name", name), "color": body.get("color", label["color"])})
+            if "description" in body:
+                label["description"] = body["description"]
+            labels[label["name"]] = label
+            self._send(200, self._label(repo, label))
+        elif method == "DELETE":
+            del labels[name]
+            self._send(204, None)
+        else:
+            self._send(405, {"message": "Method Not Allowed"})
+
+    def _get_repository(self, repo: str) -> None:
+        if repo not in self._state.repositories:
+            self._send(404, {"message": "Not Found"})
+            return
+        self._send(200, self._repository(repo))
+
+    def _list_organization_repositories(self, org: str, query: Dict[str, str]) -> None:
+        items = [self._repository(repo) for repo in self._state.repositories if repo.split("/", 1)[0] == org]
+        page, headers = self._paginate(items, query, f"/orgs/{org}/repos")
+        self._send(200, page, headers)
+
+    def _graphql(self, body: Dict[str, Any]) -> Dict[str, Any]:
+        variables = body.get("variables") or {}
+        matched = _GRAPHQL_FIRST.search(body.get("query", ""))
+        first = int(matched.group(1)) if matched else self._state.max_per_page
+        data: Dict[str, Any] = {}
+        errors: List[Dict[str, Any]] = []
+        index = 0
+        while f"owner{index}" in variables:
+            repo = f"{variables[f'owner{index}']}/{variables[f'name{index}']}"
+            labels = self._state.repositories.get(repo)
+            if labels is None:
+                # GitHub answers the other repositories of the query together with the error
+                data[f"r{index}"] = None
+                errors.append(
+                    {
+                        "type": "NOT_FOUND",
+                        "path": [f"r{index}"],
+                        "message": f"Could not resolve to a Repository with the name '{repo}'.",
+                    }
+                )
+            else:
+                nodes = [dict(label) for label in list(labels.values())]
+                data[f"r{index}"] = {
+                    "labels": {"pageInfo": {"hasNextPage": len(nodes) > first}, "nodes": nodes[:first]}
+                }
+            index += 1
+        return {"data": data, "errors": errors} if errors else {"data": data}
+
+    def _paginate(self, items: List[Any], query: Dict[str, str], path: str) -> Tuple[List[Any], Dict[str, str]]:
+        per_page = min(int(query.get("per_page", 30)), self._state.max_per_page)
+        page = int(query.get("page", 1))
+        headers = {}
+        if page * per_page < len(items):
+            headers["Link"] = f'<{self._url(path)}?per_page={per_page}&page={page + 1}>; rel="next"'
+        return items[(page - 1) * per_page : page * per_page], headers
+
+    def _label(self, repo: str, label: Dict[str, Any]) -> Dict[str, Any]:
+        quoted = urllib.parse.quote(label["name"], safe="")
+        return dict(label, url=self._url(f"/repos/{repo}/labels/{quoted}"), default=False)
+
+    def _repository(self, repo: str) -> Dict[str, Any]:
+        owner, name = repo.split("/", 1)
+        return {
+            "name": name,
+            "full_name": repo,
+            "owner": {"login": owner},
+            "url": self._url(f"/repos/{repo}"),
+            "archived": False,
+            "fork": False,
+            "topics": [],
+        }
+
+    def _url(self, path: str) -> str:
+        return f"http://{self.headers.get('Host')}{API_PREFIX}{path}"
+
+    def _read_body(self) -> Dict[str, Any]:
+        length = int(self.headers.get("Content-Length") or 0)
+        return json.loads(self.rfile.read(length)) if length else {}
+
+    def _send(self, status: int, data: Any, headers: Optional[Dict[str, str]] = None) -> None:
+        content = json.dumps(data).encode() if data is not None else b""
+        self.send_response(status)
+        self.send_header("Content-Type", "application/json; charset=utf-8")
+        self.send_header("Content-Length", str(len(content)))
+        self.send_header("X-RateLimit-Limit", "5000")
+        self.send_header("X-RateLimit-Remaining", "4999")
+        self.send_header("X-RateLimit-Reset", str(int(time.time()) + 3600))
+        for key, value in (headers or {}).items():
+            self.send_header(key, value)
+        self.end_headers()
+        self.wfile.write(content)
+
+
+class _Server(ThreadingHTTPServer):
+    daemon_threads = True
+
+    def __init__(self, state: FakeGitHubState):
+        super().__init__(("127.0.0.1", 0), _Handler)
+        self.state = state
+
+
+class FakeGitHubServer:
+    def __init__(self, state: Optional[FakeGitHubState] = None):
+        self.state = state or FakeGitHubState()
+        self._server = _Server(self.state)
+        self._thread = threading.Thread(target=self._server.serve_forever, daemon=True)
+
+    @property
+    def base_url(self) -> str:
+        host, port = self._server.server_address[:2]
+        return f"http://{host}:{port}{API_PREFIX}"
+
+    def __enter__(self) -> "FakeGitHubServer":
+        self._thread.start()
+        return self
+
+    def __exit__(self, *args: Any) -> None:
+        self._server.shutdown()
+        self._server.server_close()
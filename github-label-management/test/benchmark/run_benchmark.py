@@ -0,0 +1,185 @@
+"""*Benchmark the operations of GitHub-Label-Bot against the local fake GitHub API*
+
+Every scenario syncs N repositories with M labels and reports the wall time, the requests it sent and the peak memory
+of Python objects. Run it in the directory *github-label-management*:
+
+    python -m test.benchmark.run_benchmark --repositories 1,10,50 --labels 10,100 --output benchmark.jsonl
+
+The results are appended as JSON lines with the current commit, so the numbers could be compared commit by commit.
+"""
+
+import argparse
+import contextlib
+import io
+import json
+import os
+import subprocess
+import tempfile
+import time
+import tracemalloc
+from dataclasses import dataclass
+from typing import Dict, List, Optional, Type
+from unittest.mock import patch
+
+from github_label_bot._utils import YAML
+from github_label_bot.enums import FetchBackend, Operation
+from github_label_bot.github_action import GitHubAction
+from github_label_bot.process import BaseProcess, DownloadFromRemote, SyncUpAsRemote
+from github_label_bot.runner import GitHubOperationRunner
+from github_label_bot.scheduler import RequestScheduler
+
+from ._fake_github import FakeGitHubServer, FakeGitHubState
+
+ORGANIZATION = "benchmark"
+PROCESSES: Dict[Operation, Type[BaseProcess]] = {
+    Operation.Sync_UpStream: SyncUpAsRemote,
+    Operation.Sync_Download: DownloadFromRemote,
+}
+
+
+@dataclass
+class Scenario:
+    operation: Operation
+    repositories: int
+    labels: int
+    concurrency: int = 1
+    mutation_concurrency: int = 4
+    fetch_backend: FetchBackend = FetchBackend.REST
+    latency: float = 0.0
+    rate_limit_every: int = 0
+    # The pacing of writes for the real API would dominate the wall time, so it's loosened by default.
+    writes_per_minute: int = 60_000
+
+    @property
+    def name(self) -> str:
+        return f"{self.operation.value}-{self.repositories}x{self.labels}"
+
+
+def run_scenario(scenario: Scenario) -> Dict:
+    state = FakeGitHubState(latency=scenario.latency, rate_limit_every=scenario.rate_limit_every)
+    repositories = [f"{ORGANIZATION}/repository-{i}" for i in range(scenario.repositories)]
+    remote_labels = {f"label-{i}": {"color": "000000", "description": f"label {i}"} for i in range(scenario.labels)}
+    for repository in repositories:
+        state.add_repository(repository, remote_labels)
+
+    with FakeGitHubServer(state) as server, tempfile.TemporaryDirectory() as directory:
+        config_path = os.path.join(directory, "labels.yaml")
+        YAML().write(
+            path=config_path,
+            mode="w+",
+            config={"repositories": repositories, "labels": _desired_labels(scenario.labels)},
+        )
+        action_inputs = GitHubAction(
+            config_path=config_path,
+            operation=[scenario.operation],
+            concurrency=scenario.concurrency,
+            mutation_concurrency=scenario.mutation_concurrency,
+            fetch_backend=scenario.fetch_backend,
+        )
+        env = {"GITHUB_TOKEN": "benchmark", "GITHUB_API_URL": server.base_url}
+        runner = GitHubOperationRunner(
+            scheduler=RequestScheduler(writes_per_minute=scenario.writes_per_minute, write_burst=100)
+        )
+        processor = PROCESSES[scenario.operation](
+            scheduler=runner.scheduler,
+            fetcher=runner.label_fetcher(action_inputs),
+            executor=runner.label_executor(action_inputs),
+        )
+
+        tracemalloc.start()
+        start = time.perf_counter()
+        with patch.dict(os.environ, env), contextlib.redirect_stdout(io.StringIO()):
+            try:
+                results = runner.operate_with_github(action_inputs, processor)
+            finally:
+                runner.close()
+        seconds = time.perf_counter() - start
+        _, peak = tracemalloc.get_traced_memory()
+        tracemalloc.stop()
+
+    return {
+        "scenario": scenario.name,
+        "operation": scenario.operation.value,
+        "repositories": scenario.repositories,
+        "labels": scenario.labels,
+        "concurrency": scenario.concurrency,
+        "mutation_concurrency": scenario.mutation_concurrency,
+        "fetch_backend": scenario.fetch_backend.value,
+        "latency": scenario.latency,
+        "seconds": round(seconds, 4),
+        "requests": state.request_count,
+        "requests_by_method": dict(state.requests),
+        "throttled": state.throttled,
+        "peak_memory_kb": round(peak / 1024, 1),
+        "failures": sum(1 for result in results if not result.succeeded),
+    }
+
+
+def _desired_labels(count: int) -> Dict[str, Dict[str, str]]:
+    # Every tenth label changes its color and one more label is created, so the sync has a few mutations to do.
+    labels = {
+        f"label-{i}": {"color": "ffffff" if i % 10 == 0 else "000000", "description": f"label {i}"}
+        for i in range(count)
+    }
+    labels["label-new"] = {"color": "123456", "description": "new label"}
+    return labels
+
+
+def _commit() -> Optional[str]:
+    try:
+        return subprocess.run(["git", "rev-parse", "HEAD"], capture_output=True, text=True, check=True).stdout.strip()
+    except (OSError, subprocess.CalledProcessError):
+        return None
+
+
+def _integers(value: str) -> List[int]:
+    return [int(v) for v in value.split(",") if v]
+
+
+def main(argv: Optional[List[str]] = None) -> List[Dict]:
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--operations", default="sync_upstream,sync_download")
+    parser.add_argument("--repositories", type=_integers, default=[1, 10, 50])
+    parser.add_argument("--labels", type=_integers, default=[10, 100, 250])
+    parser.add_argument("--concurrency", type=int, default=1)
+    parser.add_argument("--mutation-concurrency", type=int, default=Scenario.mutation_concurrency)
+    parser.add_argument("--fetch-backend", default=FetchBackend.REST.value)
+    parser.add_argument("--latency", type=float, default=0.0, help="Seconds every fake response takes.")
+    parser.add_argument("--rate-limit-every", type=int, default=0, help="Throttle every n-th request with 429.")
+    parser.add_argument("--writes-per-minute", type=int, default=Scenario.writes_per_minute)
+    parser.add_argument("--output", help="Append the results into this file as JSON lines.")
+    args = parser.parse_args(argv)
+
+    commit = _commit()
+    results = []
+    print(f"{'scenario':<28}{'seconds':>10}{'requests':>10}{'peak (KB)':>12}{'failures':>10}")
+    for operation in args.operations.split(","):
+        for repositories in args.repositories:
+            for labels in args.labels:
+                scenario = Scenario(
+                    operation=Operation.to_enum(operation),
+                    repositories=repositories,
+                    labels=labels,
+                    concurrency=args.concurrency,
+                    mutation_concurrency=args.mutation_concurrency,
+                    fetch_backend=FetchBackend.to_enum(args.fetch_backend),
+                    latency=args.latency,
+                    rate_limit_every=args.rate_limit_every,
+                    writes_per_minute=args.writes_per_minute,
+                )
+                result = dict(run_scenario(scenario), commit=commit)
+                print(
+                    f"{result['scenario']:<28}{result['seconds']:>10.3f}{result['requests']:>10}"
+                    f"{result['peak_memory_kb']:>12}{result['failures']:>10}"
+                )
+                results.append(result)
+
+    if args.output:
+        with open(args.output, "a+", encoding="utf-8") as file_stream:
+            for result in results:
+                file_stream.write(json.dumps(result) + "\n")
+    return results
+
+
+if __name__ == "__main__":
+    main()
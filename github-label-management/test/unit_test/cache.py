@@ -0,0 +1,70 @@
+import json
+import os
+import time
+
+import pytest
+from github_label_bot.cache import LabelSnapshotCache, LabelSnapshotEntry
+
+_LABELS = [{"name": "Bug", "color": "d73a4a", "description": "Something went wrong.", "url": "https://api/bug"}]
+
+
+class TestLabelSnapshotEntry:
+
+    def test_serialize(self):
+        entry = LabelSnapshotEntry.serialize({"etag": '"abc"', "fetched_at": 1.5, "labels": _LABELS})
+        assert entry.etag == '"abc"'
+        assert entry.fetched_at == 1.5
+        assert LabelSnapshotEntry.serialize(entry.deserialize()) == entry
+
+    def test_invalid_serialize(self):
+        with pytest.raises(ValueError, match="cannot be empty"):
+            LabelSnapshotEntry.serialize({"labels": _LABELS})
+
+
+class TestLabelSnapshotCache:
+    @pytest.fixture(scope="function")
+    def cache_path(self, tmp_path) -> str:
+        return str(tmp_path / "cache" / "labels.json")
+
+    def test_put_and_get(self, cache_path: str):
+        cache = LabelSnapshotCache(cache_path)
+        assert cache.get("owner/repo") is None
+        cache.put("owner/repo", '"abc"', _LABELS)
+        entry = cache.get("owner/repo")
+        assert entry.etag == '"abc"'
+        assert entry.labels == _LABELS
+
+    def test_save_and_load(self, cache_path: str):
+        cache = LabelSnapshotCache(cache_path)
+        cache.put("owner/repo", '"abc"', _LABELS)
+        cache.save()
+
+        reloaded = LabelSnapshotCache(cache_path)
+        assert reloaded.get("owner/repo").labels == _LABELS
+
+    def test_invalidate(self, cache_path: str):
+        cache = LabelSnapshotCache(cache_path)
+        cache.put("owner/repo", '"abc"', _LABELS)
+        cache.invalidate("owner/repo")
+        cache.save()
+        assert LabelSnapshotCache(cache_path).get("owner/repo") is None
+
+    def test_evict_expired_entry(self, cache_path: str):
+        with open_path(cache_path) as file:
+            json.dump(
+                {"repositories": {"owner/old": {"etag": '"old"', "fetched_at": time.time() - 120, "labels": []}}},
+                file,
+            )
+        cache = LabelSnapshotCache(cache_path, max_age=60)
+        assert cache.get("owner/old") is None
+
+    def test_ignore_broken_file(self, cache_path: str):
+        with open_path(cache_path) as file:
+            file.write("{broken")
+        cache = LabelSnapshotCache(cache_path)
+        assert cache.get("owner/repo") is None
+
+
+def open_path(path: str):
+    os.makedirs(os.path.dirname(path), exist_ok=True)
+    return open(path, "w")
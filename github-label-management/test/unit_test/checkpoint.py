@@ -0,0 +1,88 @@
+from pathlib import Path
+
+import pytest
+from github_label_bot.checkpoint import CheckpointJournal
+from github_label_bot.enums import LabelChangeType
+from github_label_bot.model import Label, ResolvedLabelSet
+from github_label_bot.plan import LabelChange
+
+_BUG = Label(color="d73a4a", description="Something went wrong.")
+_FEATURE = Label(color="005cc5", description="New feature or improvement.")
+
+
+class TestCheckpointJournal:
+    @pytest.fixture(scope="function")
+    def path(self, tmp_path: Path) -> str:
+        return str(tmp_path / "checkpoint" / "journal.jsonl")
+
+    @pytest.fixture(scope="function")
+    def desired(self) -> ResolvedLabelSet:
+        return ResolvedLabelSet(labels={"Bug": _BUG, "Feature": _FEATURE}, delete_unused=True)
+
+    @pytest.fixture(scope="function")
+    def changes(self) -> list:
+        return [
+            LabelChange(change_type=LabelChangeType.Create, name="Bug", label=_BUG),
+            LabelChange(change_type=LabelChangeType.Update, name="Feature", label=_FEATURE, current=_BUG),
+            LabelChange(change_type=LabelChangeType.Delete, name="Old", current=_BUG),
+        ]
+
+    def test_resume(self, path: str, desired: ResolvedLabelSet, changes: list):
+        journal = CheckpointJournal(path)
+        journal.done("owner/done", desired)
+        journal.planned("owner/repo", desired, changes)
+        journal.applied("owner/repo", changes[1])
+        journal.close()
+
+        resumed = CheckpointJournal(path, resume=True)
+
+        assert resumed.is_done("owner/done", desired)
+        assert not resumed.is_done("owner/repo", desired)
+        assert resumed.remaining("owner/done", desired) is None
+        assert resumed.remaining("owner/repo", desired) == [changes[0], changes[2]]
+        assert resumed.remaining("owner/new", desired) is None
+
+    def test_resume_with_other_labels(self, path: str, desired: ResolvedLabelSet, changes: list):
+        journal = CheckpointJournal(path)
+        journal.done("owner/done", desired)
+        journal.planned("owner/repo", desired, changes)
+        journal.close()
+
+        resumed = CheckpointJournal(path, resume=True)
+
+        other = ResolvedLabelSet(labels={"Bug": _BUG}, delete_unused=True)
+        assert not resumed.is_done("owner/done", other)
+        assert resumed.remaining("owner/repo", other) is None
+        assert not resumed.is_done("owner/done", ResolvedLabelSet(labels=desired.labels, delete_unused=False))
+
+    def test_forget(self, path: str, desired: ResolvedLabelSet, changes: list):
+        journal = CheckpointJournal(path)
+        journal.planned("owner/repo", desired, changes)
+        journal.forget("owner/repo")
+        journal.close()
+
+        assert CheckpointJournal(path, resume=True).remaining("owner/repo", desired) is None
+
+    def test_ignore_broken_line(self, path: str, desired: ResolvedLabelSet, changes: list):
+        journal = CheckpointJournal(path)
+        journal.planned("owner/repo", desired, changes)
+        journal.close()
+        with open(path, "a", encoding="utf-8") as file_stream:
+            file_stream.write('{"repository": "owner/repo", "event": "app')
+
+        assert CheckpointJournal(path, resume=True).remaining("owner/repo", desired) == changes
+
+    def test_start_over_and_clear(self, path: str, desired: ResolvedLabelSet):
+        journal = CheckpointJournal(path)
+        journal.done("owner/repo", desired)
+        journal.close()
+
+        # It starts over if it doesn't resume
+        CheckpointJournal(path).close()
+        assert not CheckpointJournal(path, resume=True).is_done("owner/repo", desired)
+
+        journal = CheckpointJournal(path, resume=True)
+        journal.done("owner/repo", desired)
+        journal.clear()
+        journal.close()
+        assert Path(path).read_text() == ""
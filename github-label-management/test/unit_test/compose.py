@@ -0,0 +1,90 @@
+import subprocess
+from pathlib import Path
+
+import pytest
+import yaml
+from github_label_bot.compose import load_config_data, load_config_data_at_revision
+
+
+def _write(path: Path, data: dict) -> Path:
+    path.parent.mkdir(parents=True, exist_ok=True)
+    path.write_text(yaml.dump(data))
+    return path
+
+
+class TestLoadConfigData:
+
+    def test_load_without_extends(self, tmp_path: Path):
+        path = _write(tmp_path / "labels.yaml", {"repositories": ["owner/repo"], "labels": {}})
+        data, sources = load_config_data(str(path))
+        assert data == {"repositories": ["owner/repo"], "labels": {}}
+        assert sources == [str(path)]
+
+    def test_load_with_extends(self, tmp_path: Path):
+        base = _write(
+            tmp_path / "shared" / "base.yaml",
+            {
+                "delete_unused": True,
+                "labels": {"Bug": {"color": "d73a4a", "description": "bug"}},
+                "label_sets": {"frontend": {"UI": {"color": "000000", "description": "ui"}}},
+                "overrides": {"owner/web": {"label_sets": ["frontend"]}},
+            },
+        )
+        team = _write(
+            tmp_path / "shared" / "team.yaml",
+            {"extends": "base.yaml", "labels": {"Team": {"color": "111111", "description": "team"}}},
+        )
+        path = _write(
+            tmp_path / "labels.yaml",
+            {
+                "extends": ["shared/team.yaml", base.as_uri()],
+                "repositories": ["owner/web"],
+                "labels": {"Bug": {"color": "ffffff", "description": "bug"}},
+                "label_sets": {"frontend": {"CSS": {"color": "222222", "description": "css"}}},
+            },
+        )
+
+        data, sources = load_config_data(str(path))
+
+        assert sources == [str(path), str(team), str(base)]
+        assert data["repositories"] == ["owner/web"]
+        assert data["delete_unused"] is True
+        assert data["labels"] == {
+            "Bug": {"color": "ffffff", "description": "bug"},
+            "Team": {"color": "111111", "description": "team"},
+        }
+        assert set(data["label_sets"]["frontend"]) == {"UI", "CSS"}
+        assert data["overrides"] == {"owner/web": {"label_sets": ["frontend"]}}
+        assert "extends" not in data
+
+    def test_load_with_cyclic_extends(self, tmp_path: Path):
+        _write(tmp_path / "a.yaml", {"extends": "b.yaml"})
+        path = _write(tmp_path / "b.yaml", {"extends": "a.yaml"})
+        with pytest.raises(ValueError, match="extends itself"):
+            load_config_data(str(path))
+
+    def test_load_with_remote_extends(self, tmp_path: Path):
+        path = _write(tmp_path / "labels.yaml", {"extends": "https://example.com/labels.yaml"})
+        with pytest.raises(ValueError, match="on disk"):
+            load_config_data(str(path))
+
+
+class TestLoadConfigDataAtRevision:
+    @staticmethod
+    def _git(cwd: Path, *args: str) -> None:
+        subprocess.run(["git", *args], cwd=cwd, check=True, capture_output=True)
+
+    def test_load_at_revision(self, tmp_path: Path):
+        self._git(tmp_path, "init", "-q")
+        base = _write(tmp_path / "shared" / "base.yaml", {"labels": {"Bug": {"color": "d73a4a", "description": "bug"}}})
+        path = _write(tmp_path / "config" / "labels.yaml", {"extends": "../shared/base.yaml", "repositories": ["o/r"]})
+        self._git(tmp_path, "add", ".")
+        self._git(tmp_path, "-c", "user.name=test", "-c", "user.email=test@example.com", "commit", "-q", "-m", "init")
+        _write(base, {"labels": {"Bug": {"color": "ffffff", "description": "bug"}}})
+
+        data = load_config_data_at_revision(str(path), "HEAD")
+
+        assert data == {"repositories": ["o/r"], "labels": {"Bug": {"color": "d73a4a", "description": "bug"}}}
+
+        with pytest.raises(FileNotFoundError):
+            load_config_data_at_revision(str(tmp_path / "config" / "new.yaml"), "HEAD")
@@ -0,0 +1,86 @@
+import os
+from pathlib import Path
+from unittest.mock import patch
+
+import pytest
+from github_label_bot._utils import YAML
+from github_label_bot.config_cache import CompiledConfigCache
+
+from ._values import SAMPLE_YAML
+
+
+class TestCompiledConfigCache:
+    @pytest.fixture(scope="function")
+    def config_path(self, tmp_path: Path) -> Path:
+        path = tmp_path / "labels.yaml"
+        path.write_text(SAMPLE_YAML)
+        return path
+
+    @pytest.fixture(scope="function")
+    def cache_path(self, tmp_path: Path) -> str:
+        return str(tmp_path / "cache" / "config.pickle")
+
+    def _load(self, cache_path: str, config_path: Path):
+        cache = CompiledConfigCache(cache_path)
+        with patch.object(YAML, "read", wraps=YAML().read) as mock_read:
+            config = cache.load(str(config_path))
+        return config, cache.hit, mock_read.call_count
+
+    @patch.dict(os.environ, {"GITHUB_REPOSITORY": "owner/repo"})
+    def test_load(self, config_path: Path, cache_path: str):
+        config, hit, parsed = self._load(cache_path, config_path)
+        assert (hit, parsed) == (False, 1)
+        assert config.labels["Bug"].color == "d73a4a"
+
+        cached_config, hit, parsed = self._load(cache_path, config_path)
+        assert (hit, parsed) == (True, 0)
+        assert cached_config == config
+
+    @patch.dict(os.environ, {"GITHUB_REPOSITORY": "owner/repo"})
+    def test_load_touched_file_with_same_content(self, config_path: Path, cache_path: str):
+        self._load(cache_path, config_path)
+        stat = config_path.stat()
+        os.utime(config_path, ns=(stat.st_atime_ns, stat.st_mtime_ns + 10**9))
+
+        _, hit, parsed = self._load(cache_path, config_path)
+        assert (hit, parsed) == (True, 0)
+
+    @patch.dict(os.environ, {"GITHUB_REPOSITORY": "owner/repo"})
+    def test_load_changed_file(self, config_path: Path, cache_path: str):
+        self._load(cache_path, config_path)
+        config_path.write_text(SAMPLE_YAML.replace("d73a4a", "ffffff"))
+
+        config, hit, parsed = self._load(cache_path, config_path)
+        assert (hit, parsed) == (False, 1)
+        assert config.labels["Bug"].color == "ffffff"
+
+    def test_load_with_other_github_repository(self, config_path: Path, cache_path: str):
+        with patch.dict(os.environ, {"GITHUB_REPOSITORY": "owner/repo"}):
+            self._load(cache_path, config_path)
+        with patch.dict(os.environ, {"GITHUB_REPOSITORY": "owner/other"}):
+            _, hit, _ = self._load(cache_path, config_path)
+        assert hit is False
+
+    @patch.dict(os.environ, {"GITHUB_REPOSITORY": "owner/repo"})
+    def test_load_with_broken_cache(self, config_path: Path, cache_path: str):
+        os.makedirs(os.path.dirname(cache_path))
+        Path(cache_path).write_bytes(b"not a pickle")
+
+        config, hit, _ = self._load(cache_path, config_path)
+        assert hit is False
+        assert "Bug" in config.labels
+        assert self._load(cache_path, config_path)[1] is True
+
+    @patch.dict(os.environ, {"GITHUB_REPOSITORY": "owner/repo"})
+    def test_load_with_changed_base(self, tmp_path: Path, cache_path: str):
+        base_path = tmp_path / "base.yaml"
+        base_path.write_text("labels:\n  Bug:\n    color: d73a4a\n    description: bug\n")
+        config_path = tmp_path / "labels.yaml"
+        config_path.write_text("extends: base.yaml\nrepositories:\n  - owner/repo\n")
+        self._load(cache_path, config_path)
+        assert self._load(cache_path, config_path)[1] is True
+
+        base_path.write_text("labels:\n  Bug:\n    color: ffffff\n    description: bug\n")
+        config, hit, _ = self._load(cache_path, config_path)
+        assert hit is False
+        assert config.labels["Bug"].color == "ffffff"
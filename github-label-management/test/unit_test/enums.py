@@ -1,5 +1,5 @@
 import pytest
-from github_label_bot.enums import Operation
+from github_label_bot.enums import ConflictPolicy, FetchBackend, Operation
 
 
 class TestOperation:
@@ -9,6 +9,10 @@ class TestOperation:
         [
             ("sync_upstream", Operation.Sync_UpStream),
             ("sync_download", Operation.Sync_Download),
+            ("sync_plan", Operation.Sync_Plan),
+            ("serve", Operation.Serve),
+            ("validate", Operation.Validate),
+            ("merge_reports", Operation.Merge_Reports),
         ],
     )
     def test_to_enum_valid_cases(self, input_value, expected_output):
@@ -25,3 +29,40 @@ class TestOperation:
     def test_to_enum_invalid_cases(self, input_value, expected_exception, match):
         with pytest.raises(expected_exception, match=match):
             Operation.to_enum(input_value)
+
+
+class TestFetchBackend:
+
+    @pytest.mark.parametrize(
+        "input_value, expected_output",
+        [
+            ("rest", FetchBackend.REST),
+            ("GraphQL", FetchBackend.GraphQL),
+        ],
+    )
+    def test_to_enum_valid_cases(self, input_value, expected_output):
+        assert FetchBackend.to_enum(input_value) == expected_output
+
+    @pytest.mark.parametrize("input_value", ["soap", "", None])
+    def test_to_enum_invalid_cases(self, input_value):
+        with pytest.raises(ValueError, match=r"invalid FetchBackend"):
+            FetchBackend.to_enum(input_value)
+
+
+class TestConflictPolicy:
+
+    @pytest.mark.parametrize(
+        "input_value, expected_output",
+        [
+            ("first_wins", ConflictPolicy.FirstWins),
+            ("Majority", ConflictPolicy.Majority),
+            ("report", ConflictPolicy.Report),
+        ],
+    )
+    def test_to_enum_valid_cases(self, input_value, expected_output):
+        assert ConflictPolicy.to_enum(input_value) == expected_output
+
+    @pytest.mark.parametrize("input_value", ["last_wins", "", None])
+    def test_to_enum_invalid_cases(self, input_value):
+        with pytest.raises(ValueError, match=r"invalid ConflictPolicy"):
+            ConflictPolicy.to_enum(input_value)
@@ -0,0 +1,163 @@
+import pytest
+from github import GithubException
+from github.Repository import Repository
+from github_label_bot.enums import LabelChangeType
+from github_label_bot.executor import LabelChangeError, LabelChangeExecutor
+from github_label_bot.metrics import recorder
+from github_label_bot.model import Label
+from github_label_bot.plan import LabelChange, LabelChangePlan
+from pytest_mock import MockFixture
+
+
+class TestLabelChangeExecutor:
+    @pytest.fixture(scope="function")
+    def executor(self) -> LabelChangeExecutor:
+        return LabelChangeExecutor()
+
+    def test_apply(self, executor: LabelChangeExecutor, mocker: MockFixture):
+        mock_repo = mocker.MagicMock(spec=Repository)
+        remote_labels = {"Bug": mocker.MagicMock(), "Old": mocker.MagicMock(), "Same": mocker.MagicMock()}
+        plan = LabelChangePlan(
+            changes=[
+                LabelChange(
+                    change_type=LabelChangeType.Create, name="New", label=Label(color="000000", description="new")
+                ),
+                LabelChange(
+                    change_type=LabelChangeType.Update, name="Bug", label=Label(color="ffffff", description="bug")
+                ),
+                LabelChange(change_type=LabelChangeType.Delete, name="Old"),
+                LabelChange(change_type=LabelChangeType.NoOp, name="Same"),
+            ]
+        )
+
+        executor.apply(mock_repo, plan, remote_labels)
+
+        mock_repo.create_label.assert_called_once_with(name="New", color="000000", description="new")
+        remote_labels["Bug"].edit.assert_called_once_with(name="Bug", color="ffffff", description="bug")
+        remote_labels["Old"].delete.assert_called_once()
+        remote_labels["Same"].edit.assert_not_called()
+        remote_labels["Same"].delete.assert_not_called()
+
+    def test_apply_rename(self, executor: LabelChangeExecutor, mocker: MockFixture):
+        mock_repo = mocker.MagicMock(spec=Repository)
+        remote_labels = {"Old": mocker.MagicMock()}
+        plan = LabelChangePlan(
+            changes=[
+                LabelChange(
+                    change_type=LabelChangeType.Update,
+                    name="New",
+                    label=Label(color="ffffff", description="new"),
+                    current_name="Old",
+                ),
+            ]
+        )
+
+        executor.apply(mock_repo, plan, remote_labels)
+
+        remote_labels["Old"].edit.assert_called_once_with(name="New", color="ffffff", description="new")
+        remote_labels["Old"].delete.assert_not_called()
+        mock_repo.create_label.assert_not_called()
+
+    def test_apply_in_parallel(self, mocker: MockFixture):
+        executor = LabelChangeExecutor(concurrency=3)
+        mock_repo = mocker.MagicMock(spec=Repository)
+        names = [f"label-{i}" for i in range(6)]
+        plan = LabelChangePlan(
+            changes=[
+                LabelChange(change_type=LabelChangeType.Create, name=name, label=Label(color="000000", description=""))
+                for name in names
+            ]
+        )
+
+        results = executor.apply(mock_repo, plan, {})
+        executor.close()
+
+        assert [result.change.name for result in results] == names
+        assert all(result.succeeded for result in results)
+        assert mock_repo.create_label.call_count == 6
+
+    def test_apply_in_parallel_count_requests(self, mocker: MockFixture):
+        executor = LabelChangeExecutor(concurrency=3)
+        mock_repo = mocker.MagicMock(spec=Repository, full_name="owner/repo")
+        # Every mutation sends one request
+        mock_repo.create_label.side_effect = lambda **kwargs: recorder().record_request(1)
+        plan = LabelChangePlan(
+            changes=[
+                LabelChange(
+                    change_type=LabelChangeType.Create, name=f"label-{i}", label=Label(color="000000", description="")
+                )
+                for i in range(8)
+            ]
+        )
+
+        recorder().reset()
+        try:
+            with recorder().span("repository", repository="owner/repo") as span:
+                executor.apply(mock_repo, plan, {})
+            executor.close()
+            assert span.requests == 8
+            assert [s.requests for s in recorder().spans if s.phase == "mutation"] == [1] * 8
+        finally:
+            recorder().reset()
+
+    def test_apply_collect_failures(self, executor: LabelChangeExecutor, mocker: MockFixture):
+        mock_repo = mocker.MagicMock(spec=Repository)
+        remote_labels = {"Bug": mocker.MagicMock(), "Old": mocker.MagicMock()}
+        remote_labels["Bug"].edit.side_effect = GithubException(422, {"message": "Validation Failed"}, {})
+        plan = LabelChangePlan(
+            changes=[
+                LabelChange(change_type=LabelChangeType.Update, name="Bug", label=Label(color="zzz", description="")),
+                LabelChange(change_type=LabelChangeType.Delete, name="Old"),
+            ]
+        )
+
+        results = executor.apply(mock_repo, plan, remote_labels)
+
+        assert [result.succeeded for result in results] == [False, True]
+        assert results[0].error.status == 422
+        remote_labels["Old"].delete.assert_called_once()
+        error = LabelChangeError("owner/repo", results)
+        assert "1 of 2 label changes of owner/repo failed" in str(error)
+        assert "update Bug" in str(error)
+
+    def test_apply_rebind_to_client_of_worker(self, mocker: MockFixture):
+        mock_client = mocker.MagicMock()
+        mock_repository = mocker.patch("github_label_bot.executor.Repository")
+        mock_label = mocker.patch("github_label_bot.executor.GitHubLabel")
+        executor = LabelChangeExecutor(concurrency=2, github_client=lambda: mock_client)
+        mock_repo = mocker.MagicMock(
+            spec=Repository, full_name="owner/repo", url="https://api.github.com/repos/owner/repo"
+        )
+        old_label = mocker.MagicMock(
+            color="000000", description="", url="https://api.github.com/repos/owner/repo/labels/Old"
+        )
+        old_label.name = "Old"
+        remote_labels = {"Old": old_label}
+        plan = LabelChangePlan(
+            changes=[
+                LabelChange(
+                    change_type=LabelChangeType.Create, name="New", label=Label(color="000000", description="")
+                ),
+                LabelChange(change_type=LabelChangeType.Delete, name="Old"),
+            ]
+        )
+
+        executor.apply(mock_repo, plan, remote_labels)
+        executor.close()
+
+        mock_repository.assert_called_once_with(
+            mock_client.requester,
+            {},
+            {"full_name": "owner/repo", "url": "https://api.github.com/repos/owner/repo"},
+            completed=False,
+        )
+        mock_repository.return_value.create_label.assert_called_once()
+        mock_label.assert_called_once_with(
+            mock_client.requester,
+            {},
+            {"name": "Old", "color": "000000", "description": "", "url": old_label.url},
+            completed=True,
+        )
+        mock_label.return_value.delete.assert_called_once()
+        mock_repo.create_label.assert_not_called()
+        remote_labels["Old"].delete.assert_not_called()
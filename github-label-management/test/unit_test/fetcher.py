@@ -0,0 +1,194 @@
+import json
+from typing import Any, Dict, List
+
+import pytest
+from github import GithubException
+from github.Repository import Repository
+from github_label_bot.cache import LabelSnapshotCache
+from github_label_bot.fetcher import ConditionalLabelFetcher, GraphQLLabelFetcher, RestLabelFetcher
+from github_label_bot.scheduler import RequestScheduler
+from pytest_mock import MockFixture
+
+_LABELS = [
+    {"name": "Bug", "color": "d73a4a", "description": "Something went wrong.", "url": "https://api/labels/Bug"},
+    {"name": "Feature", "color": "005cc5", "description": None, "url": "https://api/labels/Feature"},
+]
+
+
+@pytest.fixture
+def mock_github_repo(mocker: MockFixture):
+    mock_repo = mocker.MagicMock(spec=Repository)
+    mock_repo.full_name = "owner/repo"
+    mock_repo.url = "https://api.github.com/repos/owner/repo"
+    return mock_repo
+
+
+class TestRestLabelFetcher:
+
+    def test_fetch(self, mock_github_repo):
+        mock_github_repo.get_labels.return_value = iter(["label"])
+        assert RestLabelFetcher().fetch(mock_github_repo) == ["label"]
+
+
+class TestConditionalLabelFetcher:
+    @pytest.fixture(scope="function")
+    def cache(self, tmp_path) -> LabelSnapshotCache:
+        return LabelSnapshotCache(str(tmp_path / "labels.json"))
+
+    @pytest.fixture(scope="function")
+    def fetcher(self, cache: LabelSnapshotCache) -> ConditionalLabelFetcher:
+        return ConditionalLabelFetcher(cache)
+
+    @staticmethod
+    def _response(status: int, headers: Dict[str, Any], data: List[dict] = None) -> tuple:
+        return status, headers, json.dumps(data) if data is not None else ""
+
+    def test_fetch_and_cache(self, fetcher: ConditionalLabelFetcher, cache: LabelSnapshotCache, mock_github_repo):
+        mock_github_repo.requester.requestJson.return_value = self._response(200, {"etag": '"v1"'}, _LABELS)
+
+        labels = fetcher.fetch(mock_github_repo)
+
+        assert [(label.name, label.color, label.description) for label in labels] == [
+            ("Bug", "d73a4a", "Something went wrong."),
+            ("Feature", "005cc5", None),
+        ]
+        assert cache.get("owner/repo").etag == '"v1"'
+        assert fetcher.misses == 1
+        assert not fetcher.is_unchanged(mock_github_repo)
+
+    def test_fetch_not_modified(self, fetcher: ConditionalLabelFetcher, cache: LabelSnapshotCache, mock_github_repo):
+        cache.put("owner/repo", '"v1"', _LABELS)
+        mock_github_repo.requester.requestJson.return_value = self._response(304, {"etag": '"v1"'})
+
+        labels = fetcher.fetch(mock_github_repo)
+
+        assert [label.name for label in labels] == ["Bug", "Feature"]
+        request_headers = mock_github_repo.requester.requestJson.call_args[0][3]
+        assert request_headers == {"If-None-Match": '"v1"'}
+        assert fetcher.hits == 1
+        assert fetcher.is_unchanged(mock_github_repo)
+
+        fetcher.invalidate(mock_github_repo)
+        assert not fetcher.is_unchanged(mock_github_repo)
+
+    def test_fetch_multiple_pages_without_cache(
+        self, fetcher: ConditionalLabelFetcher, cache: LabelSnapshotCache, mock_github_repo
+    ):
+        mock_github_repo.requester.requestJson.side_effect = [
+            self._response(200, {"etag": '"p1"', "link": '<https://api/labels?page=2>; rel="next"'}, _LABELS[:1]),
+            self._response(200, {"etag": '"p2"'}, _LABELS[1:]),
+        ]
+
+        labels = fetcher.fetch(mock_github_repo)
+
+        assert [label.name for label in labels] == ["Bug", "Feature"]
+        assert mock_github_repo.requester.requestJson.call_args[0][1] == "https://api/labels?page=2"
+        assert cache.get("owner/repo") is None
+
+    def test_fetch_error(self, fetcher: ConditionalLabelFetcher, mock_github_repo):
+        mock_github_repo.requester.requestJson.return_value = self._response(404, {}, {"message": "Not Found"})
+        mock_github_repo.requester.createException.return_value = GithubException(404, {"message": "Not Found"}, {})
+        with pytest.raises(GithubException):
+            fetcher.fetch(mock_github_repo)
+
+    def test_invalidate(self, fetcher: ConditionalLabelFetcher, cache: LabelSnapshotCache, mock_github_repo):
+        cache.put("owner/repo", '"v1"', _LABELS)
+        fetcher.invalidate(mock_github_repo)
+        assert cache.get("owner/repo") is None
+
+
+class TestGraphQLLabelFetcher:
+    @pytest.fixture(scope="function")
+    def fallback(self, mocker: MockFixture):
+        return mocker.MagicMock()
+
+    @pytest.fixture(scope="function")
+    def fetcher(self, fallback) -> GraphQLLabelFetcher:
+        return GraphQLLabelFetcher(fallback=fallback, batch_size=2)
+
+    @staticmethod
+    def _node(labels: List[dict], has_next_page: bool = False) -> dict:
+        return {"labels": {"pageInfo": {"hasNextPage": has_next_page}, "nodes": labels}}
+
+    def test_prefetch_in_batches(self, fetcher: GraphQLLabelFetcher, mocker: MockFixture):
+        github = mocker.MagicMock()
+        github.requester.requestJsonAndCheck.side_effect = [
+            ({}, {"data": {"r0": self._node([]), "r1": self._node([])}}),
+            ({}, {"data": {"r0": self._node([])}}),
+        ]
+
+        fetcher.prefetch(github, ["owner/a", "owner/b", "owner/c"])
+
+        assert github.requester.requestJsonAndCheck.call_count == 2
+        verb, url = github.requester.requestJsonAndCheck.call_args_list[0][0]
+        assert (verb, url) == ("POST", github.requester.graphql_url)
+        query, variables = github.requester.requestJsonAndCheck.call_args_list[0][1]["input"].values()
+        assert "r0: repository(owner: $owner0, name: $name0)" in query
+        assert "r1: repository(owner: $owner1, name: $name1)" in query
+        assert variables == {"owner0": "owner", "name0": "a", "owner1": "owner", "name1": "b"}
+
+    def test_fetch_prefetched(self, fetcher: GraphQLLabelFetcher, fallback, mocker: MockFixture, mock_github_repo):
+        github = mocker.MagicMock()
+        labels = [{"name": "🪲 bug", "color": "d73a4a", "description": None}]
+        github.requester.requestJsonAndCheck.return_value = ({}, {"data": {"r0": self._node(labels)}})
+        fetcher.prefetch(github, ["owner/repo"])
+
+        fetched = fetcher.fetch(mock_github_repo)
+
+        assert [(label.name, label.color, label.description) for label in fetched] == [("🪲 bug", "d73a4a", None)]
+        assert fetched[0].url == "https://api.github.com/repos/owner/repo/labels/%F0%9F%AA%B2%20bug"
+        fallback.fetch.assert_not_called()
+
+    @pytest.mark.parametrize(
+        "graphql_result",
+        [
+            # The repository has more than one page of labels
+            ({}, {"data": {"r0": {"labels": {"pageInfo": {"hasNextPage": True}, "nodes": []}}}}),
+            # The repository cannot be found
+            ({}, {"data": {"r0": None}, "errors": [{"type": "NOT_FOUND", "path": ["r0"], "message": "Not found"}]}),
+            # The whole batch failed
+            GithubException(502, {"message": "Bad Gateway"}, {}),
+        ],
+    )
+    def test_fetch_fall_back(
+        self, fetcher: GraphQLLabelFetcher, fallback, mocker: MockFixture, mock_github_repo, graphql_result
+    ):
+        github = mocker.MagicMock()
+        if isinstance(graphql_result, Exception):
+            github.requester.requestJsonAndCheck.side_effect = graphql_result
+        else:
+            github.requester.requestJsonAndCheck.return_value = graphql_result
+        fetcher._scheduler = RequestScheduler(max_retries=0)
+        fetcher.prefetch(github, ["owner/repo"])
+
+        assert fetcher.fetch(mock_github_repo) is fallback.fetch.return_value
+        fallback.fetch.assert_called_once_with(mock_github_repo)
+
+    def test_prefetch_partial_data(self, fetcher: GraphQLLabelFetcher, fallback, mocker: MockFixture):
+        github = mocker.MagicMock()
+        error = {
+            "type": "NOT_FOUND",
+            "path": ["r0"],
+            "locations": [{"line": 1, "column": 80}],
+            "message": "Could not resolve to a Repository with the name 'owner/stale'.",
+        }
+        github.requester.requestJsonAndCheck.return_value = (
+            {},
+            {
+                "data": {"r0": None, "r1": self._node([{"name": "bug", "color": "d73a4a", "description": None}])},
+                "errors": [error],
+            },
+        )
+        fetcher.prefetch(github, ["owner/stale", "owner/repo"])
+
+        # Only the repository which cannot be found falls back
+        stale, repo = mocker.MagicMock(full_name="owner/stale"), mocker.MagicMock(full_name="owner/repo")
+        assert [label.name for label in fetcher.fetch(repo)] == ["bug"]
+        assert fetcher.fetch(stale) is fallback.fetch.return_value
+        fallback.fetch.assert_called_once_with(stale)
+
+    def test_invalidate_and_flush(self, fetcher: GraphQLLabelFetcher, fallback, mock_github_repo):
+        fetcher.invalidate(mock_github_repo)
+        fetcher.flush()
+        fallback.invalidate.assert_called_once_with(mock_github_repo)
+        fallback.flush.assert_called_once()
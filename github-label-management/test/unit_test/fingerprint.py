@@ -0,0 +1,52 @@
+import json
+from pathlib import Path
+
+from github_label_bot.fingerprint import FingerprintStore, label_fingerprint
+from github_label_bot.model import Label
+
+
+class TestLabelFingerprint:
+    def test_fingerprint_is_normalized(self):
+        labels = {
+            "Bug": Label(color="D73A4A", description=None),
+            "Feature": Label(color="005cc5", description="New feature."),
+        }
+        same_labels = {
+            "Feature": Label(color="#005CC5", description="New feature."),
+            "Bug": Label(color="d73a4a", description=""),
+        }
+        assert label_fingerprint(labels) == label_fingerprint(same_labels)
+
+    def test_fingerprint_of_different_labels(self):
+        labels = {"Bug": Label(color="d73a4a", description="Something went wrong.")}
+        assert label_fingerprint(labels) != label_fingerprint({"bug": labels["Bug"]})
+        assert label_fingerprint(labels) != label_fingerprint({"Bug": Label(color="d73a4a", description="Broken.")})
+        assert label_fingerprint(labels) != label_fingerprint({})
+
+
+class TestFingerprintStore:
+    def test_save_and_load(self, tmp_path: Path):
+        path = str(tmp_path / "state" / "fingerprints.json")
+        store = FingerprintStore(path)
+        store.put("owner/repo", "abc")
+        store.put("owner/other", "def")
+        store.invalidate("owner/other")
+        store.save()
+
+        reloaded = FingerprintStore(path)
+        assert reloaded.get("owner/repo") == "abc"
+        assert reloaded.get("owner/other") is None
+
+    def test_save_only_if_changed(self, tmp_path: Path):
+        path = tmp_path / "fingerprints.json"
+        store = FingerprintStore(str(path))
+        store.save()
+        assert not path.exists()
+
+    def test_ignore_broken_file(self, tmp_path: Path):
+        path = tmp_path / "fingerprints.json"
+        path.write_text("{broken")
+        assert FingerprintStore(str(path)).get("owner/repo") is None
+
+        path.write_text(json.dumps({"repositories": {"owner/repo": 1}}))
+        assert FingerprintStore(str(path)).get("owner/repo") is None
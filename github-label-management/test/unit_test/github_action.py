@@ -4,8 +4,9 @@ from typing import Dict, List
 from unittest.mock import patch
 
 import pytest
-from github_label_bot.enums import Operation
+from github_label_bot.enums import ConflictPolicy, Operation
 from github_label_bot.github_action import GitHubAction
+from github_label_bot.shard import Shard
 
 
 class TestGitHubAction:
@@ -32,3 +33,119 @@ class TestGitHubAction:
         with patch.dict(os.environ, os_env, clear=True):
             with pytest.raises(ValueError, match="Miss"):
                 GitHubAction.from_env()
+
+    @pytest.mark.parametrize(("concurrency", "expect_concurrency"), [(None, 1), ("1", 1), ("8", 8)])
+    def test_from_env_concurrency(self, concurrency: str, expect_concurrency: int):
+        mock_env = {"CONFIG_PATH": "./test-github-labels.yaml", "OPERATIONS": "sync_upstream"}
+        if concurrency is not None:
+            mock_env["CONCURRENCY"] = concurrency
+        with patch.dict(os.environ, mock_env, clear=True):
+            assert GitHubAction.from_env().concurrency == expect_concurrency
+
+    @pytest.mark.parametrize("concurrency", ["zero", "0", "-3"])
+    def test_from_env_invalid_concurrency(self, concurrency: str):
+        mock_env = {
+            "CONFIG_PATH": "./test-github-labels.yaml",
+            "OPERATIONS": "sync_upstream",
+            "CONCURRENCY": concurrency,
+        }
+        with patch.dict(os.environ, mock_env, clear=True):
+            with pytest.raises(ValueError, match="CONCURRENCY"):
+                GitHubAction.from_env()
+
+    def test_from_env_request_timeout(self):
+        mock_env = {"CONFIG_PATH": "./test-github-labels.yaml", "OPERATIONS": "sync_upstream", "REQUEST_TIMEOUT": "30"}
+        with patch.dict(os.environ, mock_env, clear=True):
+            assert GitHubAction.from_env().request_timeout == 30
+
+    def test_from_env_metrics_path(self):
+        mock_env = {
+            "CONFIG_PATH": "./test-github-labels.yaml",
+            "OPERATIONS": "sync_upstream",
+            "METRICS_PATH": "m.jsonl",
+        }
+        with patch.dict(os.environ, mock_env, clear=True):
+            assert GitHubAction.from_env().metrics_path == "m.jsonl"
+
+    def test_from_env_fingerprint_path(self):
+        mock_env = {"CONFIG_PATH": "./test-github-labels.yaml", "OPERATIONS": "sync_upstream"}
+        with patch.dict(os.environ, mock_env, clear=True):
+            assert GitHubAction.from_env().fingerprint_path is None
+        with patch.dict(os.environ, dict(mock_env, FINGERPRINT_PATH="fingerprints.json"), clear=True):
+            assert GitHubAction.from_env().fingerprint_path == "fingerprints.json"
+
+    def test_from_env_previous_config(self):
+        mock_env = {"CONFIG_PATH": "./test-github-labels.yaml", "OPERATIONS": "sync_upstream"}
+        with patch.dict(os.environ, mock_env, clear=True):
+            assert GitHubAction.from_env().previous_config is None
+        with patch.dict(os.environ, dict(mock_env, PREVIOUS_CONFIG="HEAD~1"), clear=True):
+            assert GitHubAction.from_env().previous_config == "HEAD~1"
+
+    def test_from_env_resume(self):
+        mock_env = {"CONFIG_PATH": "./test-github-labels.yaml", "OPERATIONS": "sync_upstream"}
+        with patch.dict(os.environ, mock_env, clear=True):
+            action_inputs = GitHubAction.from_env()
+            assert (action_inputs.checkpoint_path, action_inputs.resume) == (None, False)
+        with patch.dict(os.environ, dict(mock_env, CHECKPOINT_PATH="checkpoint.jsonl", RESUME="true"), clear=True):
+            action_inputs = GitHubAction.from_env()
+            assert (action_inputs.checkpoint_path, action_inputs.resume) == ("checkpoint.jsonl", True)
+        with patch.dict(os.environ, dict(mock_env, RESUME="sometimes"), clear=True):
+            with pytest.raises(ValueError, match="RESUME"):
+                GitHubAction.from_env()
+
+    def test_from_env_shard(self):
+        mock_env = {"CONFIG_PATH": "./test-github-labels.yaml", "OPERATIONS": "sync_upstream"}
+        with patch.dict(os.environ, mock_env, clear=True):
+            action_inputs = GitHubAction.from_env()
+            assert (action_inputs.shard, action_inputs.github_tokens, action_inputs.report_path) == (None, [], None)
+        shard_env = {"SHARD": "2/4", "GITHUB_TOKENS": "token1, token2,", "REPORT_PATH": "report.json"}
+        with patch.dict(os.environ, dict(mock_env, **shard_env), clear=True):
+            action_inputs = GitHubAction.from_env()
+            assert action_inputs.shard == Shard(index=1, count=4)
+            assert action_inputs.github_tokens == ["token1", "token2"]
+            assert action_inputs.report_path == "report.json"
+            assert "token1" not in repr(action_inputs)
+        with patch.dict(os.environ, dict(mock_env, SHARD="5/4"), clear=True):
+            with pytest.raises(ValueError):
+                GitHubAction.from_env()
+
+    def test_for_shard(self):
+        action_inputs = GitHubAction(
+            config_path="./test-github-labels.yaml",
+            operation=[Operation.Sync_UpStream],
+            github_tokens=["token1", "token2"],
+            report_path="report.json",
+            checkpoint_path="cache/checkpoint.jsonl",
+        )
+        shard_inputs = action_inputs.for_shard(Shard(index=1, count=2))
+        assert shard_inputs.shard == Shard(index=1, count=2)
+        assert (shard_inputs.github_tokens, shard_inputs.report_path, shard_inputs.fingerprint_path) == ([], None, None)
+        assert shard_inputs.checkpoint_path == "cache/checkpoint.shard-2-of-2.jsonl"
+
+    def test_from_env_webhook(self):
+        mock_env = {"CONFIG_PATH": "./test-github-labels.yaml", "OPERATIONS": "serve"}
+        with patch.dict(os.environ, mock_env, clear=True):
+            action_inputs = GitHubAction.from_env()
+            assert (action_inputs.webhook_host, action_inputs.webhook_port) == ("127.0.0.1", 8080)
+            assert (action_inputs.webhook_secret, action_inputs.sweep_interval) == (None, 21600)
+        webhook_env = {"WEBHOOK_HOST": "0.0.0.0", "WEBHOOK_PORT": "9000", "WEBHOOK_SECRET": "s", "SWEEP_INTERVAL": "60"}
+        with patch.dict(os.environ, dict(mock_env, **webhook_env), clear=True):
+            action_inputs = GitHubAction.from_env()
+            assert (action_inputs.webhook_host, action_inputs.webhook_port) == ("0.0.0.0", 9000)
+            assert (action_inputs.webhook_secret, action_inputs.sweep_interval) == ("s", 60)
+
+    def test_from_env_mutation_concurrency(self):
+        mock_env = {"CONFIG_PATH": "./test-github-labels.yaml", "OPERATIONS": "sync_upstream"}
+        with patch.dict(os.environ, mock_env, clear=True):
+            assert GitHubAction.from_env().mutation_concurrency == 4
+        with patch.dict(os.environ, dict(mock_env, MUTATION_CONCURRENCY="8"), clear=True):
+            assert GitHubAction.from_env().mutation_concurrency == 8
+
+    def test_from_env_conflict_policy(self):
+        mock_env = {
+            "CONFIG_PATH": "./test-github-labels.yaml",
+            "OPERATIONS": "sync_download",
+            "CONFLICT_POLICY": "report",
+        }
+        with patch.dict(os.environ, mock_env, clear=True):
+            assert GitHubAction.from_env().conflict_policy is ConflictPolicy.Report
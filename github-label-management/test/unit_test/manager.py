@@ -1,14 +1,22 @@
+import json
 import os
 import pathlib
+import subprocess
+import sys
 from collections import namedtuple
+from concurrent.futures import ThreadPoolExecutor
 from unittest.mock import MagicMock, Mock, patch
 
 import pytest
+from github import GithubException
 from github.Repository import Repository
 from github_label_bot.enums import Operation
 from github_label_bot.github_action import GitHubAction
 from github_label_bot.manager import GitHubLabelBot, run_bot
-from github_label_bot.runner import GitHubOperationRunner
+from github_label_bot.model import Label
+from github_label_bot.plan import compute_plan
+from github_label_bot.runner import GitHubOperationRunner, RepositoryResult
+from github_label_bot.shard import Shard
 from pytest_mock import MockFixture
 
 from ._values import SAMPLE_YAML
@@ -56,16 +64,17 @@ class TestGitHubLabelBot:
         monkeypatch.setenv("GITHUB_TOKEN", "mock_token")
 
         # Mock the GitHub client and repository
-        mock_github = mocker.patch("github_label_bot.runner.Github")
-        mock_repo = mock_github().get_repo.return_value
-        mock_download_labels = mocker.patch("github_label_bot.manager.DownloadFromRemote.process")
+        mocker.patch("github_label_bot.runner.Github")
+        mock_repository = mocker.patch("github_label_bot.runner.Repository")
+        mock_repo = mock_repository.return_value
+        mock_download_labels = mocker.patch("github_label_bot.process.DownloadFromRemote.process")
 
         # Call the function
         github_action_inputs.config_path = mock_yaml_file
         bot.download_from_remote_repo(github_action_inputs)
 
         # Assert that download_labels was called with the correct repository
-        mock_github().get_repo.assert_called()
+        mock_repository.assert_called()
         config_model = GitHubOperationRunner()._load_label_config(mock_yaml_file)
         config_model.config_path = github_action_inputs.config_path
         mock_download_labels.assert_called_once_with(mock_repo, config_model)
@@ -85,18 +94,52 @@ class TestGitHubLabelBot:
         monkeypatch.setenv("GITHUB_TOKEN", "mock_token")
 
         # Mock the GitHub client
-        mock_github = mocker.patch("github_label_bot.runner.Github")
-        mock_repo = mock_github().get_repo.return_value
+        mocker.patch("github_label_bot.runner.Github")
+        mock_repository = mocker.patch("github_label_bot.runner.Repository")
+        # The label changes are sent from the workers with the repository handles of their own clients
+        mocker.patch("github_label_bot.executor.Repository", new=mock_repository)
+        mock_repo = mock_repository.return_value
         mock_repo.get_labels.return_value = []
 
         # Call the function
         github_action_inputs.config_path = mock_yaml_file
         bot.sync_from_remote_repo(github_action_inputs)
 
-        # Assert that repository was fetched and labels were synced
-        mock_github().get_repo.assert_called()
+        # Assert that repository handle was built and labels were synced
+        mock_repository.assert_called()
         mock_repo.create_label.assert_called()
 
+    def test_plan_from_remote_repo(
+        self, bot: GitHubLabelBot, mocker: MockFixture, tmp_path, github_action_inputs: GitHubAction
+    ):
+        plan = compute_plan(
+            {"Bug": Label(color="ffffff", description="bug"), "New": Label(color="000000", description="new")},
+            {"Bug": Label(color="d73a4a", description="bug")},
+            delete_unused=False,
+        )
+        mocker.patch.object(
+            GitHubOperationRunner,
+            "operate_with_github",
+            return_value=[
+                RepositoryResult(repository="owner/repo1", plan=plan),
+                RepositoryResult(repository="owner/repo2", error=GithubException(404, "Not Found", None)),
+            ],
+        )
+        plan_path = tmp_path / "plan.json"
+        action_inputs = GitHubAction(
+            config_path=github_action_inputs.config_path,
+            operation=[Operation.Sync_Plan],
+            plan_path=str(plan_path),
+        )
+
+        report = bot.plan_from_remote_repo(action_inputs)
+
+        assert report["summary"] == {"create": 1, "update": 1, "delete": 0, "no-op": 0, "mutations": 2}
+        assert [r["repository"] for r in report["repositories"]] == ["owner/repo1", "owner/repo2"]
+        assert report["repositories"][1]["error"]
+        with open(plan_path, "r") as file:
+            assert json.load(file) == report
+
 
 ExpectBotCalls = namedtuple("ExpectBotCalls", ("syncup", "download"))
 
@@ -136,3 +179,163 @@ def test_run_bot(operations: str, expect_calls: ExpectBotCalls):
                     github_label_bot.download_from_remote_repo.assert_not_called()
     finally:
         os.remove(config)
+
+
+def test_run_bot_with_plan_operation():
+    github_label_bot = MagicMock()
+    with patch("github_label_bot.manager.GitHubLabelBot", return_value=github_label_bot):
+        with patch.dict(
+            os.environ, {"CONFIG_PATH": "./test-github-labels.yaml", "OPERATIONS": "sync_plan"}, clear=True
+        ):
+            run_bot()
+
+    github_label_bot.plan_from_remote_repo.assert_called_once()
+    github_label_bot.sync_from_remote_repo.assert_not_called()
+    github_label_bot.download_from_remote_repo.assert_not_called()
+
+
+def test_run_bot_with_serve_operation():
+    github_label_bot = MagicMock()
+    with patch("github_label_bot.manager.GitHubLabelBot", return_value=github_label_bot):
+        with patch.dict(os.environ, {"CONFIG_PATH": "./test-github-labels.yaml", "OPERATIONS": "serve"}, clear=True):
+            run_bot()
+
+    github_label_bot.serve.assert_called_once()
+    github_label_bot.sync_from_remote_repo.assert_not_called()
+
+
+def test_run_bot_with_help(capsys):
+    with patch.object(sys, "argv", ["sync-github-labels", "--help"]):
+        with patch("github_label_bot.manager.GitHubLabelBot") as github_label_bot:
+            run_bot()
+
+    github_label_bot.assert_not_called()
+    assert "OPERATIONS" in capsys.readouterr().out
+
+
+def test_import_without_github_and_yaml():
+    # The command line starts without importing the heavy dependencies
+    code = "import sys, github_label_bot.manager; print(sorted({'github', 'yaml'} & set(sys.modules)))"
+    output = subprocess.run([sys.executable, "-c", code], capture_output=True, text=True, check=True).stdout
+    assert output.strip() == "[]"
+
+
+def test_run_bot_with_validate_operation(tmp_path, capsys):
+    config_path = tmp_path / "labels.yaml"
+    config_path.write_text("repositories: [owner/repo]\nlabels:\n  Bug: {color: d73a4a}\n")
+    env = {"CONFIG_PATH": str(config_path), "OPERATIONS": "validate"}
+
+    # It needs neither the token nor GitHub API
+    with patch.dict(os.environ, env, clear=True):
+        with patch("github_label_bot.runner.GitHubOperationRunner") as runner:
+            run_bot()
+            runner.assert_not_called()
+
+    config_path.write_text("labels:\n  Bug: {color: red}\n")
+    with patch.dict(os.environ, dict(env, GITHUB_ACTIONS="true", GITHUB_WORKSPACE=str(tmp_path)), clear=True):
+        with pytest.raises(ValueError, match="has 1 issues"):
+            run_bot()
+    assert "::error file=labels.yaml,line=2,col=16::" in capsys.readouterr().out
+
+
+def test_sync_with_tokens_in_processes(tmp_path):
+    def _run_shard(operation, action_inputs, token):
+        assert (operation, action_inputs.github_tokens, action_inputs.report_path) == (
+            Operation.Sync_UpStream,
+            [],
+            None,
+        )
+        return {
+            "shard": str(action_inputs.shard),
+            "repositories": [{"repository": token, "error": None}],
+            "summary": {"create": 1},
+        }
+
+    action_inputs = GitHubAction(
+        config_path="./test-github-labels.yaml",
+        operation=[Operation.Sync_UpStream],
+        shard=Shard(index=1, count=2),
+        github_tokens=["token1", "token2"],
+        report_path=str(tmp_path / "report.json"),
+    )
+    with patch("github_label_bot.manager._run_shard", _run_shard):
+        # The processes are replaced with threads to run the patched function
+        with patch("concurrent.futures.ProcessPoolExecutor", lambda max_workers, mp_context: ThreadPoolExecutor()):
+            report = GitHubLabelBot().sync_from_remote_repo(action_inputs)
+
+    assert report["shard"] == "2/2"
+    assert [r["repository"] for r in report["repositories"]] == ["token1", "token2"]
+    assert report["summary"] == {"create": 2}
+    assert json.loads((tmp_path / "report.json").read_text()) == report
+
+
+def test_plan_with_single_token(tmp_path):
+    tokens = []
+
+    def _run_shard(operation, action_inputs, token):
+        tokens.append(token)
+        return {"shard": str(action_inputs.shard), "repositories": [], "summary": {"create": 1}}
+
+    action_inputs = GitHubAction(
+        config_path="./test-github-labels.yaml", operation=[Operation.Sync_Plan], github_tokens=["token1"]
+    )
+    with patch("github_label_bot.manager._run_shard", _run_shard):
+        with patch("concurrent.futures.ProcessPoolExecutor", lambda max_workers, mp_context: ThreadPoolExecutor()):
+            report = GitHubLabelBot().plan_from_remote_repo(action_inputs)
+
+    # The lone token is used instead of being ignored
+    assert tokens == ["token1"]
+    assert report == {"shards": 1, "repositories": [], "summary": {"create": 1}}
+
+
+def test_run_bot_with_merge_reports_operation(tmp_path):
+    for index in (1, 2):
+        report = {"shard": f"{index}/2", "repositories": [], "summary": {"create": index}}
+        (tmp_path / f"report-{index}.json").write_text(json.dumps(report))
+    env = {
+        "CONFIG_PATH": "./test-github-labels.yaml",
+        "OPERATIONS": "merge_reports",
+        "SHARD_REPORTS": str(tmp_path / "report-*.json"),
+        "REPORT_PATH": str(tmp_path / "report.json"),
+    }
+    with patch.dict(os.environ, env, clear=True):
+        run_bot()
+
+    assert json.loads((tmp_path / "report.json").read_text()) == {
+        "shards": 2,
+        "repositories": [],
+        "summary": {"create": 3},
+    }
+
+
+@pytest.mark.parametrize(
+    "composition",
+    [
+        "extends: [shared.yaml]\n",
+        "label_sets:\n  base:\n    Bug: {color: d73a4a}\ndefault_label_sets: [base]\n",
+        "overrides:\n  owner/*:\n    labels:\n      Bug: {color: d73a4a}\n",
+    ],
+)
+def test_download_with_composed_config(tmp_path, composition: str):
+    config_path = tmp_path / "labels.yaml"
+    config_path.write_text("repositories: [owner/repo]\n" + composition)
+    action_inputs = GitHubAction(config_path=str(config_path), operation=[Operation.Sync_Download])
+    bot = GitHubLabelBot()
+    bot._runner = MagicMock()
+
+    with pytest.raises(ValueError, match="would lose"):
+        bot.download_from_remote_repo(action_inputs)
+    bot._runner.operate_with_github.assert_not_called()
+    assert config_path.read_text() == "repositories: [owner/repo]\n" + composition
+
+
+@pytest.mark.parametrize(
+    "sharding",
+    [{"shard": Shard(index=0, count=2)}, {"github_tokens": ["token1"]}],
+)
+def test_download_with_shard(sharding: dict):
+    action_inputs = GitHubAction(
+        config_path="./test-github-labels.yaml", operation=[Operation.Sync_Download], **sharding
+    )
+    with pytest.raises(ValueError):
+        GitHubLabelBot().download_from_remote_repo(action_inputs)
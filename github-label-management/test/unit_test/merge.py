@@ -0,0 +1,80 @@
+from typing import Dict, List, Tuple
+
+import pytest
+from github_label_bot.enums import ConflictPolicy
+from github_label_bot.merge import merge_labels
+from github_label_bot.model import Label
+
+_RED = Label(color="d73a4a", description="Something went wrong.")
+_WHITE = Label(color="ffffff", description="Something went wrong.")
+_FEATURE = Label(color="005cc5", description="New feature or improvement.")
+
+_SNAPSHOTS: List[Tuple[str, Dict[str, Label]]] = [
+    ("owner/repo1", {"Bug": _WHITE, "Feature": _FEATURE}),
+    ("owner/repo2", {"Bug": _RED}),
+    ("owner/repo3", {"Bug": Label(color="D73A4A", description="Something went wrong.")}),
+]
+
+
+class TestMergeLabels:
+
+    @pytest.mark.parametrize(
+        ("policy", "expect_labels"),
+        [
+            (ConflictPolicy.FirstWins, {"Bug": _WHITE, "Feature": _FEATURE}),
+            (ConflictPolicy.Majority, {"Bug": _RED, "Feature": _FEATURE}),
+            (ConflictPolicy.Report, {"Feature": _FEATURE}),
+        ],
+    )
+    def test_merge_labels(self, policy: ConflictPolicy, expect_labels: Dict[str, Label]):
+        labels, conflicts = merge_labels(_SNAPSHOTS, policy)
+
+        assert labels == expect_labels
+        assert len(conflicts) == 1
+        assert conflicts[0].name == "Bug"
+        assert conflicts[0].variants == [
+            ("Bug", _WHITE, ["owner/repo1"]),
+            ("Bug", _RED, ["owner/repo2", "owner/repo3"]),
+        ]
+
+    def test_merge_labels_majority_tie(self):
+        labels, _ = merge_labels(
+            [("owner/repo1", {"Bug": _WHITE}), ("owner/repo2", {"Bug": _RED})], ConflictPolicy.Majority
+        )
+        assert labels == {"Bug": _WHITE}
+
+    def test_merge_labels_without_conflict(self):
+        labels, conflicts = merge_labels(
+            [("owner/repo1", {"Bug": _RED}), ("owner/repo2", {"Bug": _RED, "Feature": _FEATURE})],
+            ConflictPolicy.Report,
+        )
+        assert labels == {"Bug": _RED, "Feature": _FEATURE}
+        assert conflicts == []
+
+    @pytest.mark.parametrize(
+        ("policy", "expect_labels"),
+        [
+            (ConflictPolicy.FirstWins, {"Bug": _RED}),
+            (ConflictPolicy.Majority, {"bug": _RED}),
+            (ConflictPolicy.Report, {}),
+        ],
+    )
+    def test_merge_labels_different_in_case(self, policy: ConflictPolicy, expect_labels: Dict[str, Label]):
+        labels, conflicts = merge_labels(
+            [("owner/repo1", {"Bug": _RED}), ("owner/repo2", {"bug": _RED}), ("owner/repo3", {"bug": _RED})], policy
+        )
+
+        assert labels == expect_labels
+        assert len(conflicts) == 1
+        assert conflicts[0].name == "Bug"
+        assert conflicts[0].variants == [("Bug", _RED, ["owner/repo1"]), ("bug", _RED, ["owner/repo2", "owner/repo3"])]
+
+    def test_conflict_deserialize(self):
+        _, conflicts = merge_labels(_SNAPSHOTS[:2], ConflictPolicy.Report)
+        assert conflicts[0].deserialize() == {
+            "name": "Bug",
+            "variants": [
+                {"name": "Bug", "label": _WHITE.deserialize(), "repositories": ["owner/repo1"]},
+                {"name": "Bug", "label": _RED.deserialize(), "repositories": ["owner/repo2"]},
+            ],
+        }
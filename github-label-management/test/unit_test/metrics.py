@@ -0,0 +1,80 @@
+import json
+import logging
+import threading
+from pathlib import Path
+
+import pytest
+from github_label_bot.metrics import MetricsRecorder
+
+
+def _request_record(output: str) -> logging.LogRecord:
+    # The same arguments as the debug log of *github.Requester* for every response
+    args = ("GET", "https", "api.github.com", "/repos/a/b/labels", {}, None, 200, {}, output)
+    return logging.LogRecord(
+        "github.Requester", logging.DEBUG, __file__, 0, "%s %s://%s%s %s %s ==> %i %s %s", args, None
+    )
+
+
+class TestMetricsRecorder:
+    @pytest.fixture(scope="function")
+    def recorder(self) -> MetricsRecorder:
+        recorder = MetricsRecorder()
+        recorder.install()
+        yield recorder
+        recorder.uninstall()
+
+    def test_span(self, recorder: MetricsRecorder):
+        with recorder.span("repository", repository="a/b"):
+            with recorder.span("fetch", repository="a/b"):
+                recorder.record_request(10)
+            recorder.record_request(5)
+
+        fetch, repository = recorder.spans
+        assert (fetch.phase, fetch.requests, fetch.bytes) == ("fetch", 1, 10)
+        assert (repository.phase, repository.requests, repository.bytes) == ("repository", 2, 15)
+        assert repository.duration >= fetch.duration
+
+    def test_span_with_error(self, recorder: MetricsRecorder):
+        with pytest.raises(ValueError):
+            with recorder.span("mutation", label="Bug"):
+                raise ValueError("boom")
+        assert recorder.spans[0].error == "boom"
+
+    def test_span_across_threads(self, recorder: MetricsRecorder):
+        with recorder.span("operation", operation="SyncUpAsRemote", across_threads=True):
+            worker = threading.Thread(target=recorder.record_request, args=(3,))
+            worker.start()
+            worker.join()
+        assert recorder.spans[0].requests == 1
+        assert recorder.spans[0].bytes == 3
+
+    def test_count_from_log_records(self, recorder: MetricsRecorder):
+        with recorder.span("fetch"):
+            logging.getLogger("github.Requester").handle(_request_record("[]"))
+            logging.getLogger("urllib3.connectionpool").debug("Starting new HTTPS connection (%d): %s:%s", 1, "h", 443)
+            logging.getLogger("urllib3.connectionpool").debug("Resetting dropped connection: %s", "h")
+
+        assert recorder.spans[0].requests == 1
+        assert recorder.spans[0].bytes == 2
+        assert recorder.summary()["totals"] == {"requests": 1, "bytes": 2, "connections": 1}
+
+    def test_uninstall(self, recorder: MetricsRecorder):
+        recorder.uninstall()
+        logging.getLogger("urllib3.connectionpool").debug("Starting new HTTPS connection (%d): %s:%s", 1, "h", 443)
+        assert recorder.summary()["totals"]["connections"] == 0
+
+    def test_report(self, recorder: MetricsRecorder, tmp_path: Path, capsys):
+        with recorder.span("repository", repository="a/b"):
+            recorder.record_request(7)
+        path = tmp_path / "metrics.jsonl"
+
+        recorder.report(path=str(path))
+
+        assert "Slow repository: a/b" in capsys.readouterr().out
+        lines = [json.loads(line) for line in path.read_text().splitlines()]
+        assert len(lines) == 1
+        assert lines[0]["repository"] == "a/b"
+        assert lines[0]["requests"] == 1
+        summary = recorder.summary()
+        assert summary["phases"]["repository"]["count"] == 1
+        assert summary["phases"]["repository"]["requests"] == 1
@@ -2,10 +2,17 @@ import os
 import re
 from abc import ABCMeta, abstractmethod
 from typing import Any, Dict
-from unittest.mock import patch
+from unittest.mock import MagicMock, patch
 
 import pytest
-from github_label_bot.model import GitHubLabelManagementConfig, Label, _BaseConfig
+from github_label_bot.model import (
+    GitHubLabelManagementConfig,
+    Label,
+    LabelIndex,
+    OrganizationSelector,
+    RepositoryOverride,
+    _BaseConfig,
+)
 
 
 class _BaseConfigTestSuite(metaclass=ABCMeta):
@@ -77,6 +84,42 @@ class TestLabel(_BaseConfigTestSuite):
             Label.serialize(data)
         assert re.search(r"cannot be empty", str(exc_info.value), re.IGNORECASE)
 
+    def test_normalized(self):
+        label = Label(color="#D73A4A", description=None)
+        assert (label.color, label.description) == ("d73a4a", "")
+        assert label == Label(color="d73a4a", description="")
+        assert len({label, Label(color="d73a4a", description="")}) == 1
+
+    def test_immutable(self, model: Label):
+        with pytest.raises(AttributeError):
+            model.color = "ffffff"
+        assert not hasattr(model, "__dict__")
+
+    @pytest.mark.parametrize("key", ["previous_names", "aliases"])
+    def test_serialize_previous_names(self, key: str):
+        label = Label.serialize({"color": "d73a4a", "description": "bug", key: ["bug", "defect"]})
+        assert label.previous_names == ("bug", "defect")
+        assert label.deserialize()["previous_names"] == ["bug", "defect"]
+        # They aren't a part of the label on GitHub
+        assert label == Label(color="d73a4a", description="bug")
+
+    def test_serialize_invalid_previous_names(self):
+        with pytest.raises(ValueError, match="previous_names"):
+            Label.serialize({"color": "d73a4a", "description": "bug", "previous_names": ["bug", 1]})
+
+
+class TestLabelIndex:
+    def test_lookup_case_insensitively(self):
+        bug = Label(color="d73a4a", description="Something went wrong.")
+        index = LabelIndex({"Bug": bug})
+
+        assert index["bug"] is bug
+        assert "BUG" in index
+        assert "Feature" not in index
+        assert index.get("Feature") is None
+        assert index.name_of("bUG") == "Bug"
+        assert dict(index) == {"Bug": bug}
+
 
 class TestGitHubLabelManagementConfig(_BaseConfigTestSuite):
     @pytest.fixture(scope="function")
@@ -145,3 +188,120 @@ class TestGitHubLabelManagementConfig(_BaseConfigTestSuite):
         with pytest.raises(ValueError) as exc_info:
             Label.serialize(data)
         assert re.search(r"cannot be empty", str(exc_info.value), re.IGNORECASE)
+
+
+class TestOrganizationSelector(_BaseConfigTestSuite):
+    @pytest.fixture(scope="function")
+    def model(self) -> OrganizationSelector:
+        return OrganizationSelector(**self._test_data_for_serialize())
+
+    def _verify_deserialized_data(self, model: Dict[str, Any]) -> None:
+        assert model == self._test_data_for_serialize()
+
+    def _test_data_for_serialize(self) -> dict:
+        return {
+            "name": "Chisanan232",
+            "topics": ["python"],
+            "include": ["*-tool*"],
+            "exclude": ["*-archive"],
+            "archived": False,
+            "forks": False,
+        }
+
+    def _verify_serialized_data(self, model: OrganizationSelector) -> None:
+        assert model == OrganizationSelector(**self._test_data_for_serialize())
+
+    def test_invalid_serialize(self):
+        with pytest.raises(ValueError, match="cannot be empty"):
+            OrganizationSelector.serialize({"topics": ["python"]})
+
+    @pytest.mark.parametrize(
+        ("repo", "expect_match"),
+        [
+            ({"name": "just-tools", "topics": ["python"], "archived": False, "fork": False}, True),
+            ({"name": "just-tools", "topics": ["rust"], "archived": False, "fork": False}, False),
+            ({"name": "just-tools", "topics": ["python"], "archived": True, "fork": False}, False),
+            ({"name": "just-tools", "topics": ["python"], "archived": False, "fork": True}, False),
+            ({"name": "other", "topics": ["python"], "archived": False, "fork": False}, False),
+            ({"name": "old-tools-archive", "topics": ["python"], "archived": False, "fork": False}, False),
+        ],
+    )
+    def test_matches(self, model: OrganizationSelector, repo: dict, expect_match: bool):
+        mock_repo = MagicMock()
+        mock_repo.configure_mock(**repo)
+        assert model.matches(mock_repo) is expect_match
+
+    @patch.dict(os.environ, {}, clear=True)
+    def test_config_with_organization(self):
+        config = GitHubLabelManagementConfig.serialize({"organization": {"name": "Chisanan232"}, "labels": {}})
+        assert config.repositories == []
+        assert config.organization == OrganizationSelector(name="Chisanan232")
+        assert config.deserialize()["organization"]["name"] == "Chisanan232"
+
+
+class TestLabelComposition:
+    _BUG = Label(color="d73a4a", description="Something went wrong.")
+    _UI = Label(color="000000", description="User interface.")
+
+    @pytest.fixture(scope="function")
+    def config(self) -> GitHubLabelManagementConfig:
+        return GitHubLabelManagementConfig.serialize(
+            {
+                "repositories": ["owner/api", "owner/web", "owner/web-admin"],
+                "label_sets": {
+                    "base": {"Bug": self._BUG.deserialize()},
+                    "frontend": {"UI": self._UI.deserialize()},
+                },
+                "default_label_sets": ["base"],
+                "labels": {"Team": {"color": "111111", "description": "team"}},
+                "overrides": {
+                    "owner/web*": {"label_sets": ["frontend"]},
+                    "owner/web-admin": {
+                        "labels": {"Bug": {"color": "ffffff", "description": "bug"}},
+                        "delete_unused": True,
+                    },
+                },
+            }
+        )
+
+    def test_resolve(self, config: GitHubLabelManagementConfig):
+        api = config.resolve("owner/api")
+        assert api.labels == {"Bug": self._BUG, "Team": Label(color="111111", description="team")}
+        assert api.delete_unused is False
+
+        web = config.resolve("owner/web")
+        assert set(web.labels) == {"Bug", "Team", "UI"}
+
+        admin = config.resolve("owner/web-admin")
+        assert admin.labels["Bug"] == Label(color="ffffff", description="bug")
+        assert admin.labels["UI"] == self._UI
+        assert admin.delete_unused is True
+
+    def test_resolve_names_in_different_cases(self):
+        config = GitHubLabelManagementConfig(
+            repositories=["owner/web"],
+            labels={"Bug": self._BUG, "UI": self._UI},
+            label_sets={"frontend": {"ui": Label(color="000000", description="ui")}},
+            overrides={"owner/web": RepositoryOverride(label_sets=["frontend"], labels={"bug": self._BUG})},
+        )
+
+        # The later definition replaces the label whatever the case of its name is
+        assert config.resolve("owner/web").labels == {"bug": self._BUG, "ui": Label(color="000000", description="ui")}
+        assert config.resolve("owner/api").labels == {"Bug": self._BUG, "UI": self._UI}
+
+    def test_resolve_memoized(self, config: GitHubLabelManagementConfig):
+        assert config.resolve("owner/api") is config.resolve("owner/other")
+        assert config.resolve("owner/web") is config.resolve("owner/web-site")
+        assert config.resolve("owner/web") is not config.resolve("owner/api")
+
+    def test_deserialize(self, config: GitHubLabelManagementConfig):
+        data = config.deserialize()
+        assert GitHubLabelManagementConfig.serialize(data) == config
+        assert data["default_label_sets"] == ["base"]
+        assert data["overrides"]["owner/web-admin"]["delete_unused"] is True
+
+    def test_unknown_label_set(self):
+        with pytest.raises(ValueError, match="frontend"):
+            GitHubLabelManagementConfig.serialize(
+                {"repositories": ["owner/web"], "overrides": {"owner/web": {"label_sets": ["frontend"]}}}
+            )
@@ -0,0 +1,172 @@
+from typing import Dict, List
+
+import pytest
+from github_label_bot.enums import LabelChangeType
+from github_label_bot.model import Label
+from github_label_bot.plan import LabelChange, LabelChangePlan, changed_label_names, compute_plan
+
+_BUG = Label(color="d73a4a", description="Something went wrong.")
+_FEATURE = Label(color="005cc5", description="New feature or improvement.")
+
+
+class TestComputePlan:
+
+    @pytest.mark.parametrize(
+        ("desired", "existing", "delete_unused", "expect_changes"),
+        [
+            # Nothing changed
+            ({"Bug": _BUG}, {"Bug": _BUG}, True, [("Bug", LabelChangeType.NoOp)]),
+            # Create the new one
+            (
+                {"Bug": _BUG, "Feature": _FEATURE},
+                {"Bug": _BUG},
+                False,
+                [("Bug", LabelChangeType.NoOp), ("Feature", LabelChangeType.Create)],
+            ),
+            # Update the color or description
+            (
+                {"Bug": _BUG},
+                {"Bug": Label(color="ffffff", description=_BUG.description)},
+                False,
+                [("Bug", LabelChangeType.Update)],
+            ),
+            (
+                {"Bug": _BUG},
+                {"Bug": Label(color=_BUG.color, description="old")},
+                False,
+                [("Bug", LabelChangeType.Update)],
+            ),
+            # Delete the unused one only if it's required
+            (
+                {"Bug": _BUG},
+                {"Bug": _BUG, "Feature": _FEATURE},
+                True,
+                [("Bug", LabelChangeType.NoOp), ("Feature", LabelChangeType.Delete)],
+            ),
+            ({"Bug": _BUG}, {"Bug": _BUG, "Feature": _FEATURE}, False, [("Bug", LabelChangeType.NoOp)]),
+            # GitHub matches the names case-insensitively, so the label is renamed instead of created again
+            (
+                {"Bug": _BUG},
+                {"bug": _BUG, "Feature": _FEATURE},
+                True,
+                [("Bug", LabelChangeType.Update), ("Feature", LabelChangeType.Delete)],
+            ),
+            # Rename the label which only exists by its previous name, instead of creating and deleting it
+            (
+                {"Bug": Label(color=_BUG.color, description=_BUG.description, previous_names=("Defect", "bug?"))},
+                {"bug?": _BUG, "Feature": _FEATURE},
+                True,
+                [("Bug", LabelChangeType.Update), ("Feature", LabelChangeType.Delete)],
+            ),
+            # The previous name is still desired by itself
+            (
+                {
+                    "Bug": Label(color=_BUG.color, description=_BUG.description, previous_names=("Feature",)),
+                    "Feature": _FEATURE,
+                },
+                {"Feature": _FEATURE},
+                True,
+                [("Bug", LabelChangeType.Create), ("Feature", LabelChangeType.NoOp)],
+            ),
+            # GitHub keeps lowercase colors and no description as null
+            (
+                {"Bug": Label(color="D73A4A", description=""), "Feature": _FEATURE},
+                {"Bug": Label(color="d73a4a", description=None), "Feature": _FEATURE},
+                False,
+                [("Bug", LabelChangeType.NoOp), ("Feature", LabelChangeType.NoOp)],
+            ),
+        ],
+    )
+    def test_compute_plan(
+        self,
+        desired: Dict[str, Label],
+        existing: Dict[str, Label],
+        delete_unused: bool,
+        expect_changes: List[tuple],
+    ):
+        plan = compute_plan(desired, existing, delete_unused)
+        assert [(change.name, change.change_type) for change in plan.changes] == expect_changes
+
+    def test_compute_plan_rename(self):
+        desired = {"Bug": Label(color="ffffff", description="bug", previous_names=("Defect",))}
+        plan = compute_plan(desired, {"Defect": _BUG}, delete_unused=True)
+
+        assert [change.deserialize() for change in plan.mutations] == [
+            {
+                "type": "update",
+                "name": "Bug",
+                "label": desired["Bug"].deserialize(),
+                "current": _BUG.deserialize(),
+                "current_name": "Defect",
+            }
+        ]
+
+    def test_serialize_change(self):
+        change = LabelChange(
+            change_type=LabelChangeType.Update,
+            name="Bug",
+            label=_BUG,
+            current=_FEATURE,
+            current_name="Defect",
+        )
+        assert LabelChange.serialize(change.deserialize()) == change
+        create = LabelChange(change_type=LabelChangeType.Create, name="Feature", label=_FEATURE)
+        assert LabelChange.serialize(create.deserialize()) == create
+
+    def test_compute_plan_is_pure(self):
+        desired = {"Bug": _BUG}
+        existing = {"Feature": _FEATURE}
+        compute_plan(desired, existing, delete_unused=True)
+        assert desired == {"Bug": _BUG}
+        assert existing == {"Feature": _FEATURE}
+
+
+class TestChangedLabelNames:
+
+    @pytest.mark.parametrize(
+        ("delete_unused", "expect_names"),
+        [
+            (False, ["Bug", "Feature"]),
+            (True, ["Bug", "Feature", "Old"]),
+        ],
+    )
+    def test_changed_label_names(self, delete_unused: bool, expect_names: List[str]):
+        previous = {"Bug": _BUG, "Docs": _FEATURE, "Old": _FEATURE}
+        desired = {
+            "Bug": Label(color="ffffff", description=_BUG.description),
+            "Docs": Label(color=_FEATURE.color.upper(), description=_FEATURE.description),
+            "Feature": _FEATURE,
+        }
+        assert changed_label_names(previous, desired, delete_unused) == expect_names
+
+
+class TestLabelChangePlan:
+
+    @pytest.fixture(scope="function")
+    def plan(self) -> LabelChangePlan:
+        return LabelChangePlan(
+            changes=[
+                LabelChange(change_type=LabelChangeType.NoOp, name="Bug", label=_BUG, current=_BUG),
+                LabelChange(change_type=LabelChangeType.Create, name="Feature", label=_FEATURE),
+                LabelChange(change_type=LabelChangeType.Delete, name="Old", current=_FEATURE),
+            ]
+        )
+
+    def test_mutations(self, plan: LabelChangePlan):
+        assert [change.name for change in plan.mutations] == ["Feature", "Old"]
+        assert plan.is_empty is False
+
+    def test_is_empty(self):
+        assert LabelChangePlan().is_empty is True
+        assert LabelChangePlan(changes=[LabelChange(change_type=LabelChangeType.NoOp, name="Bug")]).is_empty is True
+
+    def test_deserialize(self, plan: LabelChangePlan):
+        data = plan.deserialize()
+        assert [change["name"] for change in data["changes"]] == ["Feature", "Old"]
+        assert data["changes"][0] == {
+            "type": "create",
+            "name": "Feature",
+            "label": _FEATURE.deserialize(),
+            "current": None,
+        }
+        assert data["summary"] == {"create": 1, "update": 0, "delete": 1, "no-op": 1}
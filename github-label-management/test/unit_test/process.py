@@ -1,10 +1,25 @@
-from unittest.mock import Mock
+from typing import List
+from unittest.mock import Mock, patch
 
 import pytest
+from github import GithubException, UnknownObjectException
 from github.Repository import Repository
+from github_label_bot._utils import YAML
+from github_label_bot.checkpoint import CheckpointJournal
+from github_label_bot.enums import ConflictPolicy, LabelChangeType
+from github_label_bot.executor import LabelChangeError
+from github_label_bot.fetcher import RestLabelFetcher
+from github_label_bot.fingerprint import FingerprintStore
 from github_label_bot.model import GitHubLabelManagementConfig
 from github_label_bot.model import Label as GitHubLabelBotLabel
-from github_label_bot.process import DownloadFromRemote, SyncUpAsRemote
+from github_label_bot.process import (
+    DownloadFromRemote,
+    IncrementalSyncUpAsRemote,
+    PlanAgainstRemote,
+    StatefulSyncUpAsRemote,
+    SyncUpAsRemote,
+)
+from github_label_bot.state import LabelStateStore
 from pytest_mock import MockFixture
 
 
@@ -68,6 +83,383 @@ class TestSyncUpAsRemote:
         # Assert that create_label was called for the new label
         mock_repo.create_label.assert_called_once_with(name="NewLabel", color="000000", description="A new label")
 
+    # Test sync_labels without any changes
+    def test_sync_labels_no_change(self, process: SyncUpAsRemote, mocker: MockFixture, mock_github_repo):
+        mock_repo = mock_github_repo
+
+        # Mock configuration which is same as the existing labels
+        label_config = GitHubLabelManagementConfig(
+            repositories=["mock/repository"],
+            labels={
+                "Bug": GitHubLabelBotLabel(color="d73a4a", description="A bug label"),
+            },
+            delete_unused=True,
+        )
+
+        # Call the function
+        process.process(mock_repo, label_config)
+
+        # Assert that it doesn't call any API to modify labels
+        mock_repo.create_label.assert_not_called()
+        mock_repo.get_labels.return_value[0].edit.assert_not_called()
+        mock_repo.get_labels.return_value[0].delete.assert_not_called()
+
+    def test_sync_labels_different_in_case(self, process: SyncUpAsRemote, mock_github_repo):
+        label_config = GitHubLabelManagementConfig(
+            repositories=["mock/repository"],
+            labels={"bug": GitHubLabelBotLabel(color="D73A4A", description="A bug label")},
+            delete_unused=True,
+        )
+
+        process.process(mock_github_repo, label_config)
+
+        # The existing label is renamed instead of creating a duplicate or deleting it
+        mock_github_repo.create_label.assert_not_called()
+        mock_github_repo.get_labels.return_value[0].delete.assert_not_called()
+        mock_github_repo.get_labels.return_value[0].edit.assert_called_once_with(
+            name="bug", color="d73a4a", description="A bug label"
+        )
+
+    def test_sync_labels_with_failed_changes(self, process: SyncUpAsRemote, mock_github_repo):
+        mock_github_repo.get_labels.return_value[0].edit.side_effect = GithubException(422, "Validation Failed", None)
+        label_config = GitHubLabelManagementConfig(
+            repositories=["mock/repository"],
+            labels={
+                "Bug": GitHubLabelBotLabel(color="ffffff", description="New description"),
+                "NewLabel": GitHubLabelBotLabel(color="000000", description="A new label"),
+            },
+            delete_unused=False,
+        )
+
+        with pytest.raises(LabelChangeError, match="1 of 2 label changes"):
+            process.process(mock_github_repo, label_config)
+
+        # The other changes are still applied
+        mock_github_repo.create_label.assert_called_once_with(
+            name="NewLabel", color="000000", description="A new label"
+        )
+
+    def test_sync_labels_with_fingerprints(self, mock_github_repo, tmp_path):
+        mock_github_repo.full_name = "mock/repository"
+        fingerprints = FingerprintStore(str(tmp_path / "fingerprints.json"))
+        fetcher = RestLabelFetcher()
+        process = SyncUpAsRemote(fetcher=fetcher, fingerprints=fingerprints)
+        label_config = GitHubLabelManagementConfig(
+            repositories=["mock/repository"],
+            labels={"Bug": GitHubLabelBotLabel(color="ffffff", description="New description")},
+            delete_unused=True,
+        )
+        desired = label_config.resolve("mock/repository")
+
+        process.process(mock_github_repo, label_config)
+        assert fingerprints.get("mock/repository") == desired.version
+
+        # The labels weren't modified since last sync, so they're not compared at all.
+        with patch.object(fetcher, "is_unchanged", return_value=True), patch(
+            "github_label_bot.process.compute_plan"
+        ) as mock_compute_plan:
+            plan = process.process(mock_github_repo, label_config)
+        mock_compute_plan.assert_not_called()
+        assert plan.is_empty
+        mock_github_repo.get_labels.return_value[0].edit.assert_called_once()
+
+        process.finish()
+        assert FingerprintStore(str(tmp_path / "fingerprints.json")).get("mock/repository") == desired.version
+
+    def test_sync_labels_with_fingerprints_and_delete_unused(self, mock_github_repo, tmp_path):
+        mock_github_repo.full_name = "mock/repository"
+        fingerprints = FingerprintStore(str(tmp_path / "fingerprints.json"))
+        fetcher = RestLabelFetcher()
+        labels = {"Feature": GitHubLabelBotLabel(color="005cc5", description="New feature")}
+        label_config = GitHubLabelManagementConfig(repositories=["mock/repository"], labels=labels)
+        mock_github_repo.create_label.return_value.name = "Feature"
+
+        SyncUpAsRemote(fetcher=fetcher, fingerprints=fingerprints).process(mock_github_repo, label_config)
+
+        # The same labels, but the unused label *Bug* should be deleted now, though the labels weren't modified.
+        label_config = GitHubLabelManagementConfig(repositories=["mock/repository"], labels=labels, delete_unused=True)
+        feature = mock_github_repo.create_label.return_value
+        feature.color, feature.description = "005cc5", "New feature"
+        mock_github_repo.get_labels.return_value = mock_github_repo.get_labels.return_value + [feature]
+        with patch.object(fetcher, "is_unchanged", return_value=True):
+            plan = SyncUpAsRemote(fetcher=fetcher, fingerprints=fingerprints).process(mock_github_repo, label_config)
+
+        assert plan.count(LabelChangeType.Delete) == 1
+        mock_github_repo.get_labels.return_value[0].delete.assert_called_once()
+
+    def test_sync_labels_with_failed_changes_forget_fingerprint(self, mock_github_repo, tmp_path):
+        mock_github_repo.full_name = "mock/repository"
+        mock_github_repo.get_labels.return_value[0].edit.side_effect = GithubException(422, "Validation Failed", None)
+        fingerprints = FingerprintStore(str(tmp_path / "fingerprints.json"))
+        fingerprints.put("mock/repository", "outdated")
+        label_config = GitHubLabelManagementConfig(
+            repositories=["mock/repository"],
+            labels={"Bug": GitHubLabelBotLabel(color="ffffff", description="New description")},
+            delete_unused=False,
+        )
+
+        with pytest.raises(LabelChangeError):
+            SyncUpAsRemote(fingerprints=fingerprints).process(mock_github_repo, label_config)
+        assert fingerprints.get("mock/repository") is None
+
+    def test_sync_labels_with_checkpoint(self, mock_github_repo, tmp_path):
+        mock_github_repo.full_name = "mock/repository"
+        mock_github_repo.url = "https://api.github.com/repos/mock/repository"
+        path = str(tmp_path / "checkpoint.jsonl")
+        label_config = GitHubLabelManagementConfig(
+            repositories=["mock/repository"],
+            labels={
+                "Bug": GitHubLabelBotLabel(color="ffffff", description="New description"),
+                "NewLabel": GitHubLabelBotLabel(color="000000", description="A new label"),
+            },
+            delete_unused=False,
+        )
+        desired = label_config.resolve("mock/repository")
+        plan = SyncUpAsRemote().process(mock_github_repo, label_config)
+        # The run was interrupted after creating the new label
+        journal = CheckpointJournal(path)
+        journal.planned("mock/repository", desired, plan.mutations)
+        journal.applied("mock/repository", plan.mutations[1])
+        journal.done("mock/done", label_config.resolve("mock/done"))
+        journal.close()
+        mock_github_repo.reset_mock()
+        mock_github_repo.requester.requestJsonAndCheck.return_value = ({}, {"name": "Bug", "color": "ffffff"})
+
+        process = SyncUpAsRemote(checkpoint=CheckpointJournal(path, resume=True))
+        done_repo = Mock(full_name="mock/done")
+        assert process.process(done_repo, label_config).is_empty
+        resumed_plan = process.process(mock_github_repo, label_config)
+
+        # Only the remaining change is applied to the label without listing labels again
+        done_repo.get_labels.assert_not_called()
+        mock_github_repo.get_labels.assert_not_called()
+        mock_github_repo.create_label.assert_not_called()
+        assert [change.name for change in resumed_plan.mutations] == ["Bug"]
+        verb, url = mock_github_repo.requester.requestJsonAndCheck.call_args[0]
+        assert (verb, url) == ("PATCH", "https://api.github.com/repos/mock/repository/labels/Bug")
+
+        # All repositories were synchronized, so the next run starts over
+        process.finish()
+        assert not CheckpointJournal(path, resume=True).is_done("mock/done", label_config.resolve("mock/done"))
+
+    def test_sync_labels_with_failed_changes_forget_checkpoint(self, mock_github_repo, tmp_path):
+        mock_github_repo.full_name = "mock/repository"
+        mock_github_repo.get_labels.return_value[0].edit.side_effect = GithubException(422, "Validation Failed", None)
+        path = str(tmp_path / "checkpoint.jsonl")
+        label_config = GitHubLabelManagementConfig(
+            repositories=["mock/repository"],
+            labels={"Bug": GitHubLabelBotLabel(color="ffffff", description="New description")},
+            delete_unused=False,
+        )
+
+        process = SyncUpAsRemote(checkpoint=CheckpointJournal(path))
+        with pytest.raises(LabelChangeError):
+            process.process(mock_github_repo, label_config)
+        process.finish()
+
+        # It's synchronized from the beginning next time
+        assert (
+            CheckpointJournal(path, resume=True).remaining("mock/repository", label_config.resolve("mock/repository"))
+            is None
+        )
+
+
+class TestIncrementalSyncUpAsRemote:
+    @pytest.fixture(scope="function")
+    def previous_config(self) -> GitHubLabelManagementConfig:
+        return GitHubLabelManagementConfig(
+            repositories=["mock/repository"],
+            labels={
+                "Bug": GitHubLabelBotLabel(color="d73a4a", description="A bug label"),
+                "Docs": GitHubLabelBotLabel(color="0075ca", description="Documentation"),
+                "Old": GitHubLabelBotLabel(color="cccccc", description="Old label"),
+            },
+            delete_unused=True,
+        )
+
+    @pytest.fixture
+    def mock_github_repo(self, mocker: MockFixture):
+        mock_repo = mocker.MagicMock(spec=Repository)
+        mock_repo.full_name = "mock/repository"
+        labels = {}
+        for name, color in (("Bug", "d73a4a"), ("Old", "cccccc")):
+            labels[name] = mocker.MagicMock()
+            labels[name].name = name
+            labels[name].color = color
+            labels[name].description = "A bug label" if name == "Bug" else "Old label"
+
+        def _get_label(name: str):
+            if name not in labels:
+                raise UnknownObjectException(404, {"message": "Not Found"}, None)
+            return labels[name]
+
+        mock_repo.get_label.side_effect = _get_label
+        return mock_repo
+
+    def test_sync_changed_labels(self, previous_config: GitHubLabelManagementConfig, mock_github_repo):
+        label_config = GitHubLabelManagementConfig(
+            repositories=["mock/repository"],
+            labels={
+                "Bug": GitHubLabelBotLabel(color="ffffff", description="A bug label"),
+                "Docs": GitHubLabelBotLabel(color="0075ca", description="Documentation"),
+                "NewLabel": GitHubLabelBotLabel(color="000000", description="A new label"),
+            },
+            delete_unused=True,
+        )
+
+        plan = IncrementalSyncUpAsRemote(previous_config).process(mock_github_repo, label_config)
+
+        # Only the changed labels are read, and the unchanged one isn't even read
+        mock_github_repo.get_labels.assert_not_called()
+        assert [c.args[0] for c in mock_github_repo.get_label.call_args_list] == ["Bug", "NewLabel", "Old"]
+        assert plan.deserialize()["summary"] == {"create": 1, "update": 1, "delete": 1, "no-op": 0}
+        mock_github_repo.get_label("Bug").edit.assert_called_once_with(
+            name="Bug", color="ffffff", description="A bug label"
+        )
+        mock_github_repo.create_label.assert_called_once_with(
+            name="NewLabel", color="000000", description="A new label"
+        )
+        mock_github_repo.get_label("Old").delete.assert_called_once()
+
+    def test_sync_renamed_label(self, previous_config: GitHubLabelManagementConfig, mock_github_repo):
+        label_config = GitHubLabelManagementConfig(
+            repositories=["mock/repository"],
+            labels={
+                "Bug": GitHubLabelBotLabel(color="d73a4a", description="A bug label"),
+                "Docs": GitHubLabelBotLabel(color="0075ca", description="Documentation"),
+                "Legacy": GitHubLabelBotLabel(color="cccccc", description="Old label", previous_names=("Old",)),
+            },
+            delete_unused=True,
+        )
+
+        plan = IncrementalSyncUpAsRemote(previous_config).process(mock_github_repo, label_config)
+
+        assert plan.deserialize()["summary"] == {"create": 0, "update": 1, "delete": 0, "no-op": 0}
+        mock_github_repo.get_label("Old").edit.assert_called_once_with(
+            name="Legacy", color="cccccc", description="Old label"
+        )
+        mock_github_repo.get_label("Old").delete.assert_not_called()
+        mock_github_repo.create_label.assert_not_called()
+
+    def test_sync_without_changed_labels(self, previous_config: GitHubLabelManagementConfig, mock_github_repo):
+        plan = IncrementalSyncUpAsRemote(previous_config).process(mock_github_repo, previous_config)
+        assert plan.is_empty
+        mock_github_repo.get_label.assert_not_called()
+        mock_github_repo.get_labels.assert_not_called()
+
+    @pytest.mark.parametrize(
+        ("repositories", "delete_unused"),
+        [
+            # A repository which wasn't managed before
+            (["mock/another"], True),
+            # Start deleting the labels which aren't in configuration
+            (["mock/repository"], False),
+        ],
+    )
+    def test_sync_all_labels(
+        self,
+        previous_config: GitHubLabelManagementConfig,
+        mock_github_repo,
+        repositories: List[str],
+        delete_unused: bool,
+    ):
+        previous_config.repositories = repositories
+        previous_config.delete_unused = delete_unused
+        mock_github_repo.get_labels.return_value = []
+
+        label_config = GitHubLabelManagementConfig(
+            repositories=["mock/repository"], labels=previous_config.labels, delete_unused=True
+        )
+
+        plan = IncrementalSyncUpAsRemote(previous_config).process(mock_github_repo, label_config)
+
+        mock_github_repo.get_labels.assert_called_once()
+        mock_github_repo.get_label.assert_not_called()
+        assert plan.count(LabelChangeType.Create) == 3
+
+
+class TestStatefulSyncUpAsRemote:
+    @pytest.fixture
+    def mock_github_repo(self, mocker: MockFixture):
+        mock_repo = mocker.MagicMock(spec=Repository)
+        mock_repo.full_name = "mock/repository"
+        mock_repo.url = "https://api.github.com/repos/mock/repository"
+        mock_label = mocker.MagicMock()
+        mock_label.name = "Bug"
+        mock_label.color = "d73a4a"
+        mock_label.description = "A bug label"
+        mock_repo.get_labels.return_value = [mock_label]
+        return mock_repo
+
+    def test_sync_labels_with_state(self, mock_github_repo):
+        label_config = GitHubLabelManagementConfig(
+            repositories=["mock/repository"],
+            labels={"Bug": GitHubLabelBotLabel(color="d73a4a", description="A bug label")},
+            delete_unused=False,
+        )
+        state = LabelStateStore()
+
+        # The labels are listed once to fill the state
+        assert StatefulSyncUpAsRemote(state).process(mock_github_repo, label_config).is_empty
+        assert state.get("mock/repository") == {"Bug": GitHubLabelBotLabel(color="d73a4a", description="A bug label")}
+        mock_github_repo.reset_mock()
+
+        # Someone changed the label on GitHub, and the webhook event updated the state
+        state.apply_event("mock/repository", "edited", {"name": "Bug", "color": "ffffff"}, {})
+        mock_github_repo.requester.requestJsonAndCheck.return_value = ({}, {"name": "Bug", "color": "d73a4a"})
+        plan = StatefulSyncUpAsRemote(state).process(mock_github_repo, label_config)
+
+        mock_github_repo.get_labels.assert_not_called()
+        assert [change.name for change in plan.mutations] == ["Bug"]
+        verb, url = mock_github_repo.requester.requestJsonAndCheck.call_args[0]
+        assert (verb, url) == ("PATCH", "https://api.github.com/repos/mock/repository/labels/Bug")
+        assert state.get("mock/repository") == {"Bug": GitHubLabelBotLabel(color="d73a4a", description="A bug label")}
+
+    def test_sync_labels_with_refreshed_state(self, mock_github_repo):
+        label_config = GitHubLabelManagementConfig(
+            repositories=["mock/repository"],
+            labels={"Bug": GitHubLabelBotLabel(color="d73a4a", description="A bug label")},
+            delete_unused=False,
+        )
+        state = LabelStateStore()
+        state.replace("mock/repository", {"Bug": GitHubLabelBotLabel(color="ffffff", description="Stale")})
+
+        assert StatefulSyncUpAsRemote(state, refresh=True).process(mock_github_repo, label_config).is_empty
+
+        mock_github_repo.get_labels.assert_called_once()
+        assert state.get("mock/repository") == {"Bug": GitHubLabelBotLabel(color="d73a4a", description="A bug label")}
+
+
+class TestPlanAgainstRemote:
+    @pytest.fixture(scope="function")
+    def process(self) -> PlanAgainstRemote:
+        return PlanAgainstRemote()
+
+    def test_plan_labels(self, process: PlanAgainstRemote, mocker: MockFixture):
+        mock_repo = mocker.MagicMock(spec=Repository)
+        mock_label = mocker.MagicMock()
+        mock_label.name = "Bug"
+        mock_label.color = "d73a4a"
+        mock_label.description = "A bug label"
+        mock_repo.get_labels.return_value = [mock_label]
+
+        label_config = GitHubLabelManagementConfig(
+            repositories=["mock/repository"],
+            labels={
+                "Bug": GitHubLabelBotLabel(color="ffffff", description="A bug label"),
+                "NewLabel": GitHubLabelBotLabel(color="000000", description="A new label"),
+            },
+            delete_unused=True,
+        )
+
+        plan = process.process(mock_repo, label_config)
+
+        assert plan.deserialize()["summary"] == {"create": 1, "update": 1, "delete": 0, "no-op": 0}
+        # Assert that it never calls any API which would modify labels
+        mock_repo.create_label.assert_not_called()
+        mock_label.edit.assert_not_called()
+        mock_label.delete.assert_not_called()
+
 
 class TestDownloadFromRemote:
     @pytest.fixture(scope="function")
@@ -93,6 +485,8 @@ class TestDownloadFromRemote:
         # Call the function
         dummy_config = GitHubLabelManagementConfig()
         bot.process(mock_repo, dummy_config)
+        mock_yaml().write.assert_not_called()
+        bot.finish()
 
         # Assert that YAML().write() was called with appropriate arguments
         mock_yaml().write.assert_called_once()
@@ -100,3 +494,81 @@ class TestDownloadFromRemote:
         print(f"[DEBUG] written_config: {written_config}")
         assert "Bug" in written_config["labels"].keys()
         assert written_config["labels"]["Bug"]["color"] == "d73a4a"
+
+    def test_download_labels_of_many_repositories(self, mocker: MockFixture, tmp_path):
+        def _repo(name: str, color: str):
+            repo = mocker.MagicMock(spec=Repository, full_name=name)
+            label = mocker.MagicMock(color=color, description="A bug label")
+            label.name = "Bug"
+            repo.get_labels.return_value = [label]
+            return repo
+
+        bot = DownloadFromRemote(conflict_policy=ConflictPolicy.Majority)
+        config_path = tmp_path / "labels.yaml"
+        label_config = GitHubLabelManagementConfig(repositories=["owner/repo1", "owner/repo2", "owner/repo3"])
+        label_config.config_path = str(config_path)
+        bot.prepare(mocker.MagicMock(), label_config.repositories)
+
+        # The repositories are processed concurrently, so they could finish in any order
+        bot.process(_repo("owner/repo3", "ffffff"), label_config)
+        bot.process(_repo("owner/repo1", "d73a4a"), label_config)
+        bot.process(_repo("owner/repo2", "ffffff"), label_config)
+        assert not config_path.exists()
+        bot.finish()
+
+        written_config = GitHubLabelManagementConfig.serialize(YAML().read(str(config_path)))
+        assert written_config.repositories == ["owner/repo1", "owner/repo2", "owner/repo3"]
+        assert written_config.labels == {"Bug": GitHubLabelBotLabel(color="ffffff", description="A bug label")}
+
+    def test_download_labels_with_failed_repository(self, mocker: MockFixture, tmp_path):
+        config_path = tmp_path / "labels.yaml"
+        config_path.write_text("repositories: [owner/repo1, owner/repo2]\n")
+        label_config = GitHubLabelManagementConfig(repositories=["owner/repo1", "owner/repo2"])
+        label_config.config_path = str(config_path)
+        repo = mocker.MagicMock(spec=Repository, full_name="owner/repo1")
+        repo.get_labels.return_value = []
+
+        bot = DownloadFromRemote()
+        bot.prepare(mocker.MagicMock(), label_config.repositories)
+        bot.process(repo, label_config)
+        # The other repository failed with a transient error
+        bot.finish()
+
+        assert config_path.read_text() == "repositories: [owner/repo1, owner/repo2]\n"
+
+    def test_download_labels_with_reported_conflicts(self, mocker: MockFixture, tmp_path):
+        def _repo(name: str, color: str):
+            repo = mocker.MagicMock(spec=Repository, full_name=name)
+            label = mocker.MagicMock(color=color, description="A bug label")
+            label.name = "Bug"
+            repo.get_labels.return_value = [label]
+            return repo
+
+        bot = DownloadFromRemote(conflict_policy=ConflictPolicy.Report)
+        config_path = tmp_path / "labels.yaml"
+        label_config = GitHubLabelManagementConfig(repositories=["owner/repo2", "owner/repo1"], delete_unused=True)
+        label_config.config_path = str(config_path)
+        bot.prepare(mocker.MagicMock(), label_config.repositories)
+        bot.process(_repo("owner/repo1", "d73a4a"), label_config)
+        bot.process(_repo("owner/repo2", "ffffff"), label_config)
+        bot.finish()
+
+        written_config = GitHubLabelManagementConfig.serialize(YAML().read(str(config_path)))
+        assert written_config.repositories == ["owner/repo2", "owner/repo1"]
+        assert written_config.labels == {}
+        # The conflicting labels would be deleted by the next sync otherwise
+        assert written_config.delete_unused is False
+
+    def test_download_labels_keep_previous_names(self, bot: DownloadFromRemote, mock_github_repo, tmp_path):
+        label_config = GitHubLabelManagementConfig(
+            repositories=["owner/repo"],
+            labels={"bug": GitHubLabelBotLabel(color="ffffff", description="", previous_names=("defect",))},
+        )
+        label_config.config_path = str(tmp_path / "labels.yaml")
+        bot.process(mock_github_repo, label_config)
+        bot.finish()
+
+        written_config = YAML().read(label_config.config_path)
+        assert written_config["labels"] == {
+            "Bug": {"color": "d73a4a", "description": "A bug label", "previous_names": ["defect"]}
+        }
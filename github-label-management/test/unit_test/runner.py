@@ -5,10 +5,12 @@ from unittest.mock import patch
 
 import pytest
 import yaml
+from github import GithubException
 from github.Repository import Repository
 from github_label_bot.github_action import GitHubAction
-from github_label_bot.model import GitHubLabelManagementConfig
+from github_label_bot.model import GitHubLabelManagementConfig, OrganizationSelector
 from github_label_bot.runner import GitHubOperationRunner
+from github_label_bot.shard import Shard
 from pytest_mock import MockFixture
 
 from ._values import SAMPLE_YAML
@@ -36,6 +38,26 @@ class TestGitHubOperationRunner:
         assert "Bug" in config.labels
         assert config.labels["Bug"].color == "d73a4a"
 
+    @patch.dict(os.environ, {"GITHUB_REPOSITORY": "Chisanan232/Just-Some-Tools"}, clear=True)
+    def test__load_label_config_with_cache(self, bot: GitHubOperationRunner, mock_yaml_file, tmp_path):
+        cache_path = str(tmp_path / "config.pickle")
+        config = bot._load_label_config(mock_yaml_file, cache_path)
+        assert os.path.exists(cache_path)
+        assert bot._load_label_config(mock_yaml_file, cache_path) == config
+
+    @patch.dict(os.environ, {"GITHUB_REPOSITORY": "Chisanan232/Just-Some-Tools"}, clear=True)
+    def test_previous_label_config(self, bot: GitHubOperationRunner, mock_yaml_file, tmp_path):
+        action_inputs = GitHubAction(config_path=str(tmp_path / "labels.yaml"), operation=[])
+        assert bot.previous_label_config(action_inputs) is None
+
+        action_inputs.previous_config = mock_yaml_file
+        assert bot.previous_label_config(action_inputs) == bot._load_label_config(mock_yaml_file)
+
+        # The configuration didn't exist at the revision
+        action_inputs.previous_config = "HEAD"
+        with patch("github_label_bot.runner.load_config_data_at_revision", side_effect=FileNotFoundError("missing")):
+            assert bot.previous_label_config(action_inputs) is None
+
     # Mocked GitHub Repository
     @pytest.fixture
     def mock_github_repo(self, mocker: MockFixture):
@@ -148,3 +170,116 @@ class TestGitHubOperationRunner:
                 assert config.repositories == []
                 assert config.delete_unused is False
                 assert config.labels == {}
+
+    @pytest.mark.parametrize("concurrency", [1, 4])
+    @patch.dict(os.environ, {"GITHUB_REPOSITORY": "Chisanan232/Just-Some-Tools"}, clear=True)
+    def test_operate_with_github_collects_results(
+        self, bot: GitHubOperationRunner, mocker: MockFixture, monkeypatch, tmp_path, concurrency: int
+    ):
+        monkeypatch.setenv("GITHUB_TOKEN", "mock_token")
+        config_path = tmp_path / "config.yaml"
+        with open(config_path, "w") as f:
+            yaml.dump({"repositories": ["owner/repo1", "owner/broken", "owner/repo3"], "labels": {}}, f)
+
+        mock_github = mocker.patch("github_label_bot.runner.Github")
+        processor = mocker.MagicMock()
+
+        def _process(repo, _config):
+            if repo.full_name == "owner/broken":
+                raise GithubException(404, {"message": "Not Found"}, None)
+
+        processor.process.side_effect = _process
+
+        action_inputs = GitHubAction(config_path=str(config_path), operation=[], concurrency=concurrency)
+        results = bot.operate_with_github(action_inputs, processor)
+
+        assert [r.repository for r in results] == ["owner/repo1", "owner/broken", "owner/repo3"]
+        assert [r.succeeded for r in results] == [True, False, True]
+        assert isinstance(results[1].error, GithubException)
+        assert processor.process.call_count == 3
+        mock_github().get_repo.assert_not_called()
+
+    @patch.dict(os.environ, {"GITHUB_REPOSITORY": "Chisanan232/Just-Some-Tools"}, clear=True)
+    def test_operate_with_github_with_shard(
+        self, bot: GitHubOperationRunner, mocker: MockFixture, monkeypatch, tmp_path
+    ):
+        monkeypatch.setenv("GITHUB_TOKEN", "mock_token")
+        repositories = [f"owner/repo-{i}" for i in range(20)]
+        config_path = tmp_path / "config.yaml"
+        with open(config_path, "w") as f:
+            yaml.dump({"repositories": repositories, "labels": {}}, f)
+        mocker.patch("github_label_bot.runner.Github")
+
+        processed = []
+        for shard in Shard(index=0, count=3).split(1) + Shard(index=1, count=3).split(2) + [Shard(index=2, count=3)]:
+            action_inputs = GitHubAction(config_path=str(config_path), operation=[], shard=shard)
+            results = bot.operate_with_github(action_inputs, mocker.MagicMock())
+            assert all(shard.owns(result.repository) for result in results)
+            processed.extend(result.repository for result in results)
+
+        # The shards and the sub-shards process every repository once
+        assert sorted(processed) == sorted(repositories)
+
+    def test__repository_handle(self, bot: GitHubOperationRunner, mocker: MockFixture):
+        github = mocker.MagicMock()
+        github.requester.base_url = "https://api.github.com"
+
+        repo = bot._repository_handle(github, "owner/repo")
+
+        assert repo.full_name == "owner/repo"
+        assert repo.url == "https://api.github.com/repos/owner/repo"
+        github.requester.requestJsonAndCheck.assert_not_called()
+
+    def test_github_client_per_thread(self, bot: GitHubOperationRunner, mocker: MockFixture, monkeypatch):
+        monkeypatch.setenv("GITHUB_TOKEN", "mock_token")
+        monkeypatch.delenv("GITHUB_API_URL", raising=False)
+        mock_github = mocker.patch("github_label_bot.runner.Github", side_effect=lambda **_: mocker.MagicMock())
+
+        main_client = bot.github_client()
+        assert bot.github_client() is main_client
+        worker_client = bot._worker_pool(1).submit(bot.github_client).result()
+        assert worker_client is not main_client
+        assert bot._worker_pool(1).submit(bot.github_client).result() is worker_client
+
+        assert mock_github.call_count == 2
+        assert mock_github.call_args.kwargs["per_page"] == 100
+        assert mock_github.call_args.kwargs["retry"] is None
+        assert mock_github.call_args.kwargs["base_url"] == "https://api.github.com"
+
+        bot.close()
+        main_client.close.assert_called_once()
+        worker_client.close.assert_called_once()
+
+    def test__get_github_api_url(self, bot: GitHubOperationRunner, monkeypatch):
+        monkeypatch.setenv("GITHUB_API_URL", "https://github.example.com/api/v3")
+        assert bot._get_github_api_url() == "https://github.example.com/api/v3"
+
+    def test__iter_repositories_with_organization(self, bot: GitHubOperationRunner, mocker: MockFixture):
+        def _repo(name: str, archived: bool = False):
+            repo = mocker.MagicMock(full_name=f"org/{name}", topics=[], archived=archived, fork=False)
+            repo.configure_mock(name=name)
+            return repo
+
+        github = mocker.MagicMock()
+        org_repos = github.get_organization.return_value.get_repos.return_value
+        org_repos.get_page.side_effect = [
+            [_repo("listed"), _repo("svc-a"), _repo("svc-old", archived=True), _repo("docs")],
+            [],
+        ]
+        config = GitHubLabelManagementConfig(
+            repositories=["org/listed"],
+            organization=OrganizationSelector(name="org", include=["svc-*", "listed"]),
+        )
+
+        repositories = bot._iter_repositories(github, config, config.repositories)
+
+        # The listed repositories are yielded before it lists the organization
+        assert next(repositories) == "org/listed"
+        github.get_organization.assert_not_called()
+        assert list(repositories) == ["org/svc-a"]
+        github.get_organization.assert_called_once_with("org")
+        org_repos.get_page.assert_called_once_with(0)
+
+    def test__batches(self, bot: GitHubOperationRunner):
+        names = [f"org/repo{i}" for i in range(bot.BATCH_SIZE + 1)]
+        assert [len(batch) for batch in bot._batches(iter(names))] == [bot.BATCH_SIZE, 1]
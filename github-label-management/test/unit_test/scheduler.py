@@ -0,0 +1,132 @@
+import time
+from typing import List
+from unittest.mock import MagicMock
+
+import pytest
+from github import GithubException, RateLimitExceededException
+from github_label_bot.scheduler import RequestScheduler, TokenBucket
+
+
+class _FakeClock:
+    def __init__(self):
+        self.now = 0.0
+        self.sleeps: List[float] = []
+
+    def __call__(self) -> float:
+        return self.now
+
+    def sleep(self, seconds: float) -> None:
+        self.sleeps.append(seconds)
+        self.now += seconds
+
+
+class TestTokenBucket:
+
+    def test_acquire_within_capacity(self):
+        clock = _FakeClock()
+        bucket = TokenBucket(rate=1, capacity=3, clock=clock, sleep=clock.sleep)
+        assert [bucket.acquire() for _ in range(3)] == [0.0, 0.0, 0.0]
+        assert clock.sleeps == []
+
+    def test_acquire_over_capacity(self):
+        clock = _FakeClock()
+        bucket = TokenBucket(rate=2, capacity=1, clock=clock, sleep=clock.sleep)
+        bucket.acquire()
+        waited = bucket.acquire()
+        assert waited == pytest.approx(0.5)
+        assert clock.sleeps == [pytest.approx(0.5)]
+
+    def test_refill_by_time(self):
+        clock = _FakeClock()
+        bucket = TokenBucket(rate=1, capacity=1, clock=clock, sleep=clock.sleep)
+        bucket.acquire()
+        clock.now += 5
+        assert bucket.acquire() == 0.0
+
+
+class TestRequestScheduler:
+    @pytest.fixture(scope="function")
+    def sleeps(self) -> List[float]:
+        return []
+
+    @pytest.fixture(scope="function")
+    def scheduler(self, sleeps: List[float]) -> RequestScheduler:
+        return RequestScheduler(max_retries=3, sleep=sleeps.append)
+
+    def test_call(self, scheduler: RequestScheduler):
+        func = MagicMock(return_value="result")
+        assert scheduler.call(func, "arg", key="value") == "result"
+        func.assert_called_once_with("arg", key="value")
+        assert scheduler.statistics.requests == 1
+        assert scheduler.statistics.retries == 0
+
+    @pytest.mark.parametrize(
+        "error",
+        [
+            GithubException(502, {"message": "Bad Gateway"}, {}),
+            GithubException(429, {"message": "Too Many Requests"}, {"Retry-After": "2"}),
+            RateLimitExceededException(403, {"message": "You have exceeded a secondary rate limit"}, {}),
+        ],
+    )
+    def test_call_retry(self, scheduler: RequestScheduler, sleeps: List[float], error: GithubException):
+        func = MagicMock(side_effect=[error, "result"])
+        assert scheduler.call(func) == "result"
+        assert func.call_count == 2
+        assert scheduler.statistics.retries == 1
+        assert len(sleeps) <= 1
+        if error.headers.get("Retry-After"):
+            assert sleeps == [2.0]
+        if isinstance(error, RateLimitExceededException):
+            assert sleeps == [60.0]
+
+    @pytest.mark.parametrize(
+        "error",
+        [
+            GithubException(429, {"message": "Too Many Requests"}, {"Retry-After": "2"}),
+            RateLimitExceededException(403, {"message": "You have exceeded a secondary rate limit"}, {}),
+        ],
+    )
+    def test_call_retry_throttled_write(self, scheduler: RequestScheduler, error: GithubException):
+        func = MagicMock(side_effect=[error, "result"])
+        assert scheduler.call(func, write=True) == "result"
+        assert func.call_count == 2
+
+    def test_call_not_retry_write_with_server_error(self, scheduler: RequestScheduler):
+        func = MagicMock(side_effect=GithubException(502, {"message": "Bad Gateway"}, {}))
+        with pytest.raises(GithubException):
+            scheduler.call(func, write=True)
+        func.assert_called_once()
+        assert scheduler.statistics.retries == 0
+
+    def test_call_not_retry_client_error(self, scheduler: RequestScheduler):
+        func = MagicMock(side_effect=GithubException(404, {"message": "Not Found"}, {}))
+        with pytest.raises(GithubException):
+            scheduler.call(func)
+        func.assert_called_once()
+
+    def test_call_give_up_after_max_retries(self, scheduler: RequestScheduler):
+        func = MagicMock(side_effect=GithubException(503, {"message": "Unavailable"}, {}))
+        with pytest.raises(GithubException):
+            scheduler.call(func)
+        assert func.call_count == 4
+        assert scheduler.statistics.retries == 3
+
+    def test_call_wait_for_primary_rate_limit(self, scheduler: RequestScheduler, sleeps: List[float]):
+        requester = MagicMock()
+        requester.rate_limiting = (0, 5000)
+        requester.rate_limiting_resettime = time.time() + 30
+        scheduler.track(requester)
+
+        scheduler.call(MagicMock())
+
+        assert len(sleeps) == 1
+        assert 29 < sleeps[0] <= 31
+        assert scheduler.statistics.delayed_requests == 1
+
+    def test_call_pace_writes(self, sleeps: List[float]):
+        scheduler = RequestScheduler(writes_per_minute=60, write_burst=1, sleep=sleeps.append)
+        scheduler.call(MagicMock(), write=True)
+        scheduler.call(MagicMock(), write=True)
+        assert len(sleeps) == 1
+        assert scheduler.statistics.delayed_requests == 1
+        assert scheduler.statistics.delayed_seconds > 0
@@ -0,0 +1,150 @@
+import hashlib
+import hmac
+import http.client
+import json
+from unittest.mock import MagicMock, patch
+
+import pytest
+from github_label_bot.enums import Operation
+from github_label_bot.github_action import GitHubAction
+from github_label_bot.metrics import recorder
+from github_label_bot.model import GitHubLabelManagementConfig, Label
+from github_label_bot.server import LabelBotServer, verify_signature
+from github_label_bot.state import LabelStateStore
+
+_SECRET = "It's a secret"
+
+
+def _sign(body: bytes) -> str:
+    return "sha256=" + hmac.new(_SECRET.encode("utf-8"), body, hashlib.sha256).hexdigest()
+
+
+def _label_event(repository: str = "owner/repo", action: str = "edited") -> dict:
+    return {
+        "action": action,
+        "label": {"name": "Bug", "color": "ffffff", "description": None},
+        "repository": {"full_name": repository, "name": repository.split("/")[1]},
+    }
+
+
+def test_verify_signature():
+    body = b'{"action": "created"}'
+    assert verify_signature(_SECRET, body, _sign(body))
+    assert not verify_signature(_SECRET, body + b" ", _sign(body))
+    assert not verify_signature(_SECRET, body, _sign(body)[len("sha256=") :])
+    assert not verify_signature(_SECRET, body, None)
+
+
+class TestLabelBotServer:
+    @pytest.fixture
+    def action_inputs(self) -> GitHubAction:
+        return GitHubAction(
+            config_path="./test-github-labels.yaml", operation=[Operation.Serve], webhook_secret=_SECRET
+        )
+
+    @pytest.fixture
+    def state(self) -> LabelStateStore:
+        state = LabelStateStore()
+        state.replace("owner/repo", {"Bug": Label(color="d73a4a", description="")})
+        return state
+
+    @pytest.fixture
+    def server(self, action_inputs: GitHubAction, state: LabelStateStore) -> LabelBotServer:
+        server = LabelBotServer(MagicMock(), action_inputs, state)
+        server._config = GitHubLabelManagementConfig(repositories=["owner/repo"], labels={})
+        server._repositories = {"owner/repo"}
+        return server
+
+    def test_without_secret(self):
+        with pytest.raises(ValueError):
+            LabelBotServer(
+                MagicMock(), GitHubAction(config_path="./test-github-labels.yaml", operation=[Operation.Serve])
+            )
+
+    def test_handle_label_event(self, server: LabelBotServer, state: LabelStateStore):
+        assert server.handle_event("label", _label_event())
+        assert server.handle_event("label", _label_event())
+        assert state.get("owner/repo") == {"Bug": Label(color="ffffff", description="")}
+        # The events of the same repository are handled once
+        assert server.status() == {"repositories": 1, "pending": 1}
+
+        assert not server.handle_event("label", _label_event(repository="owner/unmanaged"))
+        assert not server.handle_event("push", _label_event())
+        assert state.get("owner/unmanaged") is None
+
+    def test_handle_repository_event(self, server: LabelBotServer, state: LabelStateStore):
+        server._repositories.add("owner/new-name")
+        event = {
+            "action": "renamed",
+            "changes": {"repository": {"name": {"from": "repo"}}},
+            "repository": {"full_name": "owner/new-name", "name": "new-name"},
+        }
+
+        assert server.handle_event("repository", event)
+        assert state.get("owner/repo") is None
+        assert not server.handle_event("repository", {"action": "edited", "repository": event["repository"]})
+
+    def test_reuse_fetcher(self, action_inputs: GitHubAction, state: LabelStateStore):
+        runner = MagicMock()
+        runner.load_config.return_value = (GitHubLabelManagementConfig(repositories=["owner/repo"], labels={}), [])
+        server = LabelBotServer(runner, action_inputs, state)
+        with patch("github_label_bot.server.StatefulSyncUpAsRemote") as process:
+            server._sweep()
+            server._synchronize("owner/repo")
+            server._synchronize("owner/repo")
+
+        runner.label_fetcher.assert_called_once_with(action_inputs)
+        runner.label_executor.assert_called_once_with(action_inputs)
+        assert [c.kwargs["fetcher"] for c in process.call_args_list] == [runner.label_fetcher.return_value] * 3
+        server.stop()
+        runner.label_fetcher.return_value.flush.assert_called_once()
+
+    def test_sweep_report_metrics(self, action_inputs: GitHubAction, state: LabelStateStore, tmp_path):
+        action_inputs.metrics_path = str(tmp_path / "metrics.jsonl")
+
+        def _operate_with_github(*args):
+            with recorder().span("operation"):
+                pass
+
+        runner = MagicMock()
+        runner.load_config.return_value = (GitHubLabelManagementConfig(repositories=["owner/repo"], labels={}), [])
+        runner.operate_with_github.side_effect = _operate_with_github
+        server = LabelBotServer(runner, action_inputs, state)
+        recorder().reset()
+
+        # A webhook event before the sweep
+        with recorder().span("fetch", repository="owner/repo"):
+            pass
+        server._sweep()
+
+        assert recorder().spans == []
+        lines = (tmp_path / "metrics.jsonl").read_text().splitlines()
+        assert [json.loads(line)["phase"] for line in lines] == ["fetch", "operation"]
+
+    def test_webhook(self, server: LabelBotServer, action_inputs: GitHubAction):
+        action_inputs.webhook_port = 0
+        server._schedule_sweeps = lambda: None
+        server.start()
+        try:
+            host, port = server.address[len("http://") :].split(":")
+            body = json.dumps(_label_event()).encode("utf-8")
+
+            def _post(signature: str) -> int:
+                connection = http.client.HTTPConnection(host, int(port), timeout=10)
+                headers = {"X-GitHub-Event": "label", "X-Hub-Signature-256": signature}
+                connection.request("POST", "/", body=body, headers=headers)
+                status = connection.getresponse().status
+                connection.close()
+                return status
+
+            assert _post("sha256=invalid") == 401
+            assert _post(_sign(body)) == 202
+
+            connection = http.client.HTTPConnection(host, int(port), timeout=10)
+            connection.request("GET", "/healthz")
+            response = connection.getresponse()
+            assert response.status == 200
+            assert set(json.loads(response.read())) == {"repositories", "pending"}
+            connection.close()
+        finally:
+            server.stop()
@@ -0,0 +1,79 @@
+import pytest
+from github_label_bot.shard import Shard, merge_reports, shard_index
+
+_REPOSITORIES = [f"owner/repo-{i}" for i in range(200)]
+
+
+class TestShard:
+
+    @pytest.mark.parametrize(
+        ("value", "expected"),
+        [("1/1", Shard(index=0, count=1)), ("2/4", Shard(index=1, count=4)), ("4/4", Shard(index=3, count=4))],
+    )
+    def test_parse(self, value: str, expected: Shard):
+        assert Shard.parse(value) == expected
+        assert str(expected) == value
+
+    @pytest.mark.parametrize("value", ["", "1", "a/4", "0/4", "5/4", "1/0"])
+    def test_parse_invalid(self, value: str):
+        with pytest.raises(ValueError):
+            Shard.parse(value)
+
+    def test_owns(self):
+        shards = [Shard(index=i, count=4) for i in range(4)]
+        owners = [[shard for shard in shards if shard.owns(repository)] for repository in _REPOSITORIES]
+
+        # Every repository belongs to exactly one shard, whatever the case of its name is
+        assert all(len(owner) == 1 for owner in owners)
+        assert all(shard_index(repository.upper(), 4) == shard_index(repository, 4) for repository in _REPOSITORIES)
+        assert all(any(shard in owner for owner in owners) for shard in shards)
+
+    def test_split(self):
+        shard = Shard(index=1, count=3)
+        sub_shards = shard.split(2)
+
+        assert sub_shards == [Shard(index=1, count=6), Shard(index=4, count=6)]
+        for repository in _REPOSITORIES:
+            assert sum(sub_shard.owns(repository) for sub_shard in sub_shards) == int(shard.owns(repository))
+
+    def test_path(self):
+        assert Shard(index=1, count=4).path("cache/labels.json") == "cache/labels.shard-2-of-4.json"
+
+
+def _report(shard: str, repository: str, create: int) -> dict:
+    return {
+        "shard": shard,
+        "repositories": [{"repository": repository, "error": None}],
+        "summary": {"create": create, "mutations": create},
+    }
+
+
+class TestMergeReports:
+
+    def test_merge(self):
+        report = merge_reports([_report("2/2", "owner/b", 2), _report("1/2", "owner/a", 1)])
+
+        assert report == {
+            "shards": 2,
+            "repositories": [{"repository": "owner/a", "error": None}, {"repository": "owner/b", "error": None}],
+            "summary": {"create": 3, "mutations": 3},
+        }
+
+    def test_merge_sub_shards(self):
+        shards = Shard(index=0, count=2).split(2)
+        report = merge_reports([_report("1/4", "owner/a", 1), _report("3/4", "owner/b", 1)], shards=shards)
+        assert report["summary"] == {"create": 2, "mutations": 2}
+
+    @pytest.mark.parametrize(
+        "reports",
+        [
+            [],
+            [_report("1/2", "owner/a", 1)],
+            [_report("1/2", "owner/a", 1), _report("1/2", "owner/a", 1)],
+            [_report("1/2", "owner/a", 1), _report("2/3", "owner/b", 1)],
+            [{"repositories": [], "summary": {}}],
+        ],
+    )
+    def test_merge_invalid(self, reports):
+        with pytest.raises(ValueError):
+            merge_reports(reports)
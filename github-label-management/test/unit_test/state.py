@@ -0,0 +1,50 @@
+from github_label_bot.enums import LabelChangeType
+from github_label_bot.model import Label
+from github_label_bot.plan import LabelChange, LabelChangePlan
+from github_label_bot.state import LabelStateStore
+
+_BUG = Label(color="d73a4a", description="Something went wrong.")
+_FEATURE = Label(color="005cc5", description="New feature or improvement.")
+
+
+class TestLabelStateStore:
+    def test_apply_event(self):
+        state = LabelStateStore()
+        assert not state.apply_event("owner/repo", "created", {"name": "Bug", "color": "d73a4a"}, {})
+
+        state.replace("owner/repo", {"Bug": _BUG, "Old": _FEATURE})
+        assert state.apply_event("owner/repo", "created", {"name": "Docs", "color": "0075CA"}, {})
+        assert state.apply_event(
+            "owner/repo",
+            "edited",
+            {"name": "Feature", "color": "005cc5", "description": "New feature or improvement."},
+            {"name": {"from": "Old"}},
+        )
+        assert state.apply_event("owner/repo", "deleted", {"name": "bug", "color": "d73a4a"}, {})
+
+        assert state.get("owner/repo") == {"Docs": Label(color="0075ca", description=""), "Feature": _FEATURE}
+
+    def test_apply_plan(self):
+        state = LabelStateStore()
+        state.replace("owner/repo", {"Bug": _FEATURE, "Defect": _BUG, "Old": _BUG})
+        plan = LabelChangePlan(
+            changes=[
+                LabelChange(change_type=LabelChangeType.Update, name="Bug", label=_BUG, current=_FEATURE),
+                LabelChange(
+                    change_type=LabelChangeType.Update,
+                    name="Feature",
+                    label=_FEATURE,
+                    current=_BUG,
+                    current_name="Defect",
+                ),
+                LabelChange(change_type=LabelChangeType.Delete, name="Old", current=_BUG),
+                LabelChange(change_type=LabelChangeType.Create, name="Docs", label=_FEATURE),
+            ]
+        )
+
+        state.apply_plan("owner/repo", plan)
+
+        assert state.get("owner/repo") == {"Bug": _BUG, "Feature": _FEATURE, "Docs": _FEATURE}
+        state.forget("owner/repo")
+        assert state.get("owner/repo") is None
+        assert len(state) == 0
@@ -1,9 +1,16 @@
+import os
 from abc import ABCMeta, abstractmethod
 from unittest.mock import mock_open, patch
 
 import pytest
 from github_label_bot._utils.file.operation import JSON, YAML, _BaseFileOperation
 
+_SAMPLE_CONFIG = {
+    "repositories": ["owner/repo"],
+    "delete_unused": False,
+    "labels": {"Bug": {"color": "d73a4a", "description": "Something went wrong."}},
+}
+
 
 class _FileOptTestSpec(metaclass=ABCMeta):
     @pytest.fixture(scope="function")
@@ -31,6 +38,59 @@ class _FileOptTestSpec(metaclass=ABCMeta):
                 mock_file_stream.assert_not_called()
                 mock_load.assert_not_called()
 
+    def test_write_and_read(self, file_opt: _BaseFileOperation, tmp_path):
+        path = str(tmp_path / f"config.{self.file_extension}")
+        assert file_opt.write(path=path, mode="w+", config=_SAMPLE_CONFIG) is True
+        assert file_opt.read(path) == _SAMPLE_CONFIG
+        assert os.listdir(tmp_path) == [os.path.basename(path)]
+
+    def test_write_skip_same_content(self, file_opt: _BaseFileOperation, tmp_path):
+        path = str(tmp_path / f"config.{self.file_extension}")
+        file_opt.write(path=path, mode="w+", config=_SAMPLE_CONFIG)
+        inode = os.stat(path).st_ino
+
+        assert file_opt.write(path=path, mode="w+", config=_SAMPLE_CONFIG) is False
+        assert os.stat(path).st_ino == inode
+
+        changed_config = dict(_SAMPLE_CONFIG, delete_unused=True)
+        assert file_opt.write(path=path, mode="w+", config=changed_config) is True
+        assert file_opt.read(path) == changed_config
+        assert os.listdir(tmp_path) == [os.path.basename(path)]
+
+    def test_write_keep_file_if_it_fails(self, file_opt: _BaseFileOperation, tmp_path):
+        path = str(tmp_path / f"config.{self.file_extension}")
+        file_opt.write(path=path, mode="w+", config=_SAMPLE_CONFIG)
+
+        with patch.object(type(file_opt), "dump", side_effect=OSError("No space left on device")):
+            with pytest.raises(OSError):
+                file_opt.write(path=path, mode="w+", config={"labels": {}})
+
+        assert file_opt.read(path) == _SAMPLE_CONFIG
+        assert os.listdir(tmp_path) == [os.path.basename(path)]
+
+    def test_write_permission(self, file_opt: _BaseFileOperation, tmp_path):
+        # A new file gets the same permission as *open* gives, and an existing file keeps its own
+        reference = tmp_path / "reference"
+        reference.write_text("")
+        path = tmp_path / f"config.{self.file_extension}"
+        file_opt.write(path=str(path), mode="w+", config=_SAMPLE_CONFIG)
+        assert os.stat(path).st_mode == os.stat(reference).st_mode
+
+        os.chmod(path, 0o640)
+        file_opt.write(path=str(path), mode="w+", config={"labels": {}})
+        assert os.stat(path).st_mode & 0o777 == 0o640
+
+    def test_write_append(self, file_opt: _BaseFileOperation, tmp_path):
+        path = tmp_path / f"config.{self.file_extension}"
+        path.write_text("head\n")
+        assert file_opt.write(path=str(path), mode="a+", config="tail\n") is True
+        assert path.read_text() == "head\ntail\n"
+
+    @property
+    @abstractmethod
+    def file_extension(self) -> str:
+        pass
+
     @property
     @abstractmethod
     def _load_function_path(self) -> str:
@@ -46,9 +106,13 @@ class TestYAML(_FileOptTestSpec):
     def not_exist_file(self) -> str:
         return "file_not_found.yaml"
 
+    @property
+    def file_extension(self) -> str:
+        return "yaml"
+
     @property
     def _load_function_path(self) -> str:
-        return "github_label_bot._utils.file.operation.load"
+        return "yaml.load"
 
 
 class TestJSON(_FileOptTestSpec):
@@ -60,6 +124,10 @@ class TestJSON(_FileOptTestSpec):
     def not_exist_file(self) -> str:
         return "file_not_found.json"
 
+    @property
+    def file_extension(self) -> str:
+        return "json"
+
     @property
     def _load_function_path(self) -> str:
         return "github_label_bot._utils.file.operation.json.loads"
@@ -0,0 +1,191 @@
+import textwrap
+from pathlib import Path
+from typing import List, Tuple
+
+from github_label_bot.validation import ConfigIssue, validate_config
+
+
+def _write(path: Path, content: str) -> Path:
+    path.parent.mkdir(parents=True, exist_ok=True)
+    path.write_text(textwrap.dedent(content).lstrip())
+    return path
+
+
+def _issues(path: Path) -> List[Tuple[int, str]]:
+    return [(issue.line, issue.message) for issue in validate_config(str(path))]
+
+
+class TestValidateConfig:
+
+    def test_valid_config(self, tmp_path: Path):
+        base = _write(
+            tmp_path / "base.yaml",
+            """
+            label_sets:
+              frontend:
+                UI: {color: "000000", description: null}
+            """,
+        )
+        path = _write(
+            tmp_path / "labels.yaml",
+            f"""
+            extends: {base.name}
+            repositories: [owner/repo]
+            delete_unused: true
+            labels:
+              Bug:
+                color: "#D73A4A"
+                description: Something isn't working
+                previous_names: [bug]
+            overrides:
+              owner/web-*:
+                label_sets: [frontend]
+            """,
+        )
+        assert validate_config(str(path)) == []
+
+    def test_invalid_labels(self, tmp_path: Path):
+        path = _write(
+            tmp_path / "labels.yaml",
+            f"""
+            labels:
+              Bug:
+                color: red
+              bug:
+                color: 000000
+              {"L" * 51}:
+                color: ffffff
+                description: {"D" * 101}
+              Feature:
+                description: New feature
+                colour: ffffff
+            """,
+        )
+        assert _issues(path) == [
+            (3, "The color 'red' of label 'Bug' should be 6 hex digits, e.g., d73a4a."),
+            (4, "Label 'bug' differs from label 'Bug' at line 2 only in case, GitHub treats them as the same label."),
+            (5, "The color of label 'bug' is read as int, quote it."),
+            (6, f"Label '{'L' * 51}' is longer than 50 characters."),
+            (8, f"The description of label '{'L' * 51}' is longer than 100 characters."),
+            (9, "Label 'Feature' misses the required key 'color'."),
+            (11, "Unknown key 'colour' in label 'Feature', expect one of color, description, previous_names, aliases."),
+        ]
+
+    def test_names_in_different_cases_across_mappings(self, tmp_path: Path):
+        base = _write(
+            tmp_path / "base.yaml",
+            """
+            labels:
+              Docs: {color: "0075ca"}
+            """,
+        )
+        path = _write(
+            tmp_path / "labels.yaml",
+            f"""
+            extends: {base.name}
+            default_label_sets: [base]
+            label_sets:
+              base:
+                Bug: {{color: d73a4a}}
+              frontend:
+                ui: {{color: "000000"}}
+            labels:
+              docs: {{color: "0075ca"}}
+              UI: {{color: "000000"}}
+            overrides:
+              owner/web:
+                label_sets: [frontend]
+                labels:
+                  bug: {{color: d73a4a}}
+              owner/api:
+                labels:
+                  Bug: {{color: d73a4a}}
+            """,
+        )
+
+        issues = validate_config(str(path))
+
+        assert [(Path(issue.path).name, issue.line, issue.message.split(" only")[0]) for issue in issues] == [
+            ("base.yaml", 2, f"Label 'Docs' differs from label 'docs' at {path}:9"),
+            ("labels.yaml", 7, "Label 'ui' differs from label 'UI' at line 10"),
+            ("labels.yaml", 15, "Label 'bug' differs from label 'Bug' at line 5"),
+        ]
+
+    def test_merge_keys(self, tmp_path: Path):
+        path = _write(
+            tmp_path / "labels.yaml",
+            """
+            label_sets:
+              common: &common
+                Bug: &bug {color: d73a4a}
+            labels:
+              <<: *common
+              Docs: {<<: *bug, description: Improvements or additions to documentation}
+              Feature: {<<: [*bug, {color: red}]}
+              UI: {<<: *bug, colour: "000000"}
+              Bad: {<<: 3}
+            """,
+        )
+        assert _issues(path) == [
+            (8, "Unknown key 'colour' in label 'UI', expect one of color, description, previous_names, aliases."),
+            (9, "Label 'Bad' misses the required key 'color'."),
+            (9, "The merge key '<<' of label 'Bad' should merge a mapping or a list of mappings."),
+        ]
+
+    def test_invalid_config(self, tmp_path: Path):
+        path = _write(
+            tmp_path / "labels.yaml",
+            """
+            repository: [owner/repo]
+            repositories: [owner]
+            delete_unused: "yes"
+            organization:
+              topics: label-bot
+            default_label_sets: [backend]
+            labels:
+              Bug: {color: d73a4a}
+              Bug: {color: d73a4a}
+            """,
+        )
+        assert _issues(path) == [
+            (
+                1,
+                "Unknown key 'repository' in the configuration, expect one of extends, repositories, delete_unused, "
+                "labels, organization, label_sets, default_label_sets, overrides.",
+            ),
+            (2, "Repository 'owner' should be *owner/name*."),
+            (3, "Delete_unused should be true or false."),
+            (5, "Organization misses the required key 'name'."),
+            (5, "Organization.topics should be a list of strings."),
+            (6, "Label set 'backend' is used but not defined in *label_sets*."),
+            (9, "Key 'Bug' is defined again in labels, the one at line 8 is ignored."),
+        ]
+
+    def test_invalid_yaml(self, tmp_path: Path):
+        path = _write(tmp_path / "labels.yaml", "labels:\n  Bug: {color: d73a4a\n")
+        issues = validate_config(str(path))
+        assert len(issues) == 1
+        assert issues[0].line == 3
+        assert issues[0].message.startswith("Invalid YAML")
+
+    def test_invalid_extends(self, tmp_path: Path):
+        _write(tmp_path / "base.yaml", "labels:\n  Bug: {color: d73a4a, description: 1}\nextends: labels.yaml\n")
+        path = _write(tmp_path / "labels.yaml", "extends:\n  - base.yaml\n  - missing.yaml\n")
+
+        issues = validate_config(str(path))
+
+        assert [(Path(issue.path).name, issue.line, issue.message.split(" ")[0]) for issue in issues] == [
+            ("base.yaml", 2, "The"),
+            ("base.yaml", 3, "Configuration"),
+            ("labels.yaml", 3, "The"),
+        ]
+        assert issues[2].message == f"The extended configuration {tmp_path / 'missing.yaml'} doesn't exist."
+
+
+def test_config_issue_format():
+    issue = ConfigIssue(path="labels.yaml", line=3, column=5, message="Invalid color.")
+    assert str(issue) == "labels.yaml:3:5: Invalid color."
+    assert issue.annotation() == "::error file=labels.yaml,line=3,col=5::Invalid color."
+    assert ConfigIssue("/workspace/.github/labels.yaml", 3, 5, "Invalid color.").annotation("/workspace") == (
+        "::error file=.github/labels.yaml,line=3,col=5::Invalid color."
+    )